@@ -1,12 +1,40 @@
 import streamlit as st
-from utils.file_utils import extract_zip_to_tempdir, get_all_files_by_type, build_image_groups
+from utils.file_utils import (
+    ARCHIVE_TYPES, spool_upload_to_disk, is_tar_archive, is_zip_archive, extract_zip_to_tempdir,
+    extract_tar_to_tempdir, get_all_files_by_type, build_image_groups
+)
 from components.image_group_viewer import display_image_group
 from utils.export_utils import generate_annotation_csv
 from components.group_classifier import classify_group
+from components.rapid_labeler import show_rapid_labeler
+from components.bulk_labeler import show_bulk_labeler
+from components.validation_report import show_validation_report
+from utils.validation import validate_dataset
+from utils.image_metrics import compute_image_metrics
+from utils.error_likelihood import compute_error_signals
+from components.group_queue import select_group_order
+from utils.perceptual_hash import compute_image_hashes, cluster_near_duplicates, MAX_DUPLICATE_DISTANCE
+from components.duplicate_panel import show_near_duplicates
 from components.word_digit_labeler import label_digits, label_words
-from utils.file_utils import parse_digits_from_file, parse_words_from_file
+from utils.file_utils import parse_digits_from_file, parse_words_from_file, get_cache_dir
+from utils.dataset_registry import list_datasets, open_dataset, get_ocr_output
 from components.visualization_dashboard import show_visualization_dashboard
+from components.performance_panel import show_performance_panel
+from components.telemetry_panel import show_telemetry_dashboard
+from components.training_export_panel import show_training_export
+from components.agreement_panel import show_agreement_panel
+from components.version_compare_panel import (
+    select_baseline, compare_with_baseline, filter_changed_groups, show_version_diff
+)
+from utils.label_store import migrate_label_stores
+from utils import perf, telemetry
+import os
+import tarfile
 import time
+import zipfile
+
+run_start = time.perf_counter()
+interaction_start = telemetry.begin_rerun()
 
 
 st.set_page_config(
@@ -15,21 +43,63 @@ st.set_page_config(
     page_icon="📬"
 )
 
+# Sessions started before the compact label format are converted once
+migrate_label_stores(st.session_state)
+
 st.title("📬 Postal Package Image Analyzer")
 st.markdown("*Efficient analysis and labeling of postal package images*")
 
-# === FILE UPLOAD SECTION ===
-st.markdown("### 📁 Upload Data")
-uploaded_zip = st.file_uploader(
-    "Upload zipped data folder:", 
-    type="zip",
-    help="Upload a ZIP file containing your image folders (images, postcode_raw, receiver_raw, etc.)"
+# === DATA SOURCE SECTION ===
+registered_datasets = list_datasets()
+dataset = None
+baseline_metadata = None
+uploaded_zip = None
+
+if registered_datasets:
+    data_source = st.radio(
+        "Data source:",
+        ["📚 Registered dataset", "📤 Upload ZIP"],
+        horizontal=True,
+        key="data_source"
+    )
+else:
+    data_source = "📤 Upload ZIP"
+
+if data_source == "📚 Registered dataset":
+    st.markdown("### 📚 Open Dataset")
+    dataset_names = [metadata["name"] for metadata in registered_datasets]
+    selected_name = st.selectbox(
+        "Dataset:",
+        dataset_names,
+        format_func=lambda name: f"{name} ({registered_datasets[dataset_names.index(name)]['n_groups']} groups)",
+        key="registry_dataset"
+    )
+    selected_metadata = registered_datasets[dataset_names.index(selected_name)]
+    dataset = open_dataset(selected_name, selected_metadata["revision"])
+    baseline_metadata = select_baseline(selected_name, registered_datasets)
+else:
+    # === FILE UPLOAD SECTION ===
+    st.markdown("### 📁 Upload Data")
+    uploaded_zip = st.file_uploader(
+        "Upload zipped data folder:", 
+        type=ARCHIVE_TYPES,
+        help="Upload a ZIP or tar (.tar, .tar.gz, .tar.bz2, .tar.xz) archive containing your image folders (images, postcode_raw, receiver_raw, etc.)"
+    )
+
+st.sidebar.text_input(
+    "👤 Annotator:",
+    key="annotator",
+    help="Name recorded with this session's throughput telemetry"
 )
 
-if uploaded_zip:
-    # Show file info
-    file_size = uploaded_zip.size / (1024 * 1024)  # Convert to MB
-    st.info(f"📦 Uploaded: **{uploaded_zip.name}** ({file_size:.1f} MB)")
+if dataset is not None or uploaded_zip:
+    if dataset is not None:
+        st.info(f"📚 Dataset: **{dataset.name}** (revision {dataset.metadata.get('revision')}, "
+                f"ingested {dataset.metadata.get('ingested_at')})")
+    else:
+        # Show file info
+        file_size = uploaded_zip.size / (1024 * 1024)  # Convert to MB
+        st.info(f"📦 Uploaded: **{uploaded_zip.name}** ({file_size:.1f} MB)")
     
     # Processing with enhanced loading states
     with st.container():
@@ -39,37 +109,109 @@ if uploaded_zip:
         step_container = st.container()
         
         with step_container:
-            # Step 1: Extraction
-            with st.status("🔄 Extracting ZIP file...", expanded=True) as status:
-                temp_dir = extract_zip_to_tempdir(uploaded_zip)
-                status.update(label="✅ ZIP extraction complete!", state="complete")
+            if dataset is not None:
+                # Registered datasets are pre-ingested: index, validation, metrics and hashes come from disk
+                temp_dir = dataset.data_dir
+                file_dict = dataset.file_dict
+                groups = dataset.groups
+                validation_report = dataset.validation_report
+                image_metrics = dataset.image_metrics
+                image_hashes = dataset.image_hashes
+                error_signals = dataset.error_signals
+                st.success(f"✅ Loaded {len(groups)} image groups from the registry")
+            else:
+                # Step 1: Extraction
+                with st.status("🔄 Extracting archive...", expanded=True) as status:
+                    # The upload is copied to disk once per session; later steps only see the file path
+                    spooled = st.session_state.get("spooled_upload")
+                    if not spooled or spooled[0] != uploaded_zip.file_id or not os.path.exists(spooled[1]):
+                        spooled = (uploaded_zip.file_id, spool_upload_to_disk(uploaded_zip))
+                        st.session_state["spooled_upload"] = spooled
+                    readable = True
+                    try:
+                        if is_tar_archive(spooled[1]):
+                            # Tar archives are categorized and grouped while they are streamed
+                            temp_dir, file_dict, groups = extract_tar_to_tempdir(spooled[1])
+                        elif is_zip_archive(spooled[1]):
+                            temp_dir = extract_zip_to_tempdir(spooled[1])
+                            file_dict = groups = None
+                        else:
+                            # e.g. a single compressed file (.gz, .bz2, .xz) that is not a tarball
+                            readable = False
+                    except (zipfile.BadZipFile, tarfile.TarError, EOFError):
+                        readable = False
+                    if not readable:
+                        status.update(label="❌ Archive could not be read", state="error")
+                        st.error(f"❌ **{uploaded_zip.name}** is not a readable ZIP or tar archive. Compressed "
+                                 "files (.gz, .bz2, .xz) must contain a tar archive (.tar.gz, .tar.bz2, .tar.xz).")
+                        st.stop()
+                    status.update(label="✅ Archive extraction complete!", state="complete")
             
-            # Step 2: File scanning
-            with st.status("🔍 Scanning and organizing files...", expanded=True) as status:
-                file_dict = get_all_files_by_type(temp_dir)
+                # Step 2: File scanning
+                with st.status("🔍 Scanning and organizing files...", expanded=True) as status:
+                    if file_dict is None:
+                        file_dict = get_all_files_by_type(temp_dir)
                 
-                # Show file summary
-                total_files = sum(len(files) for files in file_dict.values())
-                st.write(f"📊 **Found {total_files} files across {len(file_dict)} categories:**")
+                    # Show file summary
+                    total_files = sum(len(files) for files in file_dict.values())
+                    st.write(f"📊 **Found {total_files} files across {len(file_dict)} categories:**")
                 
-                # Display file counts by category
-                cols = st.columns(4)
-                for i, (category, files) in enumerate(file_dict.items()):
-                    with cols[i % 4]:
-                        st.metric(category.replace("_", " ").title(), len(files))
+                    # Display file counts by category
+                    cols = st.columns(4)
+                    for i, (category, files) in enumerate(file_dict.items()):
+                        with cols[i % 4]:
+                            st.metric(category.replace("_", " ").title(), len(files))
                 
-                status.update(label="✅ File scanning complete!", state="complete")
+                    status.update(label="✅ File scanning complete!", state="complete")
             
-            # Step 3: Group building
-            with st.status("🏗️ Building image groups...", expanded=True) as status:
-                groups = build_image_groups(file_dict)
+                # Step 3: Group building
+                with st.status("🏗️ Building image groups...", expanded=True) as status:
+                    if groups is None:
+                        groups = build_image_groups(file_dict)
                 
-                st.write(f"🎯 **Successfully created {len(groups)} image groups**")
+                    st.write(f"🎯 **Successfully created {len(groups)} image groups**")
                 
-                if len(groups) > 100:
-                    st.warning(f"⚠️ Large dataset detected ({len(groups)} groups). Navigation and loading optimized for performance.")
+                    if len(groups) > 100:
+                        st.warning(f"⚠️ Large dataset detected ({len(groups)} groups). Navigation and loading optimized for performance.")
                 
-                status.update(label="✅ Image groups ready!", state="complete")
+                    status.update(label="✅ Image groups ready!", state="complete")
+
+                # Step 4: Validation
+                with st.status("🩺 Validating dataset...", expanded=False) as status:
+                    validation_report = validate_dataset(file_dict)
+                    if validation_report.empty:
+                        status.update(label="✅ Validation passed!", state="complete")
+                    else:
+                        status.update(label=f"⚠️ Validation found {len(validation_report)} issues", state="complete")
+
+                # Step 5: Image quality metrics
+                with st.status("📐 Computing image quality metrics...", expanded=False) as status:
+                    image_metrics = compute_image_metrics(groups)
+                    status.update(label="✅ Image quality metrics ready!", state="complete")
+
+                # Step 6: Perceptual hashes for near-duplicate detection
+                with st.status("🧬 Hashing scans...", expanded=False) as status:
+                    image_hashes = compute_image_hashes(groups)
+                    status.update(label="✅ Perceptual hashes ready!", state="complete")
+
+                # Step 7: Score groups by error likelihood
+                with st.status("⚠️ Scoring groups by error likelihood...", expanded=False) as status:
+                    error_signals = compute_error_signals(groups, image_metrics)
+                    status.update(label="✅ Error-likelihood signals ready!", state="complete")
+
+            with st.status("🧬 Detecting near-duplicate scans...", expanded=False) as status:
+                duplicate_distance = min(st.session_state.get("duplicate_distance", 6), MAX_DUPLICATE_DISTANCE)
+                duplicate_clusters = cluster_near_duplicates(image_hashes, duplicate_distance)
+                n_clusters = duplicate_clusters["cluster_id"].nunique()
+                status.update(label=f"✅ Found {n_clusters} near-duplicate clusters", state="complete")
+
+        show_validation_report(validation_report)
+
+    # === OCR VERSION COMPARISON ===
+    comparison = None
+    if baseline_metadata is not None:
+        st.markdown(f"### 🔁 Comparing with {baseline_metadata['name']}")
+        comparison = compare_with_baseline(baseline_metadata, dataset)
 
     # === MAIN APPLICATION ===
     st.markdown("---")
@@ -95,8 +237,29 @@ if uploaded_zip:
     # === NAVIGATION SECTION ===
     st.markdown("### 🧭 Navigation")
     
-    group_keys = list(groups.keys())
+    group_keys = select_group_order(groups, image_metrics, error_signals)
+    if comparison is not None:
+        group_keys = filter_changed_groups(group_keys, comparison)
+    st.sidebar.slider(
+        "Near-duplicate distance (bits):",
+        min_value=0,
+        max_value=MAX_DUPLICATE_DISTANCE,
+        value=6,
+        key="duplicate_distance",
+        help="Maximum perceptual-hash Hamming distance for two scans to count as duplicates"
+    )
+    rapid_mode = st.sidebar.toggle(
+        "⚡ Rapid labeling mode",
+        key="rapid_mode",
+        help="Label with the keyboard: categories and digit statuses are saved together with Enter"
+    )
+    if not group_keys:
+        st.warning("⚠️ No groups match the current queue filters.")
+        st.stop()
+
     total_groups = len(group_keys)
+    # Queue filters may have shrunk the list since the last run
+    st.session_state.current_group_index = min(st.session_state.current_group_index, total_groups - 1)
     current_index = st.session_state.current_group_index
 
     # Create navigation layout
@@ -137,15 +300,42 @@ if uploaded_zip:
             st.session_state.current_group_index += 1
             st.rerun()
 
+    # === BULK LABELING ===
+    show_bulk_labeler(groups)
+
     # === CURRENT GROUP DISPLAY ===
     selected_key = group_keys[current_index]
+    navigated = telemetry.observe_group(selected_key)
     
     # Loading state for images
     with st.spinner("🖼️ Loading images..."):
-        display_image_group(selected_key, groups[selected_key])
+        quality = image_metrics.loc[selected_key].to_dict() if selected_key in image_metrics.index else None
+        display_image_group(selected_key, groups[selected_key], quality,
+                            diff_cache_dir=get_cache_dir(temp_dir, "diffs"),
+                            tile_cache_dir=get_cache_dir(temp_dir, "tiles"))
+    if navigated:
+        telemetry.observe_image_ready(selected_key, interaction_start)
+
+    if comparison is not None:
+        show_version_diff(comparison, selected_key)
+
+    # Registered datasets carry a pre-parsed OCR store; uploads parse the text files on demand
+    if dataset is not None:
+        digits, words = get_ocr_output(dataset, selected_key)
+    else:
+        with st.spinner("Loading extracted data..."):
+            digits = parse_digits_from_file(groups[selected_key]["digits"]) if "digits" in groups[selected_key] else None
+            words = parse_words_from_file(groups[selected_key]["words"]) if "words" in groups[selected_key] else None
 
     # === IMPROVED LAYOUT ORGANIZATION ===
-    classify_group(selected_key)
+    if rapid_mode:
+        show_rapid_labeler(selected_key, digits, words, total_groups)
+    else:
+        classify_group(selected_key)
+
+    # Near-duplicates of the current group (after classification so its labels can be propagated)
+    show_near_duplicates(selected_key, groups, image_hashes, duplicate_clusters, group_keys,
+                         thumbnail_dir=dataset.thumbnail_dir if dataset is not None else None)
 
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -153,22 +343,18 @@ if uploaded_zip:
     with col1:
         st.markdown("### 📋 Extracted Data")
         
-        # Digits section with loading
+        # Digits section
         with st.container():
-            if "digits" in groups[selected_key]:
-                with st.spinner("Loading digits..."):
-                    digits = parse_digits_from_file(groups[selected_key]["digits"])
+            if digits is not None:
                 digits_str = " ".join(map(str, digits)) if digits else "(empty)"
                 st.markdown("**🔢 Extracted Digits:**")
                 st.code(digits_str, language=None)
             else:
                 st.warning("No digits file found.")
         
-        # Words section with loading
+        # Words section
         with st.container():
-            if "words" in groups[selected_key]:
-                with st.spinner("Loading words..."):
-                    words = parse_words_from_file(groups[selected_key]["words"])
+            if words is not None:
                 words_str = ", ".join(words) if words else "(empty)"
                 st.markdown("**📝 Extracted Words:**")
                 st.code(words_str, language=None)
@@ -176,9 +362,8 @@ if uploaded_zip:
                 st.warning("No words file found.")
 
     with col2:
-        # Word Labeling with loading state
-        if "words" in groups[selected_key]:
-            words = parse_words_from_file(groups[selected_key]["words"])
+        # Word Labeling
+        if words is not None:
             if words:
                 label_words(selected_key, words)
             else:
@@ -187,9 +372,8 @@ if uploaded_zip:
             st.info("No words file available.")
 
     with col3:
-        # Digit Labeling with loading state
-        if "digits" in groups[selected_key]:
-            digits = parse_digits_from_file(groups[selected_key]["digits"])
+        # Digit Labeling
+        if digits is not None:
             if digits:
                 label_digits(selected_key, digits)
             else:
@@ -223,9 +407,13 @@ if uploaded_zip:
                     mime="text/csv"
                 )
 
+    show_training_export(groups, group_keys)
+    show_agreement_panel()
+
     # === VISUALIZATION DASHBOARD ===
     with st.spinner("Loading analytics..."):
-        show_visualization_dashboard()
+        show_visualization_dashboard(image_metrics)
+    show_telemetry_dashboard()
 
 else:
     # Welcome screen when no file is uploaded
@@ -259,4 +447,9 @@ else:
     if "group_labels" in st.session_state:
         st.markdown("### 📈 Current Session Stats")
         total_labeled = len(st.session_state.get("group_labels", {}))
-        st.metric("Groups Labeled", total_labeled)
\ No newline at end of file
+        st.metric("Groups Labeled", total_labeled)
+
+# === PERFORMANCE PANEL (hidden unless ?perf=1) ===
+perf.record("script_run", time.perf_counter() - run_start)
+telemetry.end_rerun()
+show_performance_panel()
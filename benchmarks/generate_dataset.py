@@ -0,0 +1,136 @@
+"""
+Generates synthetic postal datasets in the layout the app expects:
+
+    <root>/images/<key>.jpg
+    <root>/postcode_raw/<key>_postcode.jpg
+    <root>/postcode_preprocessed/<key>_postcode.jpg
+    <root>/receiver_raw/<key>_receiver.jpg
+    <root>/receiver_preprocessed/<key>_receiver.jpg
+    <root>/digits/<key>_digits_extracted.txt
+    <root>/words/<key>_words_extracted.txt
+
+Image bytes are pre-encoded once per variant and reused, so generating large
+archives is bounded by ZIP writing, not JPEG encoding.
+
+Usage:
+    python -m benchmarks.generate_dataset --groups 10000 --output synthetic_10k.zip
+"""
+import argparse
+import io
+import random
+import zipfile
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image, ImageDraw
+
+IMAGE_SLOTS = {
+    "images": "",
+    "postcode_raw": "_postcode",
+    "postcode_preprocessed": "_postcode",
+    "receiver_raw": "_receiver",
+    "receiver_preprocessed": "_receiver",
+}
+
+PERSIAN_WORDS = [
+    "تهران", "خیابان", "کوچه", "پلاک", "واحد", "طبقه", "شیراز", "اصفهان",
+    "مشهد", "تبریز", "بلوار", "میدان", "آزادی", "انقلاب", "شهید", "محمد",
+]
+
+# Number of distinct pre-encoded images per slot
+N_VARIANTS = 8
+
+
+def _encode_variant(width: int, height: int, seed: int, binarize: bool = False) -> bytes:
+    """
+    Renders a noisy synthetic scan with some text-like blocks and encodes it as JPEG.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.normal(200, 20, (height, width)).clip(0, 255).astype(np.uint8)
+    img = Image.fromarray(base)
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = int(rng.integers(0, max(width - 40, 1))), int(rng.integers(0, max(height - 12, 1)))
+        draw.rectangle([x, y, x + int(rng.integers(10, 40)), y + int(rng.integers(4, 12))], fill=int(rng.integers(0, 80)))
+    if binarize:
+        img = img.point(lambda p: 255 if p > 128 else 0)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _build_variants(image_size: Tuple[int, int]) -> Dict[str, List[bytes]]:
+    width, height = image_size
+    crop_sizes = {
+        "images": (width, height),
+        "postcode_raw": (max(width // 4, 8), max(height // 10, 8)),
+        "postcode_preprocessed": (max(width // 4, 8), max(height // 10, 8)),
+        "receiver_raw": (max(width // 2, 8), max(height // 6, 8)),
+        "receiver_preprocessed": (max(width // 2, 8), max(height // 6, 8)),
+    }
+    return {
+        slot: [_encode_variant(*crop_sizes[slot], seed=i, binarize=slot.endswith("preprocessed"))
+               for i in range(N_VARIANTS)]
+        for slot in IMAGE_SLOTS
+    }
+
+
+def _digits_text(rng: random.Random) -> str:
+    # Mostly 10-digit postcodes, with some detection errors (too few/too many digits)
+    length = rng.choices([10, 9, 11, 0], weights=[85, 7, 5, 3])[0]
+    digits = ", ".join(str(rng.randint(0, 9)) for _ in range(length))
+    return f"Postcode OCR result\nExtracted Digits: [{digits}]\n" if length else "Postcode OCR result\n"
+
+
+def _words_text(rng: random.Random) -> str:
+    words = rng.sample(PERSIAN_WORDS, rng.randint(0, 6)) + ["0"] * rng.randint(0, 2)
+    return f"Receiver OCR result\nIndividual Words: {', '.join(words)}\n"
+
+
+def generate_dataset(output_path: str, n_groups: int, image_size: Tuple[int, int] = (640, 480),
+                     missing_rate: float = 0.01, root: str = "dataset", seed: int = 0) -> int:
+    """
+    Writes a synthetic dataset ZIP with n_groups groups. Each slot is independently
+    left out with probability missing_rate. Returns the number of files written.
+    """
+    rng = random.Random(seed)
+    variants = _build_variants(image_size)
+    n_files = 0
+
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i in range(n_groups):
+            key = f"cam{i % 4}_{i:07d}"
+            for slot, suffix in IMAGE_SLOTS.items():
+                if rng.random() < missing_rate:
+                    continue
+                zf.writestr(f"{root}/{slot}/{key}{suffix}.jpg", variants[slot][i % N_VARIANTS])
+                n_files += 1
+            if rng.random() >= missing_rate:
+                zf.writestr(f"{root}/digits/{key}_digits_extracted.txt", _digits_text(rng))
+                n_files += 1
+            if rng.random() >= missing_rate:
+                zf.writestr(f"{root}/words/{key}_words_extracted.txt", _words_text(rng))
+                n_files += 1
+
+    return n_files
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic postal dataset ZIP.")
+    parser.add_argument("--groups", type=int, default=1000, help="Number of image groups (100 .. 1000000)")
+    parser.add_argument("--output", required=True, help="Path of the ZIP to write")
+    parser.add_argument("--image-size", type=_parse_size, default=(640, 480), help="Original image size, e.g. 640x480")
+    parser.add_argument("--missing-rate", type=float, default=0.01, help="Probability that a slot is missing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_files = generate_dataset(args.output, args.groups, args.image_size, args.missing_rate, seed=args.seed)
+    print(f"Wrote {n_files} files for {args.groups} groups to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
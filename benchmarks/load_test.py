@@ -0,0 +1,323 @@
+"""
+Rerun-latency load test: simulates N concurrent annotators against app.py.
+
+Every simulated annotator is a headless Streamlit session (streamlit.testing AppTest)
+running a realistic workflow: upload a dataset, then for several groups classify,
+label digits and words and go to the next group, and finally export. All sessions
+run in this process, so they share Streamlit's caches exactly as sessions on one
+server do. For each session count the script-run latency percentiles and the
+process memory per session are reported.
+
+AppTest cannot drive st.file_uploader, so the driver script patches it to return
+the synthetic ZIP as an UploadedFile, which goes through the normal upload path.
+
+Usage:
+    python -m benchmarks.load_test --sessions 1 5 10 20 --groups-per-session 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import numpy as np  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.element_tree import Block, Dataframe, Widget  # noqa: E402
+from benchmarks.generate_dataset import generate_dataset  # noqa: E402
+from components.group_classifier import ERROR_CATEGORIES  # noqa: E402
+from components.word_digit_labeler import DIGIT_EDITOR_PREFIX, DIGIT_STATUS_OPTIONS  # noqa: E402
+
+DRIVER_TEMPLATE = '''
+import os
+import sys
+import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile, UploadedFileRec
+
+sys.path.insert(0, {root_dir!r})
+os.chdir({root_dir!r})
+
+
+def _load_test_uploader(*args, **kwargs):
+    # Only the dataset uploader gets a file; any other uploader stays empty
+    accepted = kwargs.get("type") or ()
+    if "zip" not in accepted:
+        return [] if kwargs.get("accept_multiple_files") else None
+    if "_load_test_upload" not in st.session_state:
+        with open({zip_path!r}, "rb") as f:
+            record = UploadedFileRec(file_id="load-test", name=os.path.basename({zip_path!r}),
+                                     type="application/zip", data=f.read())
+        st.session_state["_load_test_upload"] = UploadedFile(record, None)
+    upload = st.session_state["_load_test_upload"]
+    upload.seek(0)
+    return upload
+
+
+st.file_uploader = _load_test_uploader
+with open({app_path!r}, encoding="utf-8") as f:
+    exec(compile(f.read(), {app_path!r}, "exec"), {{"__name__": "__main__"}})
+'''
+
+
+def _current_rss_mb() -> Optional[float]:
+    """
+    Current (not peak) resident set size of this process, Linux only.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _find(elements, label_prefix: str):
+    for element in elements:
+        if str(element.label).startswith(label_prefix):
+            return element
+    return None
+
+
+class _DataEditor(Widget):
+    """
+    st.data_editor, which AppTest only parses as a read-only dataframe. Cell edits are
+    sent as the editor's JSON widget state, the way the browser sends them.
+    """
+
+    def __init__(self, dataframe: Dataframe):
+        self.proto = dataframe.proto
+        self.root = dataframe.root
+        self.type = "data_editor"
+        self.id = dataframe.proto.id
+        self.key = dataframe.key
+        self.disabled = False
+        self._value = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+
+    @property
+    def value(self):
+        return Dataframe.value.fget(self)
+
+    def edit_cell(self, row: int, column: str, value) -> "_DataEditor":
+        self._value["edited_rows"].setdefault(str(row), {})[column] = value
+        return self
+
+    @property
+    def _widget_state(self) -> WidgetState:
+        state = WidgetState()
+        state.id = self.id
+        state.string_value = json.dumps(self._value)
+        return state
+
+
+def _data_editor(at: AppTest, key_prefix: str) -> Optional[_DataEditor]:
+    """
+    The data editor whose key starts with key_prefix, swapped into the element tree as an
+    editable widget so its edits are part of the next run.
+    """
+    for node in at._tree:
+        if not isinstance(node, Block):
+            continue
+        for index, child in node.children.items():
+            if isinstance(child, Dataframe) and str(child.key or "").startswith(key_prefix):
+                editor = _DataEditor(child)
+                node.children[index] = editor
+                return editor
+    return None
+
+
+class SessionDriver:
+    """
+    One simulated annotator. Every script run is timed and tagged with the action that caused it.
+    """
+
+    def __init__(self, driver_path: str, seed: int, think_time: float, timeout: float):
+        self.at = AppTest.from_file(driver_path, default_timeout=timeout)
+        self.rng = random.Random(seed)
+        self.think_time = think_time
+        self.timings: List[Dict] = []
+
+    def _run(self, action: str):
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        start = time.perf_counter()
+        self.at.run()
+        self.timings.append({"action": action, "seconds": time.perf_counter() - start})
+        if self.at.exception:
+            raise RuntimeError(f"{action}: {self.at.exception[0].value}")
+
+    def upload(self):
+        self._run("upload")
+
+    def classify(self):
+        multiselect = _find(self.at.multiselect, "Select one or more labels")
+        if multiselect is not None and self.rng.random() < 0.4:
+            multiselect.select(self.rng.choice(ERROR_CATEGORIES))
+            self._run("classify")
+
+    def label_digits(self):
+        editor = _data_editor(self.at, DIGIT_EDITOR_PREFIX)
+        submit = _find(self.at.button, "✅ Apply Digit Labels")
+        if editor is None and any(str(info.value).startswith("No digits") for info in self.at.info):
+            return
+        if editor is None or submit is None:
+            raise RuntimeError("label_digits: digit editor form not found; the driver is out of date with the app")
+        rows = len(editor.value)
+        if rows and self.rng.random() < 0.3:
+            row = self.rng.randrange(rows)
+            editor.edit_cell(row, "Status", DIGIT_STATUS_OPTIONS[1])
+            editor.edit_cell(row, "Correct value", self.rng.randrange(10))
+        submit.click()
+        self._run("label_digits")
+
+    def label_words(self):
+        multiselect = _find(self.at.multiselect, "⚠️ Select words")
+        submit = _find(self.at.button, "✅ Apply Word Changes")
+        if multiselect is not None and submit is not None:
+            if multiselect.options and self.rng.random() < 0.3:
+                multiselect.select(self.rng.choice(multiselect.options))
+            submit.click()
+            self._run("label_words")
+
+    def next_group(self):
+        button = _find(self.at.button, "Next ➡️")
+        if button is not None and not button.disabled:
+            button.click()
+            self._run("next")
+
+    def export(self):
+        button = _find(self.at.button, "⚡ Quick Export")
+        if button is not None:
+            button.click()
+            self._run("export")
+
+    def workflow(self, n_groups: int):
+        self.upload()
+        for _ in range(n_groups):
+            self.classify()
+            self.label_digits()
+            self.label_words()
+            self.next_group()
+        self.export()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    array = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(array, 50)), 4),
+        "p95": round(float(np.percentile(array, 95)), 4),
+        "p99": round(float(np.percentile(array, 99)), 4),
+        "max": round(float(array.max()), 4),
+    }
+
+
+def run_load_level(driver_path: str, n_sessions: int, groups_per_session: int, think_time: float,
+                   timeout: float) -> Dict:
+    """
+    Runs n_sessions concurrent annotators to completion and summarizes their script-run latencies.
+    """
+    rss_before = _current_rss_mb()
+    drivers = [SessionDriver(driver_path, seed=i, think_time=think_time, timeout=timeout) for i in range(n_sessions)]
+    errors = []
+    lock = threading.Lock()
+
+    def run(driver: SessionDriver):
+        try:
+            driver.workflow(groups_per_session)
+        except Exception as e:
+            with lock:
+                errors.append(str(e)[:200])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as executor:
+        list(executor.map(run, drivers))
+    elapsed = time.perf_counter() - start
+
+    # Drivers (and their session state) are still alive here, so RSS includes every session
+    rss_after = _current_rss_mb()
+    timings = [t for driver in drivers for t in driver.timings]
+    by_action = {}
+    for action in sorted({t["action"] for t in timings}):
+        by_action[action] = _percentiles([t["seconds"] for t in timings if t["action"] == action])
+
+    result = {
+        "sessions": n_sessions,
+        "script_runs": len(timings),
+        "wall_seconds": round(elapsed, 2),
+        "latency": _percentiles([t["seconds"] for t in timings if t["action"] != "upload"]),
+        "latency_by_action": by_action,
+        "rss_mb": round(rss_after, 1) if rss_after else None,
+        "rss_mb_per_session": round((rss_after - rss_before) / n_sessions, 2) if rss_after and rss_before else None,
+        "errors": errors,
+    }
+    del drivers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent annotators against app.py.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20], help="Concurrent session counts")
+    parser.add_argument("--groups-per-session", type=int, default=5, help="Groups each annotator labels")
+    parser.add_argument("--dataset-groups", type=int, default=200, help="Size of the synthetic dataset")
+    parser.add_argument("--zip", help="Use this dataset ZIP instead of a generated one")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between actions, seconds")
+    parser.add_argument("--timeout", type=float, default=300, help="Per script-run timeout, seconds")
+    parser.add_argument("--max-p95", type=float, default=1.0, help="p95 latency (s) regarded as unresponsive")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    zip_path = args.zip
+    if not zip_path:
+        workdir = os.path.join(ROOT_DIR, "benchmarks", ".data")
+        os.makedirs(workdir, exist_ok=True)
+        zip_path = os.path.join(workdir, f"load_test_{args.dataset_groups}.zip")
+        if not os.path.exists(zip_path):
+            generate_dataset(zip_path, args.dataset_groups)
+
+    with tempfile.NamedTemporaryFile("w", suffix="_driver.py", delete=False, encoding="utf-8") as f:
+        f.write(textwrap.dedent(DRIVER_TEMPLATE.format(
+            root_dir=ROOT_DIR, zip_path=os.path.abspath(zip_path), app_path=os.path.join(ROOT_DIR, "app.py")
+        )))
+        driver_path = f.name
+
+    results = []
+    try:
+        for n_sessions in args.sessions:
+            print(f"Running {n_sessions} concurrent sessions ...", flush=True)
+            result = run_load_level(driver_path, n_sessions, args.groups_per_session, args.think_time, args.timeout)
+            results.append(result)
+            latency = result["latency"]
+            print(f"  p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s  "
+                  f"RSS {result['rss_mb']} MB ({result['rss_mb_per_session']} MB/session)  "
+                  f"errors {len(result['errors'])}", flush=True)
+    finally:
+        os.unlink(driver_path)
+
+    saturated = next((r["sessions"] for r in results
+                      if r["latency"]["p95"] is not None and r["latency"]["p95"] > args.max_p95), None)
+    if saturated:
+        print(f"\np95 latency exceeds {args.max_p95}s at {saturated} concurrent sessions")
+    else:
+        print(f"\np95 latency stayed below {args.max_p95}s for all tested session counts")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"max_p95": args.max_p95, "saturated_at": saturated, "levels": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
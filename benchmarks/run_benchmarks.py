@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark of the ingest, browsing and export paths on synthetic datasets.
+
+Each stage is timed on the uncached function (Streamlit caches are bypassed) and
+reports wall time, throughput, the process peak RSS after the stage and, with
+--trace-memory, the peak Python allocation during the stage.
+
+Usage:
+    python -m benchmarks.run_benchmarks --groups 100 10000 --output bench.json
+    python -m benchmarks.run_benchmarks --groups 10000 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+import zipfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The functions under test call st.* outside a session; keep the bare-mode warnings quiet
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+from benchmarks.generate_dataset import generate_dataset  # noqa: E402
+from components.group_classifier import ERROR_CATEGORIES  # noqa: E402
+from utils import analytics, report  # noqa: E402
+from utils.export_utils import build_annotation_dataframe  # noqa: E402
+from utils.file_utils import (  # noqa: E402
+    extract_zip_to_tempdir, get_all_files_by_type, build_image_groups,
+    load_image, parse_digits_from_file, parse_words_from_file
+)
+from utils.image_metrics import compute_image_metrics  # noqa: E402
+from utils.label_store import DigitLabels, CORRECT, INCORRECT, UNKNOWN  # noqa: E402
+from utils.perceptual_hash import compute_image_hashes, cluster_near_duplicates  # noqa: E402
+from utils.validation import validate_dataset  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _uncached(func: Callable) -> Callable:
+    """
+    The plain function behind a st.cache_data wrapper, so every run does the real work.
+    """
+    return getattr(func, "__wrapped__", func)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(func: Callable, n_items: int, trace_memory: bool) -> Tuple[object, Dict]:
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "seconds": round(elapsed, 4),
+        "items": n_items,
+        "items_per_second": round(n_items / elapsed, 1) if elapsed > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if trace_memory:
+        stats["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    return result, stats
+
+
+def _synthetic_annotations(groups: Dict[str, Dict[str, str]], seed: int = 0) -> Tuple[Dict, Dict, Dict, Dict]:
+    """
+    Random annotations for every group, in the session state format.
+    """
+    rng = random.Random(seed)
+    group_labels, digit_labels, word_labels, missed_words = {}, {}, {}, {}
+    for key in groups:
+        group_labels[key] = rng.sample(ERROR_CATEGORIES, rng.choice([0, 0, 1, 2]))
+        status = rng.choices([CORRECT, INCORRECT, UNKNOWN], weights=[85, 10, 5], k=10)
+        predicted = [rng.randint(0, 9) for _ in range(10)]
+        corrected = [rng.randint(0, 9) if s == INCORRECT else None for s in status]
+        digit_labels[key] = DigitLabels(status, predicted, corrected)
+        words = rng.sample(["تهران", "خیابان", "کوچه", "پلاک", "واحد", "شیراز"], 3)
+        word_labels[key] = {w: rng.choice([True, True, False]) for w in words}
+        missed_words[key] = rng.sample(["بلوار", "میدان", "طبقه"], rng.randint(0, 2))
+    return group_labels, digit_labels, word_labels, missed_words
+
+
+def run_scale(zip_path: str, image_sample: int, trace_memory: bool) -> Dict[str, Dict]:
+    """
+    Runs every stage once on the dataset in zip_path and returns {stage: stats}.
+    """
+    results = {}
+
+    def stage(name: str, func: Callable, n_items: int):
+        result, stats = _measure(func, n_items, trace_memory)
+        results[name] = stats
+        print(f"  {name:<40} {stats['seconds']:>9.3f}s  {stats['items_per_second'] or 0:>12.1f} items/s", flush=True)
+        return result
+
+    with zipfile.ZipFile(zip_path) as zf:
+        n_archive_files = len(zf.namelist())
+    temp_dir = stage("extract_zip_to_tempdir", lambda: _uncached(extract_zip_to_tempdir)(zip_path), n_archive_files)
+
+    try:
+        file_dict = stage("get_all_files_by_type", lambda: get_all_files_by_type(temp_dir), n_archive_files)
+        n_files = sum(len(paths) for paths in file_dict.values())
+        groups = stage("build_image_groups", lambda: build_image_groups(file_dict), n_files)
+        stage("validate_dataset", lambda: _uncached(validate_dataset)(file_dict), n_files)
+
+        digits_files = file_dict["digits"]
+        words_files = file_dict["words"]
+        stage("parse_digits_from_file", lambda: [_uncached(parse_digits_from_file)(p) for p in digits_files], len(digits_files))
+        stage("parse_words_from_file", lambda: [_uncached(parse_words_from_file)(p) for p in words_files], len(words_files))
+
+        sample_keys = list(groups)[:image_sample]
+        sample_groups = {k: groups[k] for k in sample_keys}
+        sample_images = [groups[k]["images"] for k in sample_keys if "images" in groups[k]]
+        # load() forces the pixel decode that st.image would otherwise trigger later
+        stage("load_image", lambda: [_uncached(load_image)(p).load() for p in sample_images], len(sample_images))
+        stage("compute_image_metrics", lambda: _uncached(compute_image_metrics)(sample_groups), len(sample_groups))
+        hashes = stage("compute_image_hashes", lambda: _uncached(compute_image_hashes)(sample_groups), len(sample_groups))
+        stage("cluster_near_duplicates", lambda: _uncached(cluster_near_duplicates)(hashes), len(hashes))
+
+        annotations = _synthetic_annotations(groups)
+        df = stage("build_annotation_dataframe", lambda: build_annotation_dataframe(*annotations), len(groups))
+
+        for name in ["count_group_labels", "count_digit_labels", "digit_confusion_matrix",
+                     "summarize_word_labels", "count_missed_words_per_group", "missed_word_frequencies"]:
+            func = getattr(analytics, name)
+            stage(f"dashboard.{name}", lambda: func(df), len(df))
+        stage("report.summarize_annotations", lambda: report.summarize_annotations(df), len(df))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Prints a stage-by-stage comparison of two result files and returns the regressed stages.
+    """
+    regressions = []
+    print(f"\nComparison against baseline {baseline['meta'].get('commit')} (tolerance {tolerance:.0%})")
+    for scale, stages in current["results"].items():
+        base_stages = baseline["results"].get(scale)
+        if not base_stages:
+            print(f"  {scale} groups: not in baseline")
+            continue
+        print(f"  {scale} groups:")
+        for name, stats in stages.items():
+            if name not in base_stages:
+                continue
+            before, after = base_stages[name]["seconds"], stats["seconds"]
+            ratio = after / before if before > 0 else float("inf")
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "REGRESSION"
+                regressions.append(f"{scale}/{name}")
+            elif ratio < 1 - tolerance:
+                flag = "faster"
+            print(f"    {name:<40} {before:>9.3f}s -> {after:>9.3f}s  x{ratio:5.2f}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, browsing and export on synthetic datasets.")
+    parser.add_argument("--groups", type=int, nargs="+", default=[100, 1000], help="Dataset sizes to benchmark")
+    parser.add_argument("--workdir", default=os.path.join("benchmarks", ".data"), help="Where generated ZIPs are kept")
+    parser.add_argument("--image-size", default="640x480", help="Original image size of generated datasets")
+    parser.add_argument("--image-sample", type=int, default=200, help="Groups used for per-image stages")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record peak Python allocations (slower)")
+    parser.add_argument("--output", help="Write results as JSON (usable as a baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    width, height = (int(v) for v in args.image_size.lower().split("x"))
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "image_size": args.image_size,
+            "image_sample": args.image_sample,
+        },
+        "results": {},
+    }
+
+    for n_groups in args.groups:
+        zip_path = os.path.join(args.workdir, f"synthetic_{n_groups}_{args.image_size}.zip")
+        if not os.path.exists(zip_path):
+            print(f"Generating {zip_path} ...", flush=True)
+            generate_dataset(zip_path, n_groups, (width, height))
+        print(f"\n{n_groups} groups ({os.path.getsize(zip_path) / (1024 * 1024):.1f} MB)")
+        output["results"][str(n_groups)] = run_scale(zip_path, args.image_sample, args.trace_memory)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(output, baseline, args.tolerance)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
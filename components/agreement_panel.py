@@ -0,0 +1,101 @@
+import io
+import os
+import time
+import streamlit as st
+from typing import Dict, Tuple
+import pandas as pd
+from components.group_classifier import ERROR_CATEGORIES
+from utils.agreement import load_annotation_set, compute_agreement
+from utils.export_utils import generate_annotation_csv
+from utils import perf
+
+SESSION_SET_NAME = "This session"
+
+
+@perf.cached("agreement", max_entries=4, show_spinner=False)
+def _compute_agreement(named_csvs: Tuple[Tuple[str, bytes], ...]) -> Dict[str, pd.DataFrame]:
+    """
+    Agreement of the given annotation CSVs, cached on their contents.
+    """
+    sets = {name: load_annotation_set(io.BytesIO(data)) for name, data in named_csvs}
+    return compute_agreement(sets, ERROR_CATEGORIES)
+
+
+def _unique_name(name: str, taken: Dict[str, bytes]) -> str:
+    candidate, n = name, 2
+    while candidate in taken:
+        candidate, n = f"{name} ({n})", n + 1
+    return candidate
+
+
+def show_agreement_panel():
+    """
+    Compares annotation CSVs exported by several annotators: Cohen's and Fleiss' kappa per
+    error category and digit position, and the groups they disagree on.
+    """
+    with st.expander("🤝 Inter-Annotator Agreement"):
+        st.caption("Upload the annotation CSVs of two or more annotators (as exported above). "
+                   "Groups are matched by group key; kappa is computed on groups labeled by at least two.")
+
+        uploads = st.file_uploader("Annotation CSVs:", type="csv", accept_multiple_files=True,
+                                   key="agreement_uploads")
+        include_session = st.checkbox(f"Include {SESSION_SET_NAME.lower()}'s annotations", value=False)
+
+        named_csvs: Dict[str, bytes] = {}
+        for upload in uploads or []:
+            named_csvs[_unique_name(os.path.splitext(upload.name)[0], named_csvs)] = upload.getvalue()
+        if include_session:
+            named_csvs[_unique_name(SESSION_SET_NAME, named_csvs)] = \
+                generate_annotation_csv().to_csv(index=False).encode("utf-8")
+
+        if len(named_csvs) < 2:
+            st.info("Add at least two annotation sets to compare.")
+            return
+
+        with st.spinner("Computing agreement..."):
+            result = _compute_agreement(tuple(named_csvs.items()))
+
+        items = result["items"]
+        if items.empty:
+            st.warning("⚠️ No shared labels found in these files.")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Annotation sets", len(named_csvs))
+        with col2:
+            st.metric("Groups compared", int(items["groups"].max()))
+        with col3:
+            st.metric("Mean Fleiss' κ", f"{items['fleiss_kappa'].mean():.3f}")
+
+        st.markdown("**Agreement per item**")
+        st.dataframe(
+            items.rename(columns={"item": "Item", "kind": "Kind", "groups": "Groups",
+                                  "observed_agreement": "Unanimous", "cohen_kappa": "Mean Cohen's κ",
+                                  "fleiss_kappa": "Fleiss' κ"}),
+            use_container_width=True, hide_index=True,
+            column_config={"Unanimous": st.column_config.NumberColumn(format="percent"),
+                           "Mean Cohen's κ": st.column_config.NumberColumn(format="%.3f"),
+                           "Fleiss' κ": st.column_config.NumberColumn(format="%.3f")}
+        )
+
+        if len(named_csvs) > 2:
+            st.markdown("**Cohen's κ per annotator pair**")
+            pairwise = result["pairwise"]
+            pair_means = (pairwise.groupby(["annotator_a", "annotator_b"], sort=False)["cohen_kappa"]
+                          .mean().unstack())
+            st.dataframe(pair_means.style.format("{:.3f}", na_rep="–"), use_container_width=True)
+
+        disagreements = result["disagreements"]
+        st.markdown(f"**Disagreements** ({len(disagreements)} group/item pairs, "
+                    f"{disagreements['group_key'].nunique()} groups)")
+        item_filter = st.multiselect("Items:", items["item"].tolist(), key="agreement_item_filter")
+        shown = disagreements[disagreements["item"].isin(item_filter)] if item_filter else disagreements
+        st.dataframe(shown, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="📥 Download disagreements",
+            data=shown.to_csv(index=False).encode("utf-8"),
+            file_name=f"disagreements_{time.strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            key="agreement_download"
+        )
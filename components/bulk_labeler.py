@@ -0,0 +1,89 @@
+import streamlit as st
+from typing import Dict
+from components.group_classifier import ERROR_CATEGORIES
+from utils.bulk_labeling import select_groups, apply_bulk_labels, undo_last_bulk_operation
+
+SLOT_OPTIONS = [
+    "images",
+    "postcode_raw",
+    "postcode_preprocessed",
+    "receiver_raw",
+    "receiver_preprocessed",
+    "digits",
+    "words",
+]
+
+
+def show_bulk_labeler(groups: Dict[str, Dict[str, str]]):
+    """
+    Renders the bulk labeling panel: select groups by key pattern and filters,
+    then add or remove group labels on all of them with a single submit.
+    """
+    with st.expander("🗂️ Bulk Labeling", expanded=False):
+        with st.form("bulk_label_form"):
+            pattern_col, type_col = st.columns([3, 1])
+            with pattern_col:
+                pattern = st.text_input(
+                    "Group key pattern:",
+                    placeholder="cam3_2024*",
+                    help="Leave empty to match all groups"
+                )
+            with type_col:
+                pattern_type = st.radio("Pattern type:", ["Glob", "Regex"], horizontal=True)
+
+            filter_col1, filter_col2, filter_col3 = st.columns(3)
+            with filter_col1:
+                label_filter = st.selectbox(
+                    "Label filter:",
+                    ["Any", "Unlabeled only", "Labeled only", "Has label"]
+                )
+            with filter_col2:
+                filter_label = st.selectbox("Label (for 'Has label'):", ERROR_CATEGORIES)
+            with filter_col3:
+                missing_slot = st.selectbox("Missing slot:", ["(any)"] + SLOT_OPTIONS)
+
+            add_labels = st.multiselect("➕ Labels to add:", ERROR_CATEGORIES)
+            remove_labels = st.multiselect("➖ Labels to remove:", ERROR_CATEGORIES)
+
+            preview_col, apply_col = st.columns(2)
+            with preview_col:
+                preview = st.form_submit_button("👁️ Preview Selection", use_container_width=True)
+            with apply_col:
+                apply = st.form_submit_button("✅ Apply to Selection", type="primary", use_container_width=True)
+
+        if preview or apply:
+            try:
+                selected = select_groups(
+                    groups,
+                    pattern=pattern.strip(),
+                    pattern_type=pattern_type,
+                    label_filter=label_filter,
+                    label=filter_label,
+                    missing_slot=None if missing_slot == "(any)" else missing_slot,
+                )
+            except Exception as e:
+                st.error(f"❌ Invalid selection: {e}")
+                selected = None
+
+            if selected is not None:
+                if preview:
+                    st.info(f"🎯 {len(selected)} groups match this selection")
+                    if selected:
+                        st.caption(", ".join(selected[:20]) + (" ..." if len(selected) > 20 else ""))
+                elif not add_labels and not remove_labels:
+                    st.warning("Select at least one label to add or remove.")
+                else:
+                    changed = apply_bulk_labels(selected, add=add_labels, remove=remove_labels)
+                    st.session_state["bulk_label_message"] = f"✅ Updated labels on {changed} of {len(selected)} selected groups"
+                    st.rerun()
+
+        if "bulk_label_message" in st.session_state:
+            st.success(st.session_state.pop("bulk_label_message"))
+
+        history = st.session_state.get("bulk_label_history", [])
+        if history:
+            st.caption(f"Last operation: {history[-1]['description']}")
+            if st.button(f"↩️ Undo ({len(history)} available)"):
+                description = undo_last_bulk_operation()
+                st.session_state["bulk_label_message"] = f"↩️ Undid: {description}"
+                st.rerun()
@@ -0,0 +1,95 @@
+import os
+import streamlit as st
+import pandas as pd
+from typing import Dict, List, Optional
+from utils.file_utils import load_image, parse_digits_from_file, parse_words_from_file
+from utils.perceptual_hash import get_duplicates
+from utils.bulk_labeling import apply_label_updates, as_label_list
+
+# Maximum number of duplicate thumbnails shown side by side
+MAX_THUMBNAILS = 5
+
+
+def _ocr_output(group_data: Dict[str, str]):
+    """
+    Parsed (digits, words) of a group, used to decide whether digit/word labels can be shared.
+    """
+    digits = parse_digits_from_file(group_data["digits"]) if "digits" in group_data else None
+    words = parse_words_from_file(group_data["words"]) if "words" in group_data else None
+    return digits, words
+
+
+def propagate_labels(source_key: str, target_keys: List[str], groups: Dict[str, Dict[str, str]],
+                     include_ocr_labels: bool) -> int:
+    """
+    Copies the source group's labels to the target groups in one undoable operation.
+    Group labels are merged; digit/word labels and missed words are copied only to
+    groups whose OCR output is identical to the source's.
+    """
+    group_labels = st.session_state.get("group_labels", {})
+    source_labels = as_label_list(group_labels.get(source_key, []))
+
+    updates = {"group_labels": {}}
+    for key in target_keys:
+        current = as_label_list(group_labels.get(key, []))
+        updates["group_labels"][key] = current + [l for l in source_labels if l not in current]
+
+    if include_ocr_labels:
+        source_ocr = _ocr_output(groups[source_key])
+        for store_name in ["digit_labels", "word_labels", "missed_words"]:
+            source_value = st.session_state.get(store_name, {}).get(source_key)
+            if source_value is None:
+                continue
+            updates[store_name] = {
+                key: source_value for key in target_keys
+                if _ocr_output(groups[key]) == source_ocr
+            }
+
+    return apply_label_updates(updates, f"Propagated labels of {source_key} to {len(target_keys)} duplicates")
+
+
+def show_near_duplicates(group_key: str, groups: Dict[str, Dict[str, str]], hashes: pd.Series,
+                         clusters: pd.DataFrame, group_keys: List[str], thumbnail_dir: Optional[str] = None):
+    """
+    Lists the near-duplicates of the current group and lets the annotator propagate labels to them.
+    Pre-rendered thumbnails (registered datasets) are used when thumbnail_dir is given.
+    """
+    duplicates = get_duplicates(group_key, hashes, clusters)
+    if not duplicates:
+        return
+
+    with st.expander(f"🧬 Near-duplicates of this group ({len(duplicates)})", expanded=True):
+        group_labels = st.session_state.get("group_labels", {})
+        cols = st.columns(MAX_THUMBNAILS)
+        for col, (key, distance) in zip(cols, duplicates[:MAX_THUMBNAILS]):
+            with col:
+                thumbnail = os.path.join(thumbnail_dir, f"{key}.jpg") if thumbnail_dir else None
+                try:
+                    if thumbnail and os.path.exists(thumbnail):
+                        st.image(thumbnail, use_container_width=True)
+                    else:
+                        st.image(load_image(groups[key]["images"]), use_container_width=True)  # type: ignore
+                except Exception:
+                    st.warning("⚠️ Preview unavailable")
+                st.caption(f"`{key}` · distance {distance}")
+                labels = as_label_list(group_labels.get(key, []))
+                st.caption(f"🏷️ {', '.join(labels)}" if labels else "🏷️ unlabeled")
+                if key in group_keys and st.button("Go to", key=f"goto_duplicate_{key}"):
+                    st.session_state.current_group_index = group_keys.index(key)
+                    st.rerun()
+
+        if len(duplicates) > MAX_THUMBNAILS:
+            st.caption("Also: " + ", ".join(f"`{k}`" for k, _ in duplicates[MAX_THUMBNAILS:]))
+
+        include_ocr = st.checkbox(
+            "Also copy digit/word labels to duplicates with identical OCR output",
+            value=True,
+            key="propagate_include_ocr"
+        )
+        if st.button("📋 Propagate labels to all duplicates"):
+            changed = propagate_labels(group_key, [k for k, _ in duplicates], groups, include_ocr)
+            st.session_state["duplicate_message"] = f"✅ Propagated labels ({changed} entries changed)"
+            st.rerun()
+
+        if "duplicate_message" in st.session_state:
+            st.success(st.session_state.pop("duplicate_message"))
@@ -1,4 +1,7 @@
 import streamlit as st
+from utils.bulk_labeling import bump_annotation_revision
+from utils import telemetry
+from components.word_digit_labeler import drop_stale_widget_state
 
 # Define your 6 error categories
 ERROR_CATEGORIES = [
@@ -10,6 +13,9 @@ ERROR_CATEGORIES = [
     "Receiver word detection error"
 ]
 
+CLASSIFY_PREFIX = "classify_"
+CLASSIFY_SYNCED_KEY = "group_classifier_synced"
+
 def classify_group(group_key: str):
     """ظ
     Renders a classification multiselect for the given image group.
@@ -28,16 +34,28 @@ def classify_group(group_key: str):
     if isinstance(current_values, str):
         current_values = [current_values] if current_values else []
 
+    # Keyed per group: an unkeyed widget is shared by groups with the same stored labels,
+    # so a selection made on one group was written to the next
+    widget_key = f"{CLASSIFY_PREFIX}{group_key}"
+    drop_stale_widget_state(CLASSIFY_PREFIX, widget_key)
+    # Labels changed elsewhere since the last render (bulk labels, duplicates, undo) replace the selection
+    if widget_key not in st.session_state or st.session_state.get(CLASSIFY_SYNCED_KEY) != (group_key, current_values):
+        st.session_state[widget_key] = list(current_values)
+
     # Show UI with multiselect
     selected = st.multiselect(
         "Select one or more labels for this group:",
         options=ERROR_CATEGORIES,
-        default=current_values,
+        key=widget_key,
         help="You can select multiple error types if they apply to this group"
     )
 
     # Save to session state
+    if selected != current_values:
+        bump_annotation_revision()
+        telemetry.log_event("submit", group_key, form="categories")
     st.session_state["group_labels"][group_key] = selected
+    st.session_state[CLASSIFY_SYNCED_KEY] = (group_key, list(selected))
     
     # Display current status
     if selected:
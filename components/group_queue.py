@@ -0,0 +1,115 @@
+import streamlit as st
+import pandas as pd
+from typing import Dict, List, Optional
+from utils.error_likelihood import annotated_groups, label_outcomes, learn_signal_weights, rank_by_priority
+
+PRIORITY_ORDER = "⚠️ Error likelihood"
+
+# The priority queue is re-ranked after this many newly annotated groups
+RERANK_EVERY = 10
+
+
+def _metric_label(column: str) -> str:
+    return column.replace("_", " ").title()
+
+
+def _priority_order(keys: List[str], signals: pd.DataFrame) -> List[str]:
+    """
+    Queue ordered by error likelihood, kept in session state and updated incrementally:
+    every RERANK_EVERY new annotations the weights are re-learned and only the part of the
+    queue after the current group is re-ranked, so groups already passed never move.
+    """
+    stores = {name: st.session_state.get(name, {})
+              for name in ["group_labels", "digit_labels", "word_labels", "missed_words"]}
+    annotated = annotated_groups(**stores)
+    fingerprint = (len(keys), keys[0], keys[-1])
+    state = st.session_state.get("priority_queue")
+
+    if state is None or state["fingerprint"] != fingerprint:
+        weights = learn_signal_weights(signals, label_outcomes(**stores))
+        order = rank_by_priority(keys, signals, weights, annotated)
+    elif len(annotated) - state["annotated"] >= RERANK_EVERY:
+        weights = learn_signal_weights(signals, label_outcomes(**stores))
+        split = min(st.session_state.get("current_group_index", 0) + 1, len(state["order"]))
+        order = state["order"][:split] + rank_by_priority(state["order"][split:], signals, weights, annotated)
+    else:
+        return state["order"]
+
+    st.session_state["priority_queue"] = {
+        "fingerprint": fingerprint,
+        "order": order,
+        "annotated": len(annotated),
+        "weights": weights.round(2).to_dict(),
+    }
+    return order
+
+
+def select_group_order(groups: Dict[str, Dict[str, str]], metrics: Optional[pd.DataFrame] = None,
+                       signals: Optional[pd.DataFrame] = None) -> List[str]:
+    """
+    Renders sidebar controls for ordering and filtering the navigation queue
+    and returns the group keys in the selected order.
+    If error signals (see utils.error_likelihood) are given, the queue can be ordered by error likelihood.
+    """
+    st.sidebar.markdown("### 🧭 Group Queue")
+    keys = list(groups.keys())
+
+    has_metrics = metrics is not None and not metrics.empty
+    has_signals = signals is not None and not signals.empty and bool(keys)
+    if not has_metrics and not has_signals:
+        st.sidebar.caption("Image quality metrics are not available for this dataset.")
+        return keys
+
+    metric_columns = [c for c in metrics.columns if metrics[c].notna().any()] if has_metrics else []
+    frame = metrics.reindex(keys) if has_metrics else pd.DataFrame(index=keys)
+    mask = pd.Series(True, index=frame.index)
+
+    sort_by = st.sidebar.selectbox(
+        "Sort groups by:",
+        ["Dataset order"] + ([PRIORITY_ORDER] if has_signals else []) + metric_columns,
+        format_func=lambda c: c if c in ("Dataset order", PRIORITY_ORDER) else _metric_label(c),
+        key="queue_sort_by"
+    )
+
+    if sort_by == PRIORITY_ORDER:
+        ordered_keys = _priority_order(keys, signals)
+        state = st.session_state["priority_queue"]
+        st.sidebar.caption(
+            f"Unannotated groups first, most likely errors first. Weights learned from "
+            f"{state['annotated']} annotated groups: "
+            + ", ".join(f"{name.replace('_', ' ')} {weight:g}" for name, weight in state["weights"].items())
+        )
+    else:
+        ascending = st.sidebar.checkbox("Ascending", value=True, key="queue_ascending")
+
+    filter_metric = st.sidebar.selectbox(
+        "Filter by metric:",
+        ["(none)"] + metric_columns,
+        format_func=lambda c: c if c == "(none)" else _metric_label(c),
+        key="queue_filter_metric"
+    )
+    if filter_metric != "(none)":
+        values = frame[filter_metric]
+        low, high = float(values.min()), float(values.max())
+        if low < high:
+            selected_low, selected_high = st.sidebar.slider(
+                f"{_metric_label(filter_metric)} range:",
+                min_value=low,
+                max_value=high,
+                value=(low, high),
+                key=f"queue_range_{filter_metric}"
+            )
+            mask &= values.between(selected_low, selected_high)
+
+    if sort_by == PRIORITY_ORDER:
+        allowed = set(frame.index[mask])
+        ordered = [key for key in ordered_keys if key in allowed]
+    else:
+        frame = frame[mask]
+        if sort_by != "Dataset order":
+            frame = frame.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+        ordered = frame.index.tolist()
+
+    if len(ordered) < len(keys):
+        st.sidebar.caption(f"Showing {len(ordered)} of {len(keys)} groups")
+    return ordered
@@ -1,42 +1,103 @@
 import streamlit as st
-from PIL import Image
-from typing import Dict
-from utils.file_utils import load_image, parse_digits_from_file, parse_words_from_file
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional
+from utils.file_utils import load_image_with_info, parse_digits_from_file, parse_words_from_file
+from utils.image_diff import DIFF_PAIRS, compute_pair_diff
+from utils.tile_pyramid import pyramid_info, level_size, render_viewport
+from utils import perf
+import pandas as pd
 
 
-@st.cache_data
-def get_image_info(filepath: str) -> Dict:
+def show_preprocessing_diff(group_data: Dict[str, str], cache_dir: str):
     """
-    Get basic image information without loading the full image.
-    Cached for performance.
+    Shows where each preprocessed crop differs from its raw crop, with a similarity score.
+    Diffs are computed once per pair and cached on disk.
+    """
+    mode = st.radio("Diff view:", ["Heatmap", "Overlay"], horizontal=True, key="diff_view_mode")
+    cols = st.columns(len(DIFF_PAIRS))
+
+    for col, (raw_slot, processed_slot, label) in zip(cols, DIFF_PAIRS):
+        with col:
+            st.markdown(f"**{label}: raw vs processed**")
+            if raw_slot not in group_data or processed_slot not in group_data:
+                st.warning("⚠️ Pair incomplete")
+                continue
+            try:
+                with perf.timed("preprocessing_diff"):
+                    diff = compute_pair_diff(group_data[raw_slot], group_data[processed_slot], cache_dir)
+            except Exception as e:
+                st.error(f"❌ Failed to compare images: {str(e)[:50]}...")
+                continue
+
+            image_path = diff["heatmap_path"] if mode == "Heatmap" else diff["overlay_path"]
+            st.image(image_path, use_container_width=True)  # type: ignore
+
+            metric_col1, metric_col2 = st.columns(2)
+            with metric_col1:
+                st.metric("SSIM", f"{diff['ssim']:.3f}", help="1.0 means identical structure")
+            with metric_col2:
+                st.metric("Changed pixels", f"{diff['changed_fraction']:.1%}")
+
+
+# Size of the deep-zoom viewport in pixels
+ZOOM_VIEW_WIDTH = 1024
+ZOOM_VIEW_HEIGHT = 640
+
+
+def show_deep_zoom(group_key: str, image_path: str, cache_dir: str):
+    """
+    Zoom/pan viewer for the full-resolution original. Only the tiles under the viewport
+    are read; each pyramid level is built on first use and cached on disk.
     """
     try:
-        if os.path.exists(filepath):
-            # Get file size
-            file_size = os.path.getsize(filepath) / 1024  # KB
-            
-            # Get image dimensions without loading full image
-            with Image.open(filepath) as img:
-                width, height = img.size
-                format_type = img.format
-            
-            return {
-                "exists": True,
-                "size_kb": file_size,
-                "width": width,
-                "height": height,
-                "format": format_type
-            }
-        else:
-            return {"exists": False}
+        info = pyramid_info(image_path)
+    except Exception as e:
+        st.error(f"❌ Cannot read image: {str(e)[:50]}...")
+        return
+
+    levels = list(range(info["levels"] - 1, -1, -1))
+    # Start at the coarsest level that still fills the viewport width
+    fit_level = next((level for level in levels if level_size(info, level)[0] >= ZOOM_VIEW_WIDTH), 0)
+
+    zoom_col, x_col, y_col = st.columns([2, 1, 1])
+    with zoom_col:
+        level = st.select_slider(
+            "Zoom:",
+            options=levels,
+            value=fit_level,
+            format_func=lambda l: f"{100 / 2 ** l:g}%",
+            key=f"deep_zoom_level_{group_key}"
+        )
+    with x_col:
+        center_x = st.slider("Horizontal position (%)", 0, 100, 50, key=f"deep_zoom_x_{group_key}")
+    with y_col:
+        center_y = st.slider("Vertical position (%)", 0, 100, 50, key=f"deep_zoom_y_{group_key}")
+
+    try:
+        with perf.timed("deep_zoom_view"):
+            view, viewport = render_viewport(image_path, cache_dir, level, center_x / 100, center_y / 100,
+                                             ZOOM_VIEW_WIDTH, ZOOM_VIEW_HEIGHT)
     except Exception as e:
-        return {"exists": False, "error": str(e)}
+        st.error(f"❌ Failed to render tiles: {str(e)[:50]}...")
+        return
 
+    st.image(view)
+    st.caption(
+        f"🔍 {viewport['scale']:.0%} of {info['width']}×{info['height']} · "
+        f"showing x {viewport['left']}–{viewport['left'] + view.width}, "
+        f"y {viewport['top']}–{viewport['top'] + view.height} of "
+        f"{viewport['level_width']}×{viewport['level_height']} · {viewport['tiles_read']} tiles read"
+        + (" · level built" if viewport["level_built"] else "")
+    )
 
-def display_image_group(group_key: str, group_data: Dict[str, str]):
+
+def display_image_group(group_key: str, group_data: Dict[str, str], quality: Optional[Dict] = None,
+                        diff_cache_dir: Optional[str] = None, tile_cache_dir: Optional[str] = None):
     """
     Display a group of 5 related images with enhanced loading and performance optimization.
+    If quality metrics are given (see utils.image_metrics), they are shown under each measured slot.
+    If a diff cache directory is given, an optional raw-vs-preprocessed diff panel is offered.
+    If a tile cache directory is given, the original can be inspected at full resolution.
     """
     st.markdown(f"### 📦 Image Group: `{group_key}`")
     
@@ -51,56 +112,64 @@ def display_image_group(group_key: str, group_data: Dict[str, str]):
 
     # Create columns for images
     cols = st.columns(5)
-    
-    # Track loading status
-    images_loaded = 0
-    total_images = len([key for key, _, _ in image_slots if key in group_data])
-    
+    present_slots = [(i, key, label) for i, (key, label, _) in enumerate(image_slots) if key in group_data]
+    total_images = len(present_slots)
+
+    # Lay out every column first, so each image can be placed as soon as it is loaded
+    info_placeholders, image_placeholders = {}, {}
+    for i, (key, label, color) in enumerate(image_slots):
+        with cols[i]:
+            st.markdown(f"**{label}**")
+            if key in group_data:
+                info_placeholders[key] = st.empty()
+                image_placeholders[key] = st.empty()
+                image_placeholders[key].caption(f"⏳ Loading {label.lower()}...")
+                if quality and pd.notna(quality.get(f"{key}_blur")):
+                    st.caption(
+                        f"🔍 Blur {quality[f'{key}_blur']:.0f} · "
+                        f"Contrast {quality[f'{key}_contrast']:.0f} · "
+                        f"Brightness {quality[f'{key}_brightness']:.0f}"
+                    )
+            else:
+                st.warning(f"⚠️ {label} missing")
+
     if total_images > 0:
-        # Show overall loading progress for this group
         progress_container = st.container()
-        
-        # Display images with individual loading states
-        for i, (key, label, color) in enumerate(image_slots):
-            with cols[i]:
-                st.markdown(f"**{label}**")
-                
-                if key in group_data:
-                    # Get image info first (cached, fast)
-                    img_info = get_image_info(group_data[key])
-                    
-                    if img_info["exists"]:
-                        # Show image metadata
-                        if img_info.get("size_kb", 0) > 500:  # Large file warning
-                            st.caption(f"⚠️ Large file: {img_info['size_kb']:.1f} KB")
-                        else:
-                            st.caption(f"📏 {img_info.get('width', '?')}×{img_info.get('height', '?')}")
-                        
-                        # Create a placeholder for the image
-                        image_placeholder = st.empty()
-                        
-                        # Load image with caching (this is the potentially slow operation)
-                        try:
-                            with st.spinner(f"Loading {label.lower()}..."):
-                                img = load_image(group_data[key])
-                                images_loaded += 1
-                                
-                            # Display the loaded image
-                            image_placeholder.image(
-                                img, 
-                                caption=f"{label} ✅", 
-                                use_container_width=True # type: ignore
-                            )
-                            
-                        except Exception as e:
-                            image_placeholder.error(f"❌ Failed to load image: {str(e)[:50]}...")
+        images_loaded = 0
+
+        # All slots are fetched concurrently (one open per file); a cold group costs about its slowest image
+        with perf.timed("image_group_load"), ThreadPoolExecutor(max_workers=total_images) as executor:
+            futures = {executor.submit(load_image_with_info, group_data[key]): (key, label)
+                       for _, key, label in present_slots}
+            for future in as_completed(futures):
+                key, label = futures[future]
+                img, img_info = future.result()
+
+                if not img_info["exists"]:
+                    info_placeholders[key].error(f"❌ File not found")
+                    if "error" in img_info:
+                        image_placeholders[key].caption(f"Error: {img_info['error'][:30]}...")
                     else:
-                        st.error(f"❌ File not found")
-                        if "error" in img_info:
-                            st.caption(f"Error: {img_info['error'][:30]}...")
+                        image_placeholders[key].empty()
+                    continue
+
+                # Show image metadata
+                if img_info.get("size_kb", 0) > 500:  # Large file warning
+                    info_placeholders[key].caption(f"⚠️ Large file: {img_info['size_kb']:.1f} KB")
                 else:
-                    st.warning(f"⚠️ {label} missing")
-        
+                    info_placeholders[key].caption(f"📏 {img_info.get('width', '?')}×{img_info.get('height', '?')}")
+
+                if img is None:
+                    image_placeholders[key].error(f"❌ Failed to load image: {img_info.get('error', '')[:50]}...")
+                    continue
+
+                image_placeholders[key].image(
+                    img,
+                    caption=f"{label} ✅",
+                    use_container_width=True # type: ignore
+                )
+                images_loaded += 1
+
         # Update progress
         with progress_container:
             if images_loaded == total_images:
@@ -108,6 +177,12 @@ def display_image_group(group_key: str, group_data: Dict[str, str]):
             elif images_loaded > 0:
                 st.info(f"🔄 Loaded {images_loaded}/{total_images} images...")
 
+    if diff_cache_dir and st.toggle("🔬 Show raw vs preprocessed difference", key="show_diff_panel"):
+        show_preprocessing_diff(group_data, diff_cache_dir)
+
+    if tile_cache_dir and "images" in group_data and st.toggle("🔍 Deep zoom into the original scan", key="show_deep_zoom"):
+        show_deep_zoom(group_key, group_data["images"], tile_cache_dir)
+
     # === TEXT DATA SECTION ===
     st.markdown("---")
     
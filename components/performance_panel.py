@@ -0,0 +1,73 @@
+import os
+import streamlit as st
+import pandas as pd
+from utils import perf
+
+# Where metric dumps are written
+PERF_DUMP_DIR = os.environ.get("POSTAL_PERF_DIR", "perf_dumps")
+
+
+def performance_panel_enabled() -> bool:
+    """
+    The panel is hidden unless the app is opened with ?perf=1 or POSTAL_PERF_PANEL=1 is set.
+    """
+    return st.query_params.get("perf") == "1" or os.environ.get("POSTAL_PERF_PANEL") == "1"
+
+
+def show_performance_panel():
+    """
+    Sidebar panel with per-stage latency percentiles and cache hit rates for this server.
+    """
+    if not performance_panel_enabled():
+        return
+
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        summary = perf.snapshot()
+        if not summary:
+            st.caption("No stages recorded yet.")
+            return
+
+        table = pd.DataFrame([
+            {
+                "stage": name,
+                "count": stats["count"],
+                "p50 ms": stats["p50_s"] * 1000,
+                "p95 ms": stats["p95_s"] * 1000,
+                "p99 ms": stats["p99_s"] * 1000,
+                "max ms": stats["max_s"] * 1000,
+                "hit rate": stats["cache_hit_rate"],
+                "misses": stats["cache_misses"],
+            }
+            for name, stats in summary.items()
+        ]).sort_values("p95 ms", ascending=False)
+
+        st.dataframe(
+            table,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "p50 ms": st.column_config.NumberColumn(format="%.1f"),
+                "p95 ms": st.column_config.NumberColumn(format="%.1f"),
+                "p99 ms": st.column_config.NumberColumn(format="%.1f"),
+                "max ms": st.column_config.NumberColumn(format="%.1f"),
+                "hit rate": st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f"),
+            }
+        )
+        st.caption(f"Percentiles over the last {perf.WINDOW_SIZE} samples per stage, all sessions.")
+
+        dump_col, reset_col = st.columns(2)
+        with dump_col:
+            if st.button("💾 Dump", help=f"Write JSON and Prometheus text to {PERF_DUMP_DIR}/"):
+                json_path, prom_path = perf.dump(PERF_DUMP_DIR)
+                st.success(f"Wrote {json_path} and {prom_path}")
+        with reset_col:
+            if st.button("🧹 Reset"):
+                perf.reset()
+                st.rerun()
+
+        st.download_button(
+            label="📥 Prometheus text",
+            data=perf.to_prometheus(summary).encode("utf-8"),
+            file_name="postal_perf.prom",
+            mime="text/plain"
+        )
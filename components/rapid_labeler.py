@@ -0,0 +1,197 @@
+import functools
+import streamlit as st
+from typing import List, Optional
+from components.group_classifier import ERROR_CATEGORIES
+from components.word_digit_labeler import drop_stale_widget_state
+from utils.bulk_labeling import apply_label_updates, as_label_list
+from utils.label_store import DigitLabels, CORRECT, INCORRECT, NOT_SET
+from utils import perf, telemetry
+
+# Hotkeys: one home-row key per error category, the number row for digit positions 1..10
+CATEGORY_KEYS = "asdfghjkl"[:len(ERROR_CATEGORIES)]
+POSITION_KEYS = "1234567890"
+
+HOTKEY_HELP = (
+    f"**{' '.join(CATEGORY_KEYS.upper())}** toggle error categories · "
+    "**1–0** cycle digit position ✅ → ❌ → ❓ · **C** then a digit: correct value of the last ❌ · "
+    "**Enter** save and next · **Esc** undo changes to this group"
+)
+
+_CSS = """
+.rapid { font-family: var(--st-font); display: flex; flex-direction: column; gap: 0.5rem; }
+.rapid .row { display: flex; flex-wrap: wrap; gap: 0.35rem; }
+.rapid .chip { border: 1px solid var(--st-border-color); border-radius: 0.5rem; padding: 0.25rem 0.6rem; }
+.rapid .chip kbd { font-weight: bold; margin-right: 0.3rem; opacity: 0.7; }
+.rapid .chip.on { background: var(--st-primary-color); color: white; }
+.rapid .chip.wrong { background: #e5533d; color: white; }
+.rapid .chip.unknown { background: #f0b429; }
+.rapid .hint { opacity: 0.7; font-size: 0.85rem; }
+"""
+
+_HTML = """<div class="rapid"><div class="row categories"></div><div class="row digits"></div><div class="hint"></div></div>"""
+
+# All edits stay in the browser; Enter sends the whole group in one trigger (one server round trip)
+_JS = """
+export default function(component) {
+    const { data, setTriggerValue, parentElement } = component;
+    const root = parentElement.querySelector(".rapid");
+    let state;
+
+    function reset() {
+        state = {
+            categories: new Set(data.selected),
+            status: [...data.status],
+            corrected: [...data.corrected],
+            active: null,
+            correcting: false,
+        };
+    }
+
+    function chip(key, text, cls) {
+        const el = document.createElement("span");
+        el.className = "chip " + cls;
+        const kbd = document.createElement("kbd");
+        kbd.textContent = key.toUpperCase();
+        el.append(kbd, text);
+        return el;
+    }
+
+    function render() {
+        const categories = root.querySelector(".categories");
+        categories.replaceChildren(...data.categories.map((name, i) =>
+            chip(data.category_keys[i], name, state.categories.has(name) ? "on" : "")));
+        const digits = root.querySelector(".digits");
+        digits.replaceChildren(...data.digits.map((digit, i) => {
+            const status = state.status[i];
+            const text = status === 1 && state.corrected[i] !== null ? digit + " → " + state.corrected[i] : String(digit);
+            return chip(data.position_keys[i] || " ", text, ["", "wrong", "unknown"][status]);
+        }));
+        root.querySelector(".hint").textContent = state.correcting
+            ? "Type the correct value for position " + (state.active + 1) + "…"
+            : "Enter: save and go to the next group";
+    }
+
+    function onKey(event) {
+        const target = event.target;
+        if (event.ctrlKey || event.metaKey || event.altKey) return;
+        if (target && (target.tagName === "INPUT" || target.tagName === "TEXTAREA" || target.isContentEditable)) return;
+
+        const key = event.key.toLowerCase();
+        const position = data.position_keys.indexOf(key);
+        if (state.correcting && /^[0-9]$/.test(key)) {
+            state.corrected[state.active] = Number(key);
+            state.correcting = false;
+        } else if (key.length === 1 && data.category_keys.includes(key)) {
+            const name = data.categories[data.category_keys.indexOf(key)];
+            state.categories.has(name) ? state.categories.delete(name) : state.categories.add(name);
+        } else if (position >= 0 && position < data.digits.length) {
+            state.status[position] = (state.status[position] + 1) % 3;
+            state.active = position;
+        } else if (key === "c" && state.active !== null && state.status[state.active] === 1) {
+            state.correcting = true;
+        } else if (key === "enter") {
+            setTriggerValue("commit", {
+                group_key: data.group_key,
+                categories: data.categories.filter((name) => state.categories.has(name)),
+                status: state.status,
+                corrected: state.corrected,
+            });
+        } else if (key === "escape") {
+            reset();
+        } else {
+            return;
+        }
+        event.preventDefault();
+        render();
+    }
+
+    reset();
+    render();
+    document.addEventListener("keydown", onKey);
+    return () => document.removeEventListener("keydown", onKey);
+}
+"""
+
+RAPID_LABELER_PREFIX = "rapid_labeler_"
+
+_rapid_keys = st.components.v2.component("rapid_labeling_keys", html=_HTML, css=_CSS, js=_JS)
+
+
+def _stored_digit_state(group_key: str, n_digits: int):
+    """
+    Status code and corrected value (None if unset) per position from the stored digit labels.
+    """
+    stored = st.session_state.get("digit_labels", {}).get(group_key)
+    status, corrected = [CORRECT] * n_digits, [None] * n_digits
+    if stored is not None:
+        for i in range(min(n_digits, len(stored))):
+            if stored.status[i] != NOT_SET:
+                status[i] = int(stored.status[i])
+            if stored.corrected[i] != NOT_SET:
+                corrected[i] = int(stored.corrected[i])
+    return status, corrected
+
+
+def _commit_rapid_labels(component_key: str, group_key: str, digits: List[int],
+                         words: List[str], n_groups: int):
+    """
+    Callback of the commit hotkey: stores the group's labels as one undoable
+    transaction and advances the queue before the script reruns.
+    """
+    payload = st.session_state[component_key].get("commit")
+    if not payload or payload.get("group_key") != group_key:
+        return
+
+    with perf.timed("submit.rapid_labels"):
+        n_keyed = min(len(digits), len(POSITION_KEYS))
+        status = list(payload["status"][:n_keyed])
+        corrected = [value if code == INCORRECT else None for code, value in zip(status, payload["corrected"])]
+        # Positions without a hotkey keep their stored labels (unlabeled if there are none)
+        stored = st.session_state.get("digit_labels", {}).get(group_key)
+        for i in range(n_keyed, len(digits)):
+            labeled = stored is not None and i < len(stored)
+            status.append(int(stored.status[i]) if labeled else NOT_SET)
+            corrected.append(int(stored.corrected[i]) if labeled and stored.corrected[i] != NOT_SET else None)
+        digit_labels = DigitLabels(status, digits, corrected)
+
+        updates = {"group_labels": {group_key: list(payload["categories"])},
+                   "digit_labels": {group_key: digit_labels}}
+        # Accepting a group marks its words correct unless they were already reviewed
+        if words and group_key not in st.session_state.get("word_labels", {}):
+            updates["word_labels"] = {group_key: {word: True for word in words}}
+        apply_label_updates(updates, f"Rapid label {group_key}")
+        telemetry.log_event("submit", group_key, form="rapid")
+
+    st.session_state.current_group_index = min(st.session_state.current_group_index + 1, n_groups - 1)
+
+
+def show_rapid_labeler(group_key: str, digits: Optional[List[int]], words: Optional[List[str]], n_groups: int):
+    """
+    Keyboard-driven labeling of the current group: categories and digit statuses are
+    toggled in the browser and saved together with Enter, which also moves to the next group.
+    """
+    st.markdown("### ⚡ Rapid Labeling")
+    st.caption(HOTKEY_HELP)
+
+    digits = digits or []
+    if len(digits) > len(POSITION_KEYS):
+        st.caption(f"Positions after {len(POSITION_KEYS)} have no hotkey: label them in the digit table; "
+                   "saving here keeps their current labels.")
+    status, corrected = _stored_digit_state(group_key, len(digits))
+    component_key = f"{RAPID_LABELER_PREFIX}{group_key}"
+    drop_stale_widget_state(RAPID_LABELER_PREFIX, component_key)
+    _rapid_keys(
+        key=component_key,
+        data={
+            "group_key": group_key,
+            "categories": ERROR_CATEGORIES,
+            "category_keys": CATEGORY_KEYS,
+            "position_keys": POSITION_KEYS,
+            "selected": as_label_list(st.session_state.get("group_labels", {}).get(group_key, [])),
+            "digits": digits,
+            "status": status,
+            "corrected": corrected,
+        },
+        on_commit_change=functools.partial(_commit_rapid_labels, component_key, group_key,
+                                           digits, words or [], n_groups),
+    )
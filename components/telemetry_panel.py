@@ -0,0 +1,77 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from typing import Dict, Optional
+from utils import perf, telemetry
+
+
+@perf.cached("telemetry_summary", ttl=60, show_spinner=False)
+def _telemetry_summary(directory: str, days: Optional[int]) -> Dict[str, pd.DataFrame]:
+    """
+    Summary of the event log, refreshed at most once a minute.
+    """
+    return telemetry.summarize_events(telemetry.load_events(directory, days))
+
+
+def show_telemetry_dashboard():
+    """
+    Annotation throughput from the telemetry log of all sessions on this server:
+    groups per hour, time to first image, and wait vs think time per annotator.
+    """
+    with st.expander("⏱️ Annotation Throughput", expanded=False):
+        if not telemetry.TELEMETRY_ENABLED:
+            st.info("Telemetry is turned off (POSTAL_TELEMETRY=0).")
+            return
+
+        period = st.radio("Period:", ["Today", "Last 7 days", "All"], horizontal=True, key="telemetry_period")
+        days = {"Today": 1, "Last 7 days": 7, "All": None}[period]
+        summary = _telemetry_summary(telemetry.TELEMETRY_DIR, days)
+        annotators, visits = summary["annotators"], summary["visits"]
+        if annotators.empty:
+            st.info("No annotation activity logged yet.")
+            return
+
+        total_wait, total_think = visits["wait_s"].sum(), visits["think_s"].sum()
+        active_hours = annotators["active_hours"].sum()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Annotators", len(annotators))
+        with col2:
+            st.metric("Groups per hour",
+                      f"{annotators['groups_labeled'].sum() / active_hours:.1f}" if active_hours > 0 else "–")
+        with col3:
+            st.metric("Median time to first image", f"{visits['time_to_image_s'].median():.2f} s"
+                      if visits["time_to_image_s"].notna().any() else "–")
+        with col4:
+            st.metric("Time spent waiting",
+                      f"{total_wait / (total_wait + total_think):.1%}" if total_wait + total_think > 0 else "–")
+
+        st.dataframe(
+            annotators.rename(columns=lambda c: c.replace("_", " ")),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "active hours": st.column_config.NumberColumn(format="%.2f"),
+                "groups per hour": st.column_config.NumberColumn(format="%.1f"),
+                "median time on group s": st.column_config.NumberColumn(format="%.1f"),
+                "median time to image s": st.column_config.NumberColumn(format="%.2f"),
+                "wait s": st.column_config.NumberColumn(format="%.0f"),
+                "think s": st.column_config.NumberColumn(format="%.0f"),
+                "wait share": st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f"),
+            }
+        )
+
+        chart_col1, chart_col2 = st.columns(2)
+        with chart_col1:
+            split = annotators.melt(id_vars="annotator", value_vars=["wait_s", "think_s"],
+                                    var_name="time", value_name="seconds")
+            split["time"] = split["time"].map({"wait_s": "Waiting for the app", "think_s": "Thinking"})
+            fig = px.bar(split, x="annotator", y="seconds", color="time", title="Wait vs Think Time")
+            st.plotly_chart(fig, use_container_width=True)
+        with chart_col2:
+            fig = px.histogram(visits.dropna(subset=["time_to_image_s"]), x="time_to_image_s", nbins=30,
+                               title="Time to First Image (s)")
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.caption(f"Gaps over {telemetry.IDLE_GAP_SECONDS // 60} minutes count as breaks. Wait time is "
+                   "server time per interaction; browser rendering is not included.")
@@ -0,0 +1,94 @@
+import os
+import time
+import streamlit as st
+from typing import Dict, List
+from utils.training_export import (
+    EXPORT_FORMATS, DEFAULT_SAMPLES_PER_SHARD, DEFAULT_MAX_SHARD_MB, export_training_bundle
+)
+
+# Bundles are written on the server, one folder per export
+EXPORT_DIR = os.environ.get("POSTAL_EXPORT_DIR", "exports")
+
+# Bundles up to this size can also be prepared as browser downloads
+MAX_DOWNLOAD_MB = 200
+
+EXPORT_MIME_TYPES = {".tar": "application/x-tar", ".zip": "application/zip", ".jsonl": "application/jsonl"}
+
+
+def show_training_export(groups: Dict[str, Dict[str, str]], group_keys: List[str]):
+    """
+    Builds a training bundle (crops + JSON records) from the current annotations.
+    """
+    with st.expander("🎁 Training Dataset Bundle"):
+        st.caption("Crops of every sample with its OCR predictions, digit corrections, "
+                   "word labels, missed words and group labels.")
+
+        with st.form("training_export_form"):
+            format_col, shard_col, size_col = st.columns(3)
+            with format_col:
+                export_format = st.radio(
+                    "Format:",
+                    EXPORT_FORMATS,
+                    format_func=lambda f: "WebDataset tar shards" if f == "tar" else "ZIP",
+                    horizontal=True
+                )
+            with shard_col:
+                samples_per_shard = st.number_input("Samples per shard:", min_value=1,
+                                                    value=DEFAULT_SAMPLES_PER_SHARD, step=100)
+            with size_col:
+                max_shard_mb = st.number_input("Max shard size (MB):", min_value=1,
+                                               value=DEFAULT_MAX_SHARD_MB, step=128)
+            scope = st.radio("Groups:", ["Annotated groups", "All groups in the queue"], horizontal=True)
+            submitted = st.form_submit_button("📦 Build bundle", type="primary")
+
+        if submitted:
+            stores = {
+                name: dict(st.session_state.get(name, {}))
+                for name in ["group_labels", "digit_labels", "word_labels", "missed_words"]
+            }
+            if scope == "Annotated groups":
+                annotated = set().union(*(store.keys() for store in stores.values()))
+                keys = [key for key in group_keys if key in annotated]
+            else:
+                keys = list(group_keys)
+
+            if not keys:
+                st.warning("⚠️ No groups to export.")
+                return
+
+            output_dir = os.path.join(EXPORT_DIR, f"bundle_{time.strftime('%Y%m%d_%H%M%S')}")
+            progress_bar = st.progress(0)
+
+            def show_progress(done: int, total: int):
+                if done % 50 == 0 or done == total:
+                    progress_bar.progress(done / total)
+
+            summary = export_training_bundle(
+                groups, keys, **stores,
+                output_dir=output_dir,
+                export_format=export_format,
+                samples_per_shard=int(samples_per_shard),
+                max_shard_mb=float(max_shard_mb),
+                on_progress=show_progress
+            )
+            progress_bar.empty()
+            st.session_state["training_export_summary"] = summary
+
+        summary = st.session_state.get("training_export_summary")
+        if summary:
+            st.success(f"✅ Wrote {summary['samples']} samples in {len(summary['shards'])} shard(s), "
+                       f"{summary['total_mb']:.1f} MB, to `{os.path.dirname(summary['shards'][0])}`")
+            if summary["total_mb"] > MAX_DOWNLOAD_MB:
+                st.caption("Bundle is too large for a browser download; copy it from the server folder.")
+            elif st.button("📥 Prepare download", key="prepare_training_download"):
+                # Shards are only read into the page on request, not on every rerun
+                for path in [p for p in summary["shards"] + summary.get("manifests", []) if os.path.exists(p)]:
+                    with open(path, "rb") as f:
+                        st.download_button(
+                            label=f"📥 {os.path.basename(path)}",
+                            data=f,
+                            file_name=os.path.basename(path),
+                            mime=EXPORT_MIME_TYPES[os.path.splitext(path)[1]],
+                            key=f"download_{path}",
+                            on_click="ignore"
+                        )
@@ -0,0 +1,47 @@
+import streamlit as st
+import pandas as pd
+from utils.validation import ISSUE_TYPES
+
+
+def show_validation_report(report: pd.DataFrame):
+    """
+    Displays the ingest validation report with filters by issue type and group key.
+    """
+    title = "🩺 Dataset Validation Report"
+    if report.empty:
+        with st.expander(f"{title} — no issues found", expanded=False):
+            st.success("✅ All groups are complete and all files could be read.")
+        return
+
+    with st.expander(f"{title} — {len(report)} issues", expanded=False):
+        counts = report["issue"].value_counts()
+
+        cols = st.columns(4)
+        for i, (issue, count) in enumerate(counts.items()):
+            with cols[i % 4]:
+                st.metric(issue.replace("_", " ").title(), int(count), help=ISSUE_TYPES.get(issue))
+
+        filter_col1, filter_col2 = st.columns([2, 1])
+        with filter_col1:
+            selected_issues = st.multiselect(
+                "Issue types:",
+                options=list(counts.index),
+                default=list(counts.index),
+                key="validation_issue_filter"
+            )
+        with filter_col2:
+            key_filter = st.text_input("Group key contains:", key="validation_key_filter")
+
+        filtered = report[report["issue"].isin(selected_issues)]
+        if key_filter:
+            filtered = filtered[filtered["group_key"].str.contains(key_filter, regex=False)]
+
+        st.caption(f"Showing {len(filtered)} of {len(report)} issues")
+        st.dataframe(filtered, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            label="📥 Download Report",
+            data=filtered.to_csv(index=False).encode("utf-8"),
+            file_name="validation_report.csv",
+            mime="text/csv"
+        )
@@ -0,0 +1,121 @@
+import streamlit as st
+import pandas as pd
+from typing import Dict, List, Optional
+from utils.dataset_registry import RegisteredDataset, open_dataset
+from utils.version_compare import compare_ocr_outputs, stale_label_updates
+from utils.bulk_labeling import apply_label_updates
+from utils import perf
+
+NO_BASELINE = "(none)"
+
+
+@perf.cached("version_compare", max_entries=4, show_spinner=False)
+def _compare(baseline_name: str, baseline_revision: int, candidate_name: str, candidate_revision: int,
+             _baseline_ocr: pd.DataFrame, _candidate_ocr: pd.DataFrame) -> pd.DataFrame:
+    """
+    Comparison of two registered datasets, cached on their names and revisions.
+    """
+    return compare_ocr_outputs(_baseline_ocr, _candidate_ocr)
+
+
+def select_baseline(dataset_name: str, registered_datasets: List[Dict]) -> Optional[Dict]:
+    """
+    Lets the annotator pick an earlier OCR version of the selected dataset to compare against.
+    Returns the baseline's registry metadata, or None when not comparing.
+    """
+    candidates = [m for m in registered_datasets if m["name"] != dataset_name]
+    if not candidates:
+        return None
+    names = [m["name"] for m in candidates]
+    baseline_name = st.selectbox(
+        "Compare with baseline:",
+        [NO_BASELINE] + names,
+        key="baseline_dataset",
+        help="Another ingest of the same images with an earlier OCR model version. "
+             "Only groups whose digits or words differ are queued; labels of unchanged groups carry over."
+    )
+    return None if baseline_name == NO_BASELINE else candidates[names.index(baseline_name)]
+
+
+def compare_with_baseline(baseline_metadata: Dict, dataset: RegisteredDataset) -> pd.DataFrame:
+    """
+    Compares the dataset's OCR output with the baseline's. Labels of changed outputs may have
+    been made on either version, so they are only cleared (as one undoable operation) when
+    the annotator asks for it. Returns the comparison (see utils.version_compare.compare_ocr_outputs).
+    """
+    baseline = open_dataset(baseline_metadata["name"], baseline_metadata["revision"])
+    pair = (baseline.name, baseline_metadata["revision"], dataset.name, dataset.metadata.get("revision"))
+    comparison = _compare(*pair, baseline.ocr, dataset.ocr)
+
+    stores = {name: st.session_state.get(name, {})
+              for name in ["group_labels", "digit_labels", "word_labels", "missed_words"]}
+    stale = stale_label_updates(comparison, stores)
+    n_stale = sum(len(updates) for updates in stale.values())
+    if n_stale:
+        st.warning(f"⚠️ {n_stale} labels belong to groups whose OCR output changed since **{baseline.name}**. "
+                   "Clear them if they were made against the baseline; keep them if they were made on this version.")
+        if st.button(f"🧹 Clear {n_stale} stale labels", key="clear_stale_labels"):
+            cleared = apply_label_updates(stale, f"Clear labels of outputs changed since {baseline.name}")
+            st.toast(f"🔁 Cleared {cleared} labels of changed outputs; labels of unchanged groups carried over")
+            st.rerun()
+
+    n_shared = len(comparison)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Shared groups", n_shared)
+    with col2:
+        st.metric("Changed groups", int(comparison["changed"].sum()))
+    with col3:
+        st.metric("Digits changed", int(comparison["digits_changed"].sum()))
+    with col4:
+        st.metric("Words changed", int(comparison["words_changed"].sum()))
+    if n_shared < len(dataset.groups):
+        st.caption(f"{len(dataset.groups) - n_shared} groups of **{dataset.name}** are not in "
+                   f"**{baseline.name}** and are treated as changed.")
+    return comparison
+
+
+def filter_changed_groups(group_keys: List[str], comparison: pd.DataFrame) -> List[str]:
+    """
+    Sidebar toggle restricting the queue to groups whose output differs from the baseline
+    (groups missing from the baseline count as changed).
+    """
+    changed_only = st.sidebar.toggle("🔁 Only changed groups", value=True, key="compare_changed_only")
+    if not changed_only:
+        return group_keys
+    unchanged = set(comparison.index[~comparison["changed"].to_numpy()])
+    return [key for key in group_keys if key not in unchanged]
+
+
+def _format_output(values, separator: str) -> str:
+    if values is None:
+        return "*(no file)*"
+    return separator.join(str(v) for v in values) or "*(empty)*"
+
+
+def show_version_diff(comparison: pd.DataFrame, group_key: str):
+    """
+    Baseline and candidate OCR output of the current group, side by side.
+    """
+    if group_key not in comparison.index:
+        st.info("🆕 This group is not in the baseline dataset.")
+        return
+    row = comparison.loc[group_key]
+    if not row["changed"]:
+        st.caption("🔁 OCR output unchanged from the baseline.")
+        return
+
+    st.markdown("#### 🔁 Changed Since Baseline")
+    baseline_col, candidate_col = st.columns(2)
+    with baseline_col:
+        st.markdown("**Baseline**")
+        st.markdown(f"Digits: {_format_output(row['baseline_digits'], '')}" if row["digits_changed"]
+                    else "Digits: unchanged")
+        st.markdown(f"Words: {_format_output(row['baseline_words'], ' · ')}" if row["words_changed"]
+                    else "Words: unchanged")
+    with candidate_col:
+        st.markdown("**New version**")
+        st.markdown(f"Digits: {_format_output(row['candidate_digits'], '')}" if row["digits_changed"]
+                    else "Digits: unchanged")
+        st.markdown(f"Words: {_format_output(row['candidate_words'], ' · ')}" if row["words_changed"]
+                    else "Words: unchanged")
@@ -3,12 +3,21 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.export_utils import generate_annotation_csv
+from utils.label_store import incorrect_digit_pairs
+from utils.bulk_labeling import annotation_revision
+from utils.word_alignment import align_word_errors
+from utils import perf
+from utils.analytics import (
+    count_group_labels, count_digit_labels, word_label_columns, summarize_word_labels,
+    count_missed_words_per_group
+)
 from collections import Counter
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import numpy as np
 import os
+from typing import Optional
 
 def find_persian_font():
     """
@@ -46,22 +55,11 @@ def find_persian_font():
     # Fallback to None (system default)
     return None
 
-def extract_confusion_matrix_data():
+def extract_confusion_matrix_data() -> np.ndarray:
     """
-    Extract predicted vs actual digit pairs for confusion matrix.
+    Extract predicted vs actual digit pairs for confusion matrix, as an (n, 2) array.
     """
-    digit_labels = dict(st.session_state.get("digit_labels", {}))
-    predicted_actual_pairs = []
-    
-    for group_key, positions in digit_labels.items():
-        for pos, data in positions.items():
-            if isinstance(data, dict) and data.get("label") == "False":
-                predicted = data.get("predicted")
-                actual = data.get("correct_value")
-                if predicted is not None and actual is not None:
-                    predicted_actual_pairs.append((predicted, actual))
-    
-    return predicted_actual_pairs
+    return incorrect_digit_pairs(dict(st.session_state.get("digit_labels", {})))
 
 def create_confusion_matrix():
     """
@@ -69,37 +67,121 @@ def create_confusion_matrix():
     """
     pairs = extract_confusion_matrix_data()
     
-    if not pairs:
+    if not len(pairs):
         return None
     
-    # Create 10x10 matrix (digits 0-9)
+    # Create 10x10 matrix (digits 0-9): rows are actual, columns predicted
     confusion_matrix = np.zeros((10, 10), dtype=int)
-    
-    for predicted, actual in pairs:
-        confusion_matrix[actual][predicted] += 1
+    np.add.at(confusion_matrix, (pairs[:, 1], pairs[:, 0]), 1)
     
     return confusion_matrix
 
-def show_visualization_dashboard():
+@perf.cached("word_alignment", max_entries=8, show_spinner=False)
+def _align_word_errors(revision: str, _word_labels: dict, _missed_words: dict):
+    """
+    align_word_errors cached by annotation revision (the label stores themselves are not hashed).
+    """
+    return align_word_errors(_word_labels, _missed_words)
+
+
+def show_word_error_alignment():
+    """
+    Near misses between incorrect words and missed words, and the Persian character confusions behind them.
+    """
+    word_labels = dict(st.session_state.get("word_labels", {}))
+    missed_words = dict(st.session_state.get("missed_words", {}))
+    result = _align_word_errors(annotation_revision(), word_labels, missed_words)
+    pairs, confusions = result["pairs"], result["confusions"]
+
+    n_incorrect = sum(not correct for labels in word_labels.values() for correct in labels.values())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Incorrect Words", n_incorrect)
+    with col2:
+        st.metric("Near Misses Found", len(pairs))
+    with col3:
+        st.metric("Mean Edit Distance", f"{pairs['distance'].mean():.2f}" if len(pairs) else "–")
+
+    if pairs.empty:
+        st.info("No incorrect word is close to a missed word of its group yet. Mark incorrect words and add the missed (correct) words to see the alignment.")
+        return
+
+    top = confusions.head(20).assign(edit=lambda d: d["predicted"] + " → " + d["actual"])
+    fig = px.bar(top, x="edit", y="count", title="Most Frequent Character Errors (predicted → actual)")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("#### Aligned Words")
+    st.dataframe(
+        pairs.sort_values(["distance", "group_key"]).rename(columns={
+            "group_key": "Group", "predicted": "Predicted", "actual": "Missed (actual)",
+            "distance": "Edit distance", "normalized_distance": "Normalized"
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+def show_quality_correlation(df: pd.DataFrame, metrics: pd.DataFrame):
+    """
+    Correlates precomputed image quality metrics with the group labels.
+    """
+    metric_cols = [c for c in metrics.columns if metrics[c].notna().any()]
+    joined = df[["group_key", "group_label"]].join(metrics[metric_cols], on="group_key", how="inner")
+    label_flags = joined["group_label"].fillna("").str.get_dummies(sep="; ")
+
+    if joined.empty or label_flags.empty:
+        st.info("Label some groups to see how image quality relates to error categories.")
+        return
+
+    # Pearson correlation between each metric and each 0/1 label indicator
+    combined = pd.concat([joined[metric_cols], label_flags], axis=1)
+    correlation = combined.corr().loc[metric_cols, label_flags.columns]
+
+    fig = go.Figure(data=go.Heatmap(
+        z=correlation.values,
+        x=list(correlation.columns),
+        y=[c.replace("_", " ") for c in correlation.index],
+        colorscale='RdBu',
+        zmid=0,
+        text=correlation.round(2).values,
+        texttemplate="%{text}",
+        textfont={"size": 10}
+    ))
+    fig.update_layout(title="Correlation: Image Metrics vs Group Labels", height=450)
+    st.plotly_chart(fig, use_container_width=True)
+
+    box_col1, box_col2 = st.columns(2)
+    with box_col1:
+        metric = st.selectbox("Metric:", metric_cols, key="quality_box_metric")
+    with box_col2:
+        label = st.selectbox("Label:", list(label_flags.columns), key="quality_box_label")
+
+    box_df = pd.DataFrame({
+        metric: joined[metric],
+        "has_label": label_flags[label].map({1: label, 0: f"Not '{label}'"})
+    })
+    fig = px.box(box_df, x="has_label", y=metric, points="all",
+                 title=f"{metric.replace('_', ' ')} by '{label}'")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def show_visualization_dashboard(metrics: Optional[pd.DataFrame] = None):
     st.header("📊 Visualization Dashboard")
 
-    df = generate_annotation_csv()
+    with perf.timed("dashboard.annotation_table"):
+        df = generate_annotation_csv()
     if df.empty:
         st.warning("No annotations found. Please label some groups first.")
         return
 
     # Pie Chart: Group Label Distribution
-    with st.expander("📌 Error Category Distribution (Group Labels)", expanded=True):
+    with st.expander("📌 Error Category Distribution (Group Labels)", expanded=True), perf.timed("dashboard.group_labels"):
         # Handle multiple labels per group (semicolon-separated)
-        all_labels = []
-        for group_label in df["group_label"]:
-            if group_label and group_label.strip():
-                # Split by semicolon for multiple labels
-                labels = [label.strip() for label in group_label.split(";") if label.strip()]
-                all_labels.extend(labels)
+        label_counts = count_group_labels(df)
         
-        if all_labels:
-            label_counts = pd.Series(all_labels).value_counts().reset_index()
+        if not label_counts.empty:
+            total_labels = int(label_counts.sum())
+            label_counts = label_counts.reset_index()
             label_counts.columns = ["group_label", "count"]
             
             fig = px.pie(label_counts, names="group_label", values="count",
@@ -109,7 +191,6 @@ def show_visualization_dashboard():
             # Show summary statistics
             total_groups = len(df)
             labeled_groups = len(df[df["group_label"].str.len() > 0])
-            total_labels = len(all_labels)
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -123,17 +204,15 @@ def show_visualization_dashboard():
             st.info("No group labels found. Please label some groups first.")
 
     # Digit Analysis Section - Two Columns
-    with st.expander("🔢 Digit Analysis", expanded=True):
+    with st.expander("🔢 Digit Analysis", expanded=True), perf.timed("dashboard.digit_analysis"):
         digit_col1, digit_col2 = st.columns(2)
         
         with digit_col1:
             st.markdown("#### Digit Label Accuracy")
-            digit_cols = [col for col in df.columns if col.startswith("digit_") and not col.endswith(("_predicted", "_correct"))]
-            digit_labels = df[digit_cols].values.flatten()
-            counts = Counter([str(v) for v in digit_labels if v in ["True", "False", "Unknown"]])
+            counts = count_digit_labels(df)
             
-            if counts:
-                pie_df = pd.DataFrame({"label": list(counts.keys()), "count": list(counts.values())})
+            if not counts.empty:
+                pie_df = pd.DataFrame({"label": counts.index, "count": counts.values})
                 fig = px.pie(pie_df, names="label", values="count", title="Digit Prediction Accuracy")
                 st.plotly_chart(fig, use_container_width=True)
             else:
@@ -173,12 +252,9 @@ def show_visualization_dashboard():
                 st.info("No incorrect digits with corrections found yet. Mark some digits as incorrect and provide correct values to see the confusion matrix.")
 
     # Bar Chart: Word Label Accuracy
-    with st.expander("📝 Word Prediction Accuracy", expanded=True):
-        word_cols = [col for col in df.columns if col.startswith("word_")]
-        if word_cols:
-            word_data = df[word_cols].melt(var_name="word", value_name="label")
-            word_data["word"] = word_data["word"].str.replace("word_", "", regex=False)
-            word_summary = word_data.groupby(["word", "label"]).size().reset_index(name="count")
+    with st.expander("📝 Word Prediction Accuracy", expanded=True), perf.timed("dashboard.word_accuracy"):
+        if word_label_columns(df):
+            word_summary = summarize_word_labels(df)
 
             fig = px.bar(word_summary, x="word", y="count", color="label",
                          title="Word Label Breakdown",
@@ -187,16 +263,20 @@ def show_visualization_dashboard():
         else:
             st.info("No word labels found.")
 
+    # Edit-distance alignment of incorrect and missed words
+    with st.expander("🔤 Word Error Alignment", expanded=False), perf.timed("dashboard.word_alignment"):
+        show_word_error_alignment()
+
     # Histogram: Missed Word Count per Group
-    with st.expander("❌ Missed Word Count per Group", expanded=False):
-        df["missed_word_count"] = df["missed_words"].fillna("").apply(lambda x: len(x.split(",")) if x else 0)
+    with st.expander("❌ Missed Word Count per Group", expanded=False), perf.timed("dashboard.missed_word_count"):
+        df["missed_word_count"] = count_missed_words_per_group(df)
         fig = px.histogram(df, x="missed_word_count",
                            nbins=10,
                            title="Distribution of Missed Words per Group")
         st.plotly_chart(fig, use_container_width=True)
 
     # Persian-Compatible Word Cloud
-    with st.expander("🌥️ Missed Word Cloud (Persian Compatible)", expanded=False):
+    with st.expander("🌥️ Missed Word Cloud (Persian Compatible)", expanded=False), perf.timed("dashboard.missed_word_cloud"):
         try:
             # Get all missed words and filter out empty ones
             missed_words_series = df["missed_words"].dropna()
@@ -263,4 +343,9 @@ def show_visualization_dashboard():
                     st.dataframe(freq_df, use_container_width=True)
                     
             except Exception:
-                st.error("Unable to display word data.")
\ No newline at end of file
+                st.error("Unable to display word data.")
+
+    # Image quality metrics vs labels
+    if metrics is not None and not metrics.empty:
+        with st.expander("📐 Image Quality vs Labels", expanded=False), perf.timed("dashboard.quality_correlation"):
+            show_quality_correlation(df, metrics)
@@ -1,10 +1,30 @@
 import streamlit as st
+import pandas as pd
 from utils.file_utils import parse_digits_from_file, parse_words_from_file
+from utils.bulk_labeling import bump_annotation_revision
+from utils.label_store import DigitLabels, CORRECT, INCORRECT, NOT_SET
+from utils import perf, telemetry
+
+
+# Status names shown in the digit table; the index is the stored status code
+DIGIT_STATUS_OPTIONS = ["Correct", "Incorrect", "Unknown"]
+
+DIGIT_EDITOR_PREFIX = "digit_editor_"
+
+
+def drop_stale_widget_state(prefix: str, current_key: str):
+    """
+    Removes the widget state other groups left behind under a per-group key prefix,
+    so session memory does not grow with the number of groups visited.
+    """
+    for key in [k for k in st.session_state.keys() if isinstance(k, str) and k.startswith(prefix) and k != current_key]:
+        del st.session_state[key]
 
 
 def label_digits(group_key: str, digits: list[int]):
     """
-    Display improved digit labeling UI with batch selection and confirmation button.
+    Digit labeling as a single editable table (one row per position) inside a form,
+    so the widget count stays the same whatever the number of digits.
     """
     st.markdown("### 🔢 Digit Labeling")
 
@@ -16,114 +36,64 @@ def label_digits(group_key: str, digits: list[int]):
     digits_display = " - ".join([f"**{i}**: {digit}" for i, digit in enumerate(digits)])
     st.markdown(digits_display)
     
-    # Get current labels for this group
-    group_labels = st.session_state["digit_labels"].get(group_key, {})
-    
-    # Get currently saved incorrect and unknown digits
-    currently_incorrect = [i for i, data in group_labels.items() 
-                          if isinstance(data, dict) and data.get("label") == "False" 
-                          or data == "False"]
-    currently_unknown = [i for i, data in group_labels.items() 
-                        if isinstance(data, dict) and data.get("label") == "Unknown" 
-                        or data == "Unknown"]
-
-    # Create form for batch selection
-    with st.form(key=f"digit_form_{group_key}"):
-        st.markdown("#### Select Digits to Label:")
-        
-        # Create checkboxes for each digit in a grid layout
-        cols = st.columns(5)  # 5 columns for better layout
-        
-        incorrect_selections = []
-        unknown_selections = []
-        
-        for i, digit in enumerate(digits):
-            col_idx = i % 5
-            with cols[col_idx]:
-                st.markdown(f"**Position {i}: {digit}**")
-                
-                # Determine current status
-                current_status = "Correct"
-                if i in currently_incorrect:
-                    current_status = "Incorrect"
-                elif i in currently_unknown:
-                    current_status = "Unknown"
-                
-                # Radio button for each digit
-                status = st.radio(
-                    f"Status for digit {digit}:",
-                    options=["Correct", "Incorrect", "Unknown"],
-                    index=["Correct", "Incorrect", "Unknown"].index(current_status),
-                    key=f"digit_status_{group_key}_{i}",
-                    label_visibility="collapsed"
-                )
-                
-                if status == "Incorrect":
-                    incorrect_selections.append(i)
-                elif status == "Unknown":
-                    unknown_selections.append(i)
-        
-        st.markdown("---")
-        
-        # Collect correct values for incorrect digits
-        correct_values = {}
-        if incorrect_selections:
-            st.markdown("#### ✏️ Enter Correct Values for Incorrect Digits:")
-            correct_cols = st.columns(min(len(incorrect_selections), 5))
-            
-            for idx, pos in enumerate(incorrect_selections):
-                col_idx = idx % 5
-                with correct_cols[col_idx]:
-                    predicted_digit = digits[pos]
-                    
-                    # Get current correct value if it exists
-                    current_correct = 0
-                    if pos in group_labels and isinstance(group_labels[pos], dict):
-                        current_correct = group_labels[pos].get("correct_value", 0)
-                    
-                    correct_value = st.selectbox(
-                        f"Pos {pos} ({predicted_digit}) →",
-                        options=list(range(10)),
-                        index=current_correct,
-                        key=f"correct_value_{group_key}_{pos}"
-                    )
-                    correct_values[pos] = correct_value
+    # Get current labels for this group (unlabeled positions default to Correct)
+    group_labels = st.session_state["digit_labels"].get(group_key)
+    status = [CORRECT] * len(digits)
+    corrected = [None] * len(digits)
+    if group_labels is not None:
+        for i in range(min(len(digits), len(group_labels))):
+            if group_labels.status[i] != NOT_SET:
+                status[i] = int(group_labels.status[i])
+            if group_labels.corrected[i] != NOT_SET:
+                corrected[i] = int(group_labels.corrected[i])
+
+    table = pd.DataFrame({
+        "Position": range(len(digits)),
+        "Detected": digits,
+        "Status": [DIGIT_STATUS_OPTIONS[code] for code in status],
+        "Correct value": pd.array(corrected, dtype="Int64"),
+    })
+
+    editor_key = f"{DIGIT_EDITOR_PREFIX}{group_key}"
+    drop_stale_widget_state(DIGIT_EDITOR_PREFIX, editor_key)
+
+    # Edits stay in the browser until the form is submitted
+    with st.form(key="digit_form"):
+        edited = st.data_editor(
+            table,
+            key=editor_key,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Position", "Detected"],
+            column_config={
+                "Status": st.column_config.SelectboxColumn(options=DIGIT_STATUS_OPTIONS, required=True),
+                "Correct value": st.column_config.NumberColumn(
+                    min_value=0, max_value=9, step=1,
+                    help="The real digit, for positions marked Incorrect"
+                ),
+            },
+        )
 
         # Submit button
         submitted = st.form_submit_button("✅ Apply Digit Labels", use_container_width=True)
         
         if submitted:
-            # Update labels based on selections
-            new_labels = {}
-            for i in range(len(digits)):
-                if i in incorrect_selections:
-                    new_labels[i] = {
-                        "label": "False",
-                        "predicted": digits[i],
-                        "correct_value": correct_values.get(i, 0)
-                    }
-                elif i in unknown_selections:
-                    new_labels[i] = {"label": "Unknown", "predicted": digits[i]}
-                else:
-                    new_labels[i] = {"label": "True", "predicted": digits[i]}
-            
-            st.session_state["digit_labels"][group_key] = new_labels
+            with perf.timed("submit.digit_labels"):
+                new_status = [DIGIT_STATUS_OPTIONS.index(name) for name in edited["Status"]]
+                new_corrected = [int(value) if code == INCORRECT and pd.notna(value) else None
+                                 for code, value in zip(new_status, edited["Correct value"])]
+                st.session_state["digit_labels"][group_key] = DigitLabels(new_status, digits, new_corrected)
+                bump_annotation_revision()
+                telemetry.log_event("submit", group_key, form="digits")
             st.success("✅ Digit labels updated successfully!")
             st.rerun()
 
     # Show current summary outside the form
-    if group_labels:
-        correct_count = len([i for i, data in group_labels.items() 
-                           if isinstance(data, dict) and data.get("label") == "True" 
-                           or data == "True"])
-        incorrect_count = len([i for i, data in group_labels.items() 
-                             if isinstance(data, dict) and data.get("label") == "False" 
-                             or data == "False"])
-        unknown_count = len([i for i, data in group_labels.items() 
-                           if isinstance(data, dict) and data.get("label") == "Unknown" 
-                           or data == "Unknown"])
-        
-        st.info(f"Current Status: ✅ {correct_count} correct  |  ❌ {incorrect_count} incorrect  |  ❓ {unknown_count} unclear")
+    if group_labels is not None and len(group_labels):
+        correct_count, incorrect_count, unknown_count = group_labels.counts()
+        missing = int(((group_labels.status == INCORRECT) & (group_labels.corrected == NOT_SET)).sum())
+        st.info(f"Current Status: ✅ {correct_count} correct  |  ❌ {incorrect_count} incorrect  |  ❓ {unknown_count} unclear"
+                + (f"  |  {missing} incorrect without a correct value" if missing else ""))
 
 
 def label_words(group_key: str, words: list[str]):
@@ -146,7 +116,7 @@ def label_words(group_key: str, words: list[str]):
     st.markdown(f"`{words_display}`")
     
     # Get currently marked incorrect words
-    currently_incorrect = [word for word, label in word_labels.items() if label == "False"]
+    currently_incorrect = [word for word, correct in word_labels.items() if not correct]
     
     # Create a form for batch updates
 
@@ -176,30 +146,28 @@ def label_words(group_key: str, words: list[str]):
         submitted = st.form_submit_button("✅ Apply Word Changes", type="primary")
         
         if submitted:
-            # Update word labels based on selection
-            new_word_labels = {}
-            for word in words:
-                if word in incorrect_words:
-                    new_word_labels[word] = "False"
-                else:
-                    new_word_labels[word] = "True"
+            with perf.timed("submit.word_labels"):
+                # Update word labels based on selection
+                new_word_labels = {word: word not in incorrect_words for word in words}
             
-            st.session_state["word_labels"][group_key] = new_word_labels
+                st.session_state["word_labels"][group_key] = new_word_labels
+                bump_annotation_revision()
+                telemetry.log_event("submit", group_key, form="words")
             
-            # Handle missed words
-            if missed_input and missed_input.strip():
-                missed_list = [w.strip() for w in missed_input.split(",") if w.strip()]
-                st.session_state["missed_words"][group_key] = missed_list
-                st.success(f"Updated labels for {len(words)} words and saved {len(missed_list)} missed words!")
-            else:
-                # Clear missed words if input is empty
-                st.session_state["missed_words"][group_key] = []
-                st.success(f"Updated labels for {len(words)} words!")
+                # Handle missed words
+                if missed_input and missed_input.strip():
+                    missed_list = [w.strip() for w in missed_input.split(",") if w.strip()]
+                    st.session_state["missed_words"][group_key] = missed_list
+                    st.success(f"Updated labels for {len(words)} words and saved {len(missed_list)} missed words!")
+                else:
+                    # Clear missed words if input is empty
+                    st.session_state["missed_words"][group_key] = []
+                    st.success(f"Updated labels for {len(words)} words!")
     
     # Show current status (outside form to avoid conflicts)
     if word_labels:  # Only show if labels exist
-        correct_count = len([w for w, label in word_labels.items() if label == "True"])
-        incorrect_count = len([w for w, label in word_labels.items() if label == "False"])
+        correct_count = sum(word_labels.values())
+        incorrect_count = len(word_labels) - correct_count
         st.info(f"✅ {correct_count} correct, ❌ {incorrect_count} incorrect")
 
     # Display current missed words
@@ -0,0 +1,172 @@
+"""
+Inter-annotator agreement over several exported annotation sets (the CSVs of
+utils.export_utils.build_annotation_dataframe).
+
+Every error category and every digit position is one rated item. The sets are joined on
+group_key into a (groups × annotators) code matrix per item, with MISSING where an annotator
+did not annotate the group; all statistics are computed on those matrices at once.
+No Streamlit dependency, so it can also run headless.
+"""
+import re
+from itertools import combinations
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from utils.label_store import DIGIT_STATUSES
+
+MISSING = -1
+
+DIGIT_COLUMN = re.compile(r"^digit_\d+$")
+
+# Export column marking groups the annotator saved labels for; with it, an empty group_label
+# means "no category applies" rather than "not classified"
+REVIEWED_COLUMN = "group_reviewed"
+
+
+def load_annotation_set(source) -> pd.DataFrame:
+    """
+    Reads an annotation CSV (path or file-like), keeping only the columns rated for agreement:
+    group_key, group_label, group_reviewed and the per-position digit labels.
+    """
+    frame = pd.read_csv(
+        source,
+        usecols=lambda c: c in ("group_key", "group_label", REVIEWED_COLUMN) or bool(DIGIT_COLUMN.match(c)),
+        dtype=str,
+        keep_default_na=False,
+    )
+    return frame.drop_duplicates("group_key", keep="last").set_index("group_key")
+
+
+def _category_codes(frame: pd.DataFrame, categories: List[str]) -> pd.DataFrame:
+    """
+    0/1 per category: whether the group carries the label. Groups with an empty group_label
+    are MISSING (not classified) unless the set marks them as reviewed.
+    """
+    present = np.full((len(frame), len(categories)), MISSING, dtype=np.int8)
+    if "group_label" in frame.columns:
+        labels = frame["group_label"].reset_index(drop=True)
+        rated = labels.str.strip().to_numpy() != ""
+        if REVIEWED_COLUMN in frame.columns:
+            rated |= frame[REVIEWED_COLUMN].str.strip().str.lower().to_numpy() == "true"
+        present[rated] = 0
+        # Positional index, so every exploded label points back at its row
+        exploded = labels.str.split(";").explode().str.strip()
+        category = pd.Index(categories).get_indexer(exploded.to_numpy())
+        known = category >= 0
+        present[exploded.index.to_numpy()[known], category[known]] = 1
+    return pd.DataFrame(present, index=frame.index, columns=categories)
+
+
+def _digit_codes(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Status code per digit position (index in DIGIT_STATUSES), MISSING where unlabeled.
+    """
+    columns = sorted((c for c in frame.columns if DIGIT_COLUMN.match(c)), key=lambda c: int(c.split("_")[1]))
+    mapping = {name: code for code, name in enumerate(DIGIT_STATUSES)}
+    return pd.DataFrame(
+        {c: frame[c].map(mapping).fillna(MISSING).astype(np.int8) for c in columns},
+        index=frame.index,
+    )
+
+
+def _kappa(observed: np.ndarray, expected: np.ndarray) -> float:
+    if np.isclose(expected, 1.0):
+        return 1.0 if np.isclose(observed, 1.0) else np.nan
+    return float((observed - expected) / (1 - expected))
+
+
+def _cohen_kappa(a: np.ndarray, b: np.ndarray, n_classes: int) -> float:
+    """
+    Cohen's kappa of two code vectors (both already restricted to commonly rated groups).
+    """
+    if len(a) == 0:
+        return np.nan
+    confusion = np.bincount(a * n_classes + b, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+    confusion = confusion / len(a)
+    return _kappa(np.trace(confusion), confusion.sum(axis=1) @ confusion.sum(axis=0))
+
+
+def _fleiss_kappa(counts: np.ndarray) -> float:
+    """
+    Fleiss' kappa from a (groups × classes) matrix of rating counts; groups may have
+    different numbers of raters (only groups with at least two are passed in).
+    """
+    if len(counts) == 0:
+        return np.nan
+    raters = counts.sum(axis=1)
+    per_group = ((counts * (counts - 1)).sum(axis=1)) / (raters * (raters - 1))
+    class_share = counts.sum(axis=0) / raters.sum()
+    return _kappa(per_group.mean(), (class_share ** 2).sum())
+
+
+def compute_agreement(sets: Dict[str, pd.DataFrame], categories: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Agreement between the annotation sets (name → load_annotation_set frame).
+    Returns:
+        "items"          one row per category / digit position: groups rated by two or more
+                         annotators, observed agreement, mean pairwise Cohen's kappa, Fleiss' kappa
+        "pairwise"       Cohen's kappa per item and annotator pair
+        "disagreements"  one row per (group, item) whose annotators gave different labels,
+                         with each annotator's label
+    """
+    names = list(sets)
+    keys = pd.Index(np.unique(np.concatenate([frame.index.to_numpy(dtype=str) for frame in sets.values()])),
+                    name="group_key")
+
+    # One (groups × annotators) code matrix per item
+    matrices: Dict[str, np.ndarray] = {}
+    kinds: Dict[str, str] = {}
+    class_names: Dict[str, List[str]] = {}
+    per_set = {}
+    for name, frame in sets.items():
+        codes = pd.concat([_category_codes(frame, categories), _digit_codes(frame)], axis=1)
+        per_set[name] = codes.reindex(keys, fill_value=MISSING)
+    items = list(dict.fromkeys(c for codes in per_set.values() for c in codes.columns))
+    for item in items:
+        matrices[item] = np.column_stack([
+            per_set[name][item].to_numpy() if item in per_set[name].columns else np.full(len(keys), MISSING, np.int8)
+            for name in names
+        ]).astype(np.int64)
+        kinds[item] = "category" if item in categories else "digit"
+        class_names[item] = ["no", "yes"] if item in categories else DIGIT_STATUSES
+
+    item_rows, pair_rows, disagreements = [], [], []
+    for item, matrix in matrices.items():
+        n_classes = len(class_names[item])
+        rated = matrix != MISSING
+        shared = rated.sum(axis=1) >= 2
+        counts = np.stack([((matrix == c) & rated).sum(axis=1) for c in range(n_classes)], axis=1)[shared]
+
+        pair_kappas = []
+        for (i, a_name), (j, b_name) in combinations(enumerate(names), 2):
+            both = rated[:, i] & rated[:, j]
+            kappa = _cohen_kappa(matrix[both, i], matrix[both, j], n_classes)
+            pair_kappas.append(kappa)
+            pair_rows.append({"item": item, "annotator_a": a_name, "annotator_b": b_name,
+                              "groups": int(both.sum()), "cohen_kappa": kappa})
+
+        unanimous = counts.max(axis=1) == counts.sum(axis=1) if len(counts) else np.array([], bool)
+        item_rows.append({
+            "item": item,
+            "kind": kinds[item],
+            "groups": int(shared.sum()),
+            "observed_agreement": float(unanimous.mean()) if len(unanimous) else np.nan,
+            "cohen_kappa": float(np.nanmean(pair_kappas)) if not np.all(np.isnan(pair_kappas)) else np.nan,
+            "fleiss_kappa": _fleiss_kappa(counts),
+        })
+
+        disagreeing = np.flatnonzero(shared)[~unanimous]
+        if len(disagreeing):
+            # MISSING (-1) indexes the trailing empty label
+            labels = np.array(class_names[item] + [""], dtype=object)
+            ratings = pd.DataFrame(labels[matrix[disagreeing]], columns=names)
+            ratings.insert(0, "item", item)
+            ratings.insert(0, "group_key", keys[disagreeing])
+            disagreements.append(ratings)
+
+    return {
+        "items": pd.DataFrame(item_rows),
+        "pairwise": pd.DataFrame(pair_rows, columns=["item", "annotator_a", "annotator_b", "groups", "cohen_kappa"]),
+        "disagreements": (pd.concat(disagreements, ignore_index=True) if disagreements
+                          else pd.DataFrame(columns=["group_key", "item"] + names)),
+    }
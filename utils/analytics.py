@@ -0,0 +1,87 @@
+"""
+Aggregations over the annotation table produced by utils.export_utils.build_annotation_dataframe.
+They have no Streamlit dependency so they can also run headless (benchmarks, reports).
+"""
+import numpy as np
+import pandas as pd
+
+DIGIT_LABEL_VALUES = ["True", "False", "Unknown"]
+
+
+def digit_label_columns(df: pd.DataFrame) -> list:
+    """
+    Per-position digit label columns (digit_0, digit_1, ...), without the _predicted/_correct columns.
+    """
+    return [col for col in df.columns if col.startswith("digit_") and not col.endswith(("_predicted", "_correct"))]
+
+
+def word_label_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if col.startswith("word_")]
+
+
+def count_group_labels(df: pd.DataFrame) -> pd.Series:
+    """
+    Number of times each error category was applied (groups may carry several labels).
+    """
+    if "group_label" not in df.columns:
+        return pd.Series([], dtype=int)
+    labels = df["group_label"].fillna("").astype(str).str.split(";").explode().str.strip()
+    return labels[labels != ""].value_counts()
+
+
+def count_digit_labels(df: pd.DataFrame) -> pd.Series:
+    """
+    Number of digit positions labelled True / False / Unknown.
+    """
+    cols = digit_label_columns(df)
+    if not cols:
+        return pd.Series([], dtype=int)
+    values = df[cols].stack().astype(str)
+    return values[values.isin(DIGIT_LABEL_VALUES)].value_counts()
+
+
+def digit_confusion_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    10×10 matrix of actual (rows) vs predicted (columns) digits for positions labelled False
+    with a correction.
+    """
+    matrix = np.zeros((10, 10), dtype=int)
+    for col in digit_label_columns(df):
+        predicted_col, correct_col = f"{col}_predicted", f"{col}_correct"
+        if predicted_col not in df.columns or correct_col not in df.columns:
+            continue
+        rows = df[(df[col].astype(str) == "False")]
+        predicted = pd.to_numeric(rows[predicted_col], errors="coerce")
+        actual = pd.to_numeric(rows[correct_col], errors="coerce")
+        valid = predicted.between(0, 9) & actual.between(0, 9)
+        np.add.at(matrix, (actual[valid].astype(int), predicted[valid].astype(int)), 1)
+    return matrix
+
+
+def summarize_word_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Count of True/False labels per predicted word (columns: word, label, count).
+    """
+    cols = word_label_columns(df)
+    if not cols:
+        return pd.DataFrame(columns=["word", "label", "count"])
+    word_data = df[cols].melt(var_name="word", value_name="label")
+    word_data["word"] = word_data["word"].str.replace("word_", "", regex=False)
+    return word_data.groupby(["word", "label"]).size().reset_index(name="count")
+
+
+def count_missed_words_per_group(df: pd.DataFrame) -> pd.Series:
+    """
+    Number of missed words recorded for each group.
+    """
+    missed = df["missed_words"].fillna("").astype(str)
+    return (missed.str.count(",") + 1).where(missed != "", 0)
+
+
+def missed_word_frequencies(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frequency of every missed word across all groups (columns: Word, Frequency), most frequent first.
+    """
+    words = df["missed_words"].dropna().astype(str).str.split(",").explode().str.strip()
+    counts = words[words != ""].value_counts()
+    return pd.DataFrame({"Word": counts.index, "Frequency": counts.values})
@@ -0,0 +1,171 @@
+import uuid
+import fnmatch
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Maximum number of bulk operations kept for undo
+MAX_HISTORY = 20
+
+
+def as_label_list(value) -> List[str]:
+    """
+    Normalizes a stored group label (old single string or new list) to a list.
+    """
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def session_token() -> str:
+    """
+    Random identifier of this browser session, created on first use.
+    """
+    return st.session_state.setdefault("annotation_session", uuid.uuid4().hex)
+
+
+def annotation_revision() -> str:
+    """
+    Identifier of the current state of this session's label stores; it changes on every edit,
+    so analyses derived from the labels can be cached per revision.
+    """
+    return f"{session_token()}:{st.session_state.get('annotation_revision', 0)}"
+
+
+def bump_annotation_revision():
+    """
+    Marks the label stores as changed; called by every code path that writes labels.
+    """
+    st.session_state["annotation_revision"] = st.session_state.get("annotation_revision", 0) + 1
+
+
+def select_groups(
+    groups: Dict[str, Dict[str, str]],
+    pattern: str = "",
+    pattern_type: str = "Glob",
+    label_filter: str = "Any",
+    label: Optional[str] = None,
+    missing_slot: Optional[str] = None,
+) -> List[str]:
+    """
+    Selects group keys matching a key pattern and label/slot filters.
+    All filters are evaluated as boolean masks over the whole key set at once.
+    """
+    if not groups:
+        return []
+
+    slot_frame = pd.DataFrame.from_dict(groups, orient="index")
+    keys = pd.Series(slot_frame.index, dtype="object")
+    mask = np.ones(len(keys), dtype=bool)
+
+    if pattern:
+        if pattern_type == "Glob":
+            mask &= keys.str.match(fnmatch.translate(pattern)).to_numpy()
+        else:
+            mask &= keys.str.contains(pattern, regex=True).to_numpy()
+
+    if label_filter != "Any":
+        group_labels = st.session_state.get("group_labels", {})
+        current = keys.map(lambda k: as_label_list(group_labels.get(k, [])))
+        if label_filter == "Unlabeled only":
+            mask &= (current.str.len() == 0).to_numpy()
+        elif label_filter == "Labeled only":
+            mask &= (current.str.len() > 0).to_numpy()
+        elif label_filter == "Has label" and label:
+            mask &= current.map(lambda labels: label in labels).to_numpy(dtype=bool)
+
+    # If no group has the slot at all, every group is missing it
+    if missing_slot and missing_slot in slot_frame.columns:
+        mask &= slot_frame[missing_slot].isna().to_numpy()
+
+    return keys[mask].tolist()
+
+
+def apply_label_updates(updates: Dict[str, Dict[str, Any]], description: str) -> int:
+    """
+    Applies updates to one or more label stores as a single undoable transaction.
+    `updates` maps a store name to {group_key: new_value}; a value of None deletes the entry.
+    Returns the number of entries changed.
+    """
+    changes = {}
+    changed = 0
+
+    for store_name, store_updates in updates.items():
+        if store_name not in st.session_state:
+            st.session_state[store_name] = {}
+        store = st.session_state[store_name]
+
+        previous = {}
+        for key, value in store_updates.items():
+            old_value = store.get(key)
+            if old_value != value:
+                previous[key] = old_value
+
+        if not previous:
+            continue
+
+        # Write all changes for this store at once
+        for key in previous:
+            if store_updates[key] is None:
+                store.pop(key, None)
+        store.update({k: store_updates[k] for k in previous if store_updates[k] is not None})
+
+        changes[store_name] = previous
+        changed += len(previous)
+
+    if changes:
+        history = st.session_state.setdefault("bulk_label_history", [])
+        history.append({"description": description, "changes": changes})
+        del history[:-MAX_HISTORY]
+        bump_annotation_revision()
+
+    return changed
+
+
+def apply_bulk_labels(keys: Iterable[str], add: Iterable[str] = (), remove: Iterable[str] = ()) -> int:
+    """
+    Adds and/or removes group labels on many groups in one transaction.
+    Returns the number of groups whose labels changed.
+    """
+    add = list(add)
+    remove = set(remove)
+    group_labels = st.session_state.get("group_labels", {})
+
+    updates = {}
+    for key in keys:
+        current = as_label_list(group_labels.get(key, []))
+        updated = [l for l in current if l not in remove]
+        updated += [l for l in add if l not in updated and l not in remove]
+        if updated != current:
+            updates[key] = updated
+
+    parts = []
+    if add:
+        parts.append(f"+{', '.join(add)}")
+    if remove:
+        parts.append(f"-{', '.join(sorted(remove))}")
+    description = f"{' '.join(parts)} on {len(updates)} groups"
+
+    return apply_label_updates({"group_labels": updates}, description)
+
+
+def undo_last_bulk_operation() -> Optional[str]:
+    """
+    Reverts the most recent bulk operation. Returns its description, or None if nothing to undo.
+    """
+    history = st.session_state.get("bulk_label_history", [])
+    if not history:
+        return None
+
+    entry = history.pop()
+    for store_name, previous in entry["changes"].items():
+        store = st.session_state.setdefault(store_name, {})
+        for key, old_value in previous.items():
+            if old_value is None:
+                store.pop(key, None)
+            else:
+                store[key] = old_value
+
+    bump_annotation_revision()
+    return entry["description"]
@@ -0,0 +1,470 @@
+"""
+Server-side registry of pre-ingested datasets.
+
+Datasets are ingested once (from a ZIP or tar archive, or a folder) into the registry directory,
+POSTAL_DATASETS_DIR (default "datasets"):
+
+    <registry>/<name>/data/                  extracted dataset folders
+    <registry>/<name>/index.parquet          one row per group, one path column per slot
+    <registry>/<name>/validation.parquet     validation report
+    <registry>/<name>/image_metrics.parquet  image quality metrics
+    <registry>/<name>/image_hashes.parquet   perceptual hashes
+    <registry>/<name>/ocr.parquet            parsed digits and words
+    <registry>/<name>/signal_measurements.parquet  raw per-group inputs of the error signals
+    <registry>/<name>/error_signals.parquet  error-likelihood signals for the priority queue
+    <registry>/<name>/thumbnails/<key>.jpg   small previews of the original images
+    <registry>/<name>/metadata.json          written last; datasets without it are ignored
+
+New scans are added with an append, which only processes the groups in the delta
+archive and bumps the dataset revision. An append writes its tables under new,
+revision-suffixed names (ocr.r0002.parquet, ...) and then switches metadata.json
+("tables") to them, so a revision is always read as one consistent set of files.
+The files of the revision before stay until the next append.
+
+Sessions open a dataset through st.cache_resource, so it is loaded once per server
+process and the same read-only objects are shared by every session.
+
+Usage:
+    python -m utils.dataset_registry ingest path/to/batch.zip --name march_batch
+    python -m utils.dataset_registry append path/to/delta.zip --name march_batch
+    python -m utils.dataset_registry list
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+if __name__ == "__main__":
+    # Ingest calls st.* outside a session; keep the bare-mode warnings quiet
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from PIL import Image
+from utils import perf
+from utils.file_utils import (
+    get_all_files_by_type, build_image_groups, parse_digits_from_file, parse_words_from_file,
+    is_tar_archive, stream_tar_archive
+)
+from utils.image_metrics import compute_image_metrics
+from utils.perceptual_hash import compute_image_hashes
+from utils.error_likelihood import measure_error_signals, score_error_signals
+from utils.validation import validate_dataset
+
+REGISTRY_DIR = os.environ.get("POSTAL_DATASETS_DIR", "datasets")
+
+SLOTS = ["images", "postcode_raw", "postcode_preprocessed", "receiver_raw",
+         "receiver_preprocessed", "digits", "words"]
+
+# Parquet tables of a dataset; metadata.json["tables"] names the file of each in the current revision
+TABLES = ["index", "validation", "image_metrics", "image_hashes", "ocr", "signal_measurements", "error_signals"]
+
+# Longest side of the stored preview thumbnails
+THUMBNAIL_SIZE = 256
+
+
+class RegisteredDataset(NamedTuple):
+    """
+    A loaded registry entry. Shared between sessions: treat every field as read-only.
+    """
+    name: str
+    data_dir: str
+    thumbnail_dir: str
+    metadata: Dict
+    file_dict: Dict[str, List[str]]
+    groups: Dict[str, Dict[str, str]]
+    validation_report: pd.DataFrame
+    image_metrics: pd.DataFrame
+    image_hashes: pd.Series
+    ocr: pd.DataFrame
+    error_signals: pd.DataFrame
+
+
+def _uncached(func):
+    """
+    The plain function behind a cached stage; ingest runs outside a Streamlit session.
+    """
+    return getattr(func, "__wrapped__", func)
+
+
+def _extract(source: str, target_dir: str) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Extracts a ZIP or tar archive (or copies a folder) and returns its (file_dict, groups).
+    Tar archives are indexed while they stream; the others are scanned afterwards.
+    """
+    if is_tar_archive(source):
+        return stream_tar_archive(source, target_dir)
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            zf.extractall(target_dir)
+    else:
+        shutil.copytree(source, target_dir)
+    file_dict = get_all_files_by_type(target_dir)
+    return file_dict, build_image_groups(file_dict)
+
+
+def _relative_index(groups: Dict[str, Dict[str, str]], data_dir: str) -> pd.DataFrame:
+    """
+    One row per group and one column per slot, with paths relative to data/ so the registry can be moved.
+    """
+    index = pd.DataFrame.from_dict(groups, orient="index").reindex(columns=SLOTS)
+    index = index.apply(lambda column: column.map(lambda path: os.path.relpath(path, data_dir), na_action="ignore"))
+    index.index.name = "group_key"
+    return index
+
+
+def _absolute_groups(index: pd.DataFrame, data_dir: str) -> Dict[str, Dict[str, str]]:
+    groups = {}
+    for slot in SLOTS:
+        column = index[slot].dropna()
+        for key, path in zip(column.index, (data_dir + os.sep + column).tolist()):
+            groups.setdefault(key, {})[slot] = path
+    # Keep the order of the index rather than the slot-by-slot fill order
+    return {key: groups[key] for key in index.index if key in groups}
+
+
+def _write_thumbnail(source: str, target: str) -> bool:
+    try:
+        with Image.open(source) as img:
+            img.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            thumb = img.convert("RGB")
+            thumb.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            thumb.save(target, "JPEG", quality=85)
+        return True
+    except Exception:
+        return False
+
+
+def _write_thumbnails(groups: Dict[str, Dict[str, str]], thumbnail_dir: str) -> int:
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        written = executor.map(
+            lambda item: _write_thumbnail(item[1]["images"], os.path.join(thumbnail_dir, f"{item[0]}.jpg")),
+            [(key, group) for key, group in groups.items() if "images" in group]
+        )
+        return sum(written)
+
+
+def _parse_ocr(groups: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    """
+    Parsed OCR output per group (digits and words lists; None where the file is missing).
+    """
+    parse_digits = _uncached(parse_digits_from_file)
+    parse_words = _uncached(parse_words_from_file)
+    rows = {
+        key: {
+            "digits": parse_digits(group["digits"]) if "digits" in group else None,
+            "words": parse_words(group["words"]) if "words" in group else None,
+        }
+        for key, group in groups.items()
+    }
+    ocr = pd.DataFrame.from_dict(rows, orient="index", columns=["digits", "words"])
+    ocr.index.name = "group_key"
+    return ocr
+
+
+def _write_parquet(frame: pd.DataFrame, path: str):
+    """
+    Writes via a temporary file and an atomic rename, so readers never see a partial file.
+    """
+    tmp_path = path + ".tmp"
+    frame.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_metadata(dataset_dir: str, metadata: Dict):
+    tmp_path = os.path.join(dataset_dir, "metadata.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(dataset_dir, "metadata.json"))
+
+
+def _read_metadata(dataset_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(dataset_dir, "metadata.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _revision_tables(metadata: Dict, revision: int) -> Dict[str, str]:
+    """
+    File name of every table in a revision: the current one, or the revision it replaced
+    (kept for sessions that are still opening it). Other revisions get the current files.
+    """
+    previous = metadata.get("previous") or {}
+    if revision != metadata.get("revision") and previous.get("revision") == revision:
+        return previous["tables"]
+    # Datasets ingested before tables were tracked use the plain file names
+    return metadata.get("tables") or {table: f"{table}.parquet" for table in TABLES}
+
+
+def _remove_unreferenced_tables(dataset_dir: str, metadata: Dict):
+    """
+    Deletes table files that neither the current nor the previous revision uses.
+    """
+    keep = set(metadata["tables"].values()) | set((metadata.get("previous") or {}).get("tables", {}).values())
+    for filename in os.listdir(dataset_dir):
+        if filename.endswith(".parquet") and filename not in keep:
+            os.remove(os.path.join(dataset_dir, filename))
+
+
+def list_datasets(registry_dir: str = REGISTRY_DIR) -> List[Dict]:
+    """
+    Metadata of every complete dataset in the registry, sorted by name.
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    datasets = []
+    for name in sorted(os.listdir(registry_dir)):
+        if name.startswith("."):
+            continue
+        metadata = _read_metadata(os.path.join(registry_dir, name))
+        if metadata is not None:
+            datasets.append(metadata)
+    return datasets
+
+
+def ingest_dataset(source: str, name: str, registry_dir: str = REGISTRY_DIR, replace: bool = False) -> Dict:
+    """
+    Extracts (ZIP/tar) or copies (folder) a dataset into the registry and precomputes its
+    index, validation report, image metrics, hashes, OCR store, error signals and thumbnails.
+    The entry is built in a hidden staging folder and swapped in at the end, so
+    sessions never see a half-written dataset. Returns the new metadata.
+    """
+    if not name or name.startswith(".") or os.sep in name:
+        raise ValueError(f"Invalid dataset name: {name!r}")
+
+    target_dir = os.path.join(registry_dir, name)
+    previous = _read_metadata(target_dir)
+    if os.path.exists(target_dir) and not replace:
+        raise FileExistsError(f"Dataset '{name}' already exists (use replace to re-ingest)")
+
+    staging_dir = os.path.join(registry_dir, f".{name}.ingesting")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    data_dir = os.path.join(staging_dir, "data")
+    thumbnail_dir = os.path.join(staging_dir, "thumbnails")
+    os.makedirs(thumbnail_dir)
+
+    start = time.perf_counter()
+    file_dict, groups = _extract(source, data_dir)
+
+    _write_parquet(_relative_index(groups, data_dir), os.path.join(staging_dir, "index.parquet"))
+    _write_parquet(_uncached(validate_dataset)(file_dict), os.path.join(staging_dir, "validation.parquet"))
+    image_metrics = _uncached(compute_image_metrics)(groups)
+    _write_parquet(image_metrics, os.path.join(staging_dir, "image_metrics.parquet"))
+    _write_parquet(_uncached(compute_image_hashes)(groups).to_frame("hash"), os.path.join(staging_dir, "image_hashes.parquet"))
+    _write_parquet(_parse_ocr(groups), os.path.join(staging_dir, "ocr.parquet"))
+    measurements = measure_error_signals(groups)
+    _write_parquet(measurements, os.path.join(staging_dir, "signal_measurements.parquet"))
+    _write_parquet(score_error_signals(measurements, image_metrics), os.path.join(staging_dir, "error_signals.parquet"))
+    n_thumbnails = _write_thumbnails(groups, thumbnail_dir)
+
+    metadata = {
+        "name": name,
+        "revision": (previous or {}).get("revision", 0) + 1,
+        "source": os.path.basename(os.path.abspath(source)),
+        "ingested_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "ingest_seconds": round(time.perf_counter() - start, 1),
+        "n_groups": len(groups),
+        "n_files": sum(len(paths) for paths in file_dict.values()),
+        "n_thumbnails": n_thumbnails,
+        "appends": [],
+        "tables": {table: f"{table}.parquet" for table in TABLES},
+    }
+    _write_metadata(staging_dir, metadata)
+
+    if os.path.exists(target_dir):
+        retired_dir = os.path.join(registry_dir, f".{name}.retired")
+        shutil.rmtree(retired_dir, ignore_errors=True)
+        os.rename(target_dir, retired_dir)
+        os.rename(staging_dir, target_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+    else:
+        os.rename(staging_dir, target_dir)
+    return metadata
+
+
+def append_dataset(source: str, name: str, registry_dir: str = REGISTRY_DIR) -> Dict:
+    """
+    Ingests a delta archive (ZIP, tar or folder) into an existing dataset.
+    Only the groups present in the delta are validated, measured, hashed, parsed and
+    thumbnailed; their rows replace the old ones and new groups are added after the
+    existing ones, so the dataset order (and every session's annotations, which are
+    keyed by group) stay intact. The rank-based error signals are re-scored over the
+    merged measurements of all groups, so appended groups are ranked on the same scale.
+    Returns the updated metadata.
+    """
+    dataset_dir = os.path.join(registry_dir, name)
+    metadata = _read_metadata(dataset_dir)
+    if metadata is None:
+        raise FileNotFoundError(f"Dataset '{name}' is not registered")
+
+    start = time.perf_counter()
+    revision = metadata["revision"] + 1
+    current_tables = _revision_tables(metadata, metadata["revision"])
+    # Tables of the new revision go to new files; the current ones stay untouched until metadata.json switches
+    new_tables = {table: f"{table}.r{revision:04d}.parquet" for table in TABLES}
+    data_dir = os.path.join(dataset_dir, "data")
+    # Each delta keeps its own folder so replaced files never overwrite data in use
+    delta_dir = os.path.join(data_dir, f"append_{revision:04d}")
+    shutil.rmtree(delta_dir, ignore_errors=True)
+    _, delta_groups = _extract(source, delta_dir)
+
+    index = pd.read_parquet(os.path.join(dataset_dir, current_tables["index"]))
+    delta_index = _relative_index(delta_groups, data_dir)
+    affected = delta_index.index
+    added = affected.difference(index.index, sort=False)
+    index = index.reindex(index.index.append(added))
+    # Slots present in the delta replace the stored paths; other slots are kept
+    index.loc[affected] = index.loc[affected].where(delta_index.isna(), delta_index)
+    _write_parquet(index, os.path.join(dataset_dir, new_tables["index"]))
+
+    groups = _absolute_groups(index.loc[affected], data_dir)
+    file_dict = {slot: [group[slot] for group in groups.values() if slot in group] for slot in SLOTS}
+
+    def merge(table: str, delta: pd.DataFrame, key_column: Optional[str] = None) -> pd.DataFrame:
+        stored = pd.read_parquet(os.path.join(dataset_dir, current_tables[table]))
+        if key_column:
+            stored = stored[~stored[key_column].isin(affected)]
+        else:
+            stored = stored.drop(affected, errors="ignore")
+        merged = pd.concat([stored, delta], ignore_index=bool(key_column))
+        if key_column:
+            merged = merged.sort_values(["issue", key_column], ignore_index=True)
+        _write_parquet(merged, os.path.join(dataset_dir, new_tables[table]))
+        return merged
+
+    merge("validation", _uncached(validate_dataset)(file_dict), key_column="group_key")
+    image_metrics = _uncached(compute_image_metrics)(groups)
+    merged_metrics = merge("image_metrics", image_metrics)
+    merge("image_hashes", _uncached(compute_image_hashes)(groups).to_frame("hash"))
+    merge("ocr", _parse_ocr(groups))
+    measured = current_tables.get("signal_measurements")
+    if measured and os.path.exists(os.path.join(dataset_dir, measured)):
+        measurements = merge("signal_measurements", measure_error_signals(groups))
+    else:
+        # Datasets ingested before measurements were stored are measured in full once
+        measurements = measure_error_signals(_absolute_groups(index, data_dir))
+        _write_parquet(measurements, os.path.join(dataset_dir, new_tables["signal_measurements"]))
+    # Percentile ranks are only comparable over one population: score every group again
+    _write_parquet(score_error_signals(measurements, merged_metrics), os.path.join(dataset_dir, new_tables["error_signals"]))
+
+    thumbnail_dir = os.path.join(dataset_dir, "thumbnails")
+    replaced_thumbnails = sum(os.path.exists(os.path.join(thumbnail_dir, f"{key}.jpg")) for key in affected)
+    n_thumbnails = _write_thumbnails(groups, thumbnail_dir)
+
+    metadata.update({
+        "previous": {"revision": metadata["revision"], "tables": current_tables},
+        "tables": new_tables,
+        "revision": revision,
+        "n_groups": len(index),
+        "n_files": int(index.notna().sum().sum()),
+        "n_thumbnails": metadata.get("n_thumbnails", 0) - replaced_thumbnails + n_thumbnails,
+    })
+    metadata.setdefault("appends", []).append({
+        "revision": revision,
+        "source": os.path.basename(os.path.abspath(source)),
+        "appended_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(time.perf_counter() - start, 1),
+        "groups_added": len(added),
+        "groups_updated": len(affected) - len(added),
+        "thumbnails_written": n_thumbnails,
+    })
+    # metadata.json goes last: sessions pick up the new revision only once everything is in place
+    _write_metadata(dataset_dir, metadata)
+    _remove_unreferenced_tables(dataset_dir, metadata)
+    return metadata
+
+
+@perf.instrument("dataset_open")
+@st.cache_resource(show_spinner="📚 Opening dataset...", max_entries=8)
+def open_dataset(name: str, revision: int, registry_dir: str = REGISTRY_DIR) -> RegisteredDataset:
+    """
+    Loads a registered dataset once per server process; revision is part of the cache key
+    so a re-ingested or appended dataset is picked up on the next rerun. All tables are
+    read from the files metadata.json lists for that revision.
+    """
+    dataset_dir = os.path.abspath(os.path.join(registry_dir, name))
+    data_dir = os.path.join(dataset_dir, "data")
+    metadata = _read_metadata(dataset_dir) or {}
+    tables = _revision_tables(metadata, revision)
+    if revision != metadata.get("revision") and tables is not metadata.get("tables"):
+        metadata = dict(metadata, revision=revision, tables=tables)
+
+    def read(table: str) -> pd.DataFrame:
+        return pd.read_parquet(os.path.join(dataset_dir, tables[table]))
+
+    index = read("index")
+    groups = _absolute_groups(index, data_dir)
+    file_dict = {slot: (data_dir + os.sep + index[slot].dropna()).tolist() for slot in SLOTS}
+
+    hashes = read("image_hashes")["hash"]
+    return RegisteredDataset(
+        name=name,
+        data_dir=data_dir,
+        thumbnail_dir=os.path.join(dataset_dir, "thumbnails"),
+        metadata=metadata,
+        file_dict=file_dict,
+        groups=groups,
+        validation_report=read("validation"),
+        image_metrics=read("image_metrics"),
+        image_hashes=hashes.astype(np.uint64),
+        ocr=read("ocr"),
+        error_signals=read("error_signals"),
+    )
+
+
+def get_ocr_output(dataset: RegisteredDataset, group_key: str) -> Tuple[Optional[List[int]], Optional[List[str]]]:
+    """
+    Pre-parsed (digits, words) of a group from the dataset's OCR store; None where the file is missing.
+    """
+    if group_key not in dataset.ocr.index:
+        return None, None
+    digits, words = dataset.ocr.loc[group_key, ["digits", "words"]]
+    return (
+        # Stores ingested before multi-digit tokens were dropped may still hold them
+        None if digits is None else [int(d) for d in digits if 0 <= int(d) <= 9],
+        None if words is None else [str(w) for w in words],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the server-side dataset registry.")
+    parser.add_argument("--registry", default=REGISTRY_DIR, help="Registry directory (default: $POSTAL_DATASETS_DIR or ./datasets)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Ingest a dataset archive or folder")
+    ingest.add_argument("source", help="Path of the ZIP/tar archive or dataset folder")
+    ingest.add_argument("--name", help="Dataset name (default: source file name)")
+    ingest.add_argument("--replace", action="store_true", help="Re-ingest over an existing dataset")
+
+    append = commands.add_parser("append", help="Add a delta archive or folder to an existing dataset")
+    append.add_argument("source", help="Path of the delta ZIP/tar archive or folder")
+    append.add_argument("--name", required=True, help="Dataset to append to")
+
+    commands.add_parser("list", help="List registered datasets")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        name = args.name or os.path.basename(os.path.normpath(args.source)).split(".")[0]
+        metadata = ingest_dataset(args.source, name, args.registry, replace=args.replace)
+        print(f"Ingested '{name}' (revision {metadata['revision']}): {metadata['n_groups']} groups "
+              f"in {metadata['ingest_seconds']}s")
+    elif args.command == "append":
+        metadata = append_dataset(args.source, args.name, args.registry)
+        delta = metadata["appends"][-1]
+        print(f"Appended to '{args.name}' (revision {metadata['revision']}): {delta['groups_added']} groups added, "
+              f"{delta['groups_updated']} updated in {delta['seconds']}s")
+    else:
+        for metadata in list_datasets(args.registry):
+            print(f"{metadata['name']:<30} rev {metadata['revision']:<4} {metadata['n_groups']:>9} groups  "
+                  f"ingested {metadata['ingested_at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Error-likelihood scores for ordering the annotation queue.
+
+Every group gets a few cheap signals in 0..1 (higher = more likely to need a correction).
+Their weighted sum is the priority score. The weights start from SIGNAL_WEIGHTS and are
+re-estimated from the groups annotated so far, so signals that actually predict errors on
+this dataset gain weight as labels arrive.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from utils import perf
+from utils.file_utils import parse_digits_text, parse_words_text
+from utils.image_diff import DIFF_PAIRS, crop_similarity
+from utils.label_store import has_error
+
+# Iranian postcodes have 10 digits
+EXPECTED_POSTCODE_LENGTH = 10
+
+# Prior weight of every signal
+SIGNAL_WEIGHTS = {
+    "digit_count_mismatch": 3.0,
+    "empty_words": 2.0,
+    "missing_files": 2.0,
+    "blur": 1.0,
+    "low_contrast": 0.5,
+    "crop_disagreement": 1.0,
+}
+
+# Number of labeled groups at which learned and prior weights count equally
+PRIOR_STRENGTH = 20
+
+GROUP_SLOTS = ["images", "postcode_raw", "postcode_preprocessed", "receiver_raw",
+               "receiver_preprocessed", "digits", "words"]
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def _raw_signals(group: Dict[str, str]) -> tuple:
+    """
+    Thread pool task: digit count, word count and mean raw/preprocessed SSIM of one group.
+    """
+    digits_text = _read_text(group["digits"]) if "digits" in group else None
+    words_text = _read_text(group["words"]) if "words" in group else None
+    n_digits = len(parse_digits_text(digits_text)) if digits_text is not None else -1
+    n_words = len(parse_words_text(words_text)) if words_text is not None else 0
+
+    similarities = []
+    for raw_slot, processed_slot, _ in DIFF_PAIRS:
+        if raw_slot in group and processed_slot in group:
+            try:
+                similarities.append(crop_similarity(group[raw_slot], group[processed_slot]))
+            except Exception:
+                continue
+    return n_digits, n_words, np.mean(similarities) if similarities else np.nan
+
+
+def _rank(values: pd.Series, ascending: bool = True) -> pd.Series:
+    """
+    Percentile rank in 0..1 (NaN → 0.5, i.e. no evidence either way).
+    """
+    return values.rank(pct=True, ascending=ascending).fillna(0.5)
+
+
+def measure_error_signals(groups: Dict[str, Dict[str, str]], max_workers: int = 16) -> pd.DataFrame:
+    """
+    Raw per-group inputs of the signals, independent of the other groups: digit count (-1 without
+    a digits file), word count, mean raw/preprocessed crop similarity and share of missing files.
+    Text files are read and crop pairs compared concurrently.
+    """
+    keys = list(groups.keys())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        raw = pd.DataFrame(
+            list(executor.map(lambda k: _raw_signals(groups[k]), keys)),
+            index=pd.Index(keys, name="group_key"),
+            columns=["n_digits", "n_words", "similarity"]
+        )
+    raw["missing_files"] = [sum(slot not in groups[k] for slot in GROUP_SLOTS) / len(GROUP_SLOTS) for k in keys]
+    return raw
+
+
+def score_error_signals(raw: pd.DataFrame, metrics: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Signal table from measure_error_signals output, one 0..1 column per entry of SIGNAL_WEIGHTS.
+    Blur, contrast and crop disagreement are percentile ranks over all rows of raw, so a
+    dataset grown by appends is scored from the measurements of all its groups at once.
+    """
+    if raw.empty:
+        return pd.DataFrame(columns=list(SIGNAL_WEIGHTS))
+
+    signals = pd.DataFrame(index=raw.index)
+    signals["digit_count_mismatch"] = (raw["n_digits"] != EXPECTED_POSTCODE_LENGTH).astype(float)
+    signals["empty_words"] = (raw["n_words"] == 0).astype(float)
+    signals["missing_files"] = raw["missing_files"].astype(float)
+
+    crop_metrics = metrics.reindex(raw.index) if metrics is not None and not metrics.empty else pd.DataFrame(index=raw.index)
+    blur_columns = [c for c in ["postcode_raw_blur", "receiver_raw_blur"] if c in crop_metrics.columns]
+    contrast_columns = [c for c in ["postcode_raw_contrast", "receiver_raw_contrast"] if c in crop_metrics.columns]
+    # Low Laplacian variance means a blurry crop: rank descending so the blurriest get 1
+    signals["blur"] = (pd.concat([_rank(crop_metrics[c], ascending=False) for c in blur_columns], axis=1).mean(axis=1)
+                       if blur_columns else 0.5)
+    signals["low_contrast"] = (pd.concat([_rank(crop_metrics[c], ascending=False) for c in contrast_columns], axis=1).mean(axis=1)
+                               if contrast_columns else 0.5)
+    signals["crop_disagreement"] = _rank(raw["similarity"], ascending=False)
+    return signals[list(SIGNAL_WEIGHTS)]
+
+
+@perf.cached("error_signals", persist="disk", show_spinner=False)
+def compute_error_signals(groups: Dict[str, Dict[str, str]], metrics: Optional[pd.DataFrame] = None,
+                          max_workers: int = 16) -> pd.DataFrame:
+    """
+    Signal table indexed by group_key with one 0..1 column per entry of SIGNAL_WEIGHTS.
+    Results are cached on disk.
+    """
+    if not groups:
+        return pd.DataFrame(columns=list(SIGNAL_WEIGHTS))
+    return score_error_signals(measure_error_signals(groups, max_workers), metrics)
+
+
+def annotated_groups(group_labels: Dict[str, Any], digit_labels: Dict[str, Any],
+                     word_labels: Dict[str, Any], missed_words: Dict[str, Any]) -> set:
+    """
+    Groups the annotator saved labels for. The classifier stores an empty category list for
+    every group it shows, so an empty entry only counts with digit, word or missed-word labels.
+    """
+    return ({key for key, labels in group_labels.items() if labels}
+            | set(digit_labels) | set(word_labels) | set(missed_words))
+
+
+def label_outcomes(group_labels: Dict[str, Any], digit_labels: Dict[str, Any],
+                   word_labels: Dict[str, Any], missed_words: Dict[str, Any]) -> pd.Series:
+    """
+    True/False per annotated group (see annotated_groups): whether the annotator found any
+    error (an error category, a wrong digit or word, or a missed word).
+    """
+    keys = annotated_groups(group_labels, digit_labels, word_labels, missed_words)
+    outcomes = {
+        key: bool(group_labels.get(key)) or has_error(digit_labels.get(key), word_labels.get(key))
+             or bool(missed_words.get(key))
+        for key in keys
+    }
+    return pd.Series(outcomes, dtype=bool)
+
+
+def learn_signal_weights(signals: pd.DataFrame, outcomes: pd.Series) -> pd.Series:
+    """
+    Scales each prior weight by how much more the signal fires on groups with errors than
+    on clean ones, shrunk toward the prior while few groups are labeled.
+    """
+    prior = pd.Series(SIGNAL_WEIGHTS)
+    outcomes = outcomes[outcomes.index.isin(signals.index)]
+    if outcomes.empty or outcomes.all() or not outcomes.any():
+        return prior
+
+    labeled = signals.loc[outcomes.index]
+    lift = (labeled[outcomes].mean() + 0.05) / (labeled[~outcomes].mean() + 0.05)
+    confidence = len(outcomes) / (len(outcomes) + PRIOR_STRENGTH)
+    return prior * lift.clip(0.1, 10) ** confidence
+
+
+def rank_by_priority(keys: List[str], signals: pd.DataFrame, weights: pd.Series, done: set) -> List[str]:
+    """
+    Orders keys by descending priority score; groups in `done` go last in their given order.
+    """
+    pending = [k for k in keys if k not in done]
+    scores = signals.reindex(pending).fillna(0.5) @ weights.reindex(signals.columns)
+    ordered = scores.sort_values(ascending=False, kind="stable").index.tolist()
+    return ordered + [k for k in keys if k in done]
@@ -2,6 +2,7 @@ import pandas as pd
 from typing import Dict, Any
 from collections import defaultdict
 import streamlit as st
+from utils.label_store import INCORRECT, NOT_SET, word_label_name
 
 def generate_annotation_csv() -> pd.DataFrame:
     """
@@ -9,11 +10,23 @@ def generate_annotation_csv() -> pd.DataFrame:
     into a flat CSV-compatible DataFrame.
     Now handles multiple group labels per group.
     """
-    group_labels = dict(st.session_state.get("group_labels", {}))
-    digit_labels = dict(st.session_state.get("digit_labels", {}))
-    word_labels = dict(st.session_state.get("word_labels", {}))
-    missed_words = dict(st.session_state.get("missed_words", {}))
+    return build_annotation_dataframe(
+        dict(st.session_state.get("group_labels", {})),
+        dict(st.session_state.get("digit_labels", {})),
+        dict(st.session_state.get("word_labels", {})),
+        dict(st.session_state.get("missed_words", {})),
+    )
 
+
+def build_annotation_dataframe(
+    group_labels: Dict[str, Any],
+    digit_labels: Dict[str, Any],
+    word_labels: Dict[str, Any],
+    missed_words: Dict[str, Any],
+) -> pd.DataFrame:
+    """
+    Builds the annotation table from explicit label stores (no session state needed).
+    """
     # Collect all keys (groups)
     all_keys = set(group_labels.keys()) | set(digit_labels.keys()) | set(word_labels.keys())
 
@@ -30,23 +43,25 @@ def generate_annotation_csv() -> pd.DataFrame:
             row["group_label"] = "; ".join(group_label)  # Join multiple labels with semicolon
         else:
             row["group_label"] = group_label  # Keep single label as is
+        # Groups with saved labels of any kind were reviewed: no category then means none applies
+        row["group_reviewed"] = bool(row["group_label"]) or group_key in digit_labels or group_key in word_labels
 
-        # Digits: handle both old and new format
-        digit_data = digit_labels.get(group_key, {})
-        for i, data in digit_data.items():
-            if isinstance(data, dict):
-                # New format with detailed info
-                row[f"digit_{i}"] = data.get("label", "")
-                row[f"digit_{i}_predicted"] = data.get("predicted", "")
-                if data.get("label") == "False":
-                    row[f"digit_{i}_correct"] = data.get("correct_value", "")
-            else:
-                # Old format (backward compatibility)
-                row[f"digit_{i}"] = data
+        # Digits: one column set per labeled position
+        digit_data = digit_labels.get(group_key)
+        if digit_data is not None:
+            for i in range(len(digit_data)):
+                label = digit_data.label(i)
+                if label is None:
+                    continue
+                row[f"digit_{i}"] = label
+                if digit_data.predicted[i] != NOT_SET:
+                    row[f"digit_{i}_predicted"] = int(digit_data.predicted[i])
+                if digit_data.status[i] == INCORRECT:
+                    row[f"digit_{i}_correct"] = int(digit_data.corrected[i]) if digit_data.corrected[i] != NOT_SET else ""
 
         # Words: flatten word_W
-        for word, label in word_labels.get(group_key, {}).items():
-            row[f"word_{word}"] = label
+        for word, correct in word_labels.get(group_key, {}).items():
+            row[f"word_{word}"] = word_label_name(correct)
 
         # Missed Words
         missed = missed_words.get(group_key, [])
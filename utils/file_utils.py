@@ -1,22 +1,81 @@
 import os
+import shutil
+import hashlib
+import tarfile
 import zipfile
 import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from PIL import Image
 import re
 import streamlit as st
+from utils import perf
 
+# Filename suffix (before the extension) expected in each folder category
+SLOT_SUFFIXES = {
+    "images": "",
+    "postcode_raw": "_postcode",
+    "postcode_preprocessed": "_postcode",
+    "receiver_raw": "_receiver",
+    "receiver_preprocessed": "_receiver",
+    "digits": "_digits_extracted",
+    "words": "_words_extracted",
+}
 
-@st.cache_data
-def extract_zip_to_tempdir(zip_file) -> str:
+DIGITS_PATTERN = re.compile(r"Extracted Digits:\s*\[([^\]]+)\]")
+WORDS_PATTERN = re.compile(r"Individual Words:\s*(.+)")
+
+# Upload types accepted besides ZIP: tar and its compressed variants (.tar.gz → "gz", etc.).
+# The uploader only checks the last extension, so a bare .gz/.bz2/.xz file passes it; the content decides.
+ARCHIVE_TYPES = ["zip", "tar", "gz", "tgz", "bz2", "tbz2", "xz", "txz"]
+
+# Directory (inside a dataset folder) holding derived ingest artifacts
+CACHE_DIR_NAME = ".postal_cache"
+
+
+# Uploads are copied to disk in chunks of this size, never held twice in memory
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+UPLOAD_SPOOL_DIR = os.environ.get("POSTAL_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "postal_uploads"))
+
+
+@perf.instrument("upload_spooling")
+def spool_upload_to_disk(uploaded_file, spool_dir: str = UPLOAD_SPOOL_DIR) -> str:
     """
-    Extracts a zip file uploaded in Streamlit to a temporary directory.
+    Copies an uploaded file to disk chunk by chunk and returns the path of the copy.
+    The copy is named by its SHA-256, so identical uploads share one file (and one extraction).
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, part_path = tempfile.mkstemp(dir=spool_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            uploaded_file.seek(0)
+            for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        path = os.path.join(spool_dir, digest.hexdigest() + Path(uploaded_file.name).suffix.lower())
+        if os.path.exists(path):
+            os.remove(part_path)
+        else:
+            os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return path
+
+
+@perf.cached("zip_extraction")
+def extract_zip_to_tempdir(zip_path: str) -> str:
+    """
+    Extracts a zip file (spooled to disk) to a temporary directory.
+    Members are streamed from the file on disk; the cache key is only the path.
     Shows progress during extraction.
     """
     temp_dir = tempfile.mkdtemp()
     
-    with zipfile.ZipFile(zip_file, 'r') as zf:
+    with zipfile.ZipFile(zip_path, 'r') as zf:
         file_list = zf.namelist()
         total_files = len(file_list)
         
@@ -46,18 +105,115 @@ def extract_zip_to_tempdir(zip_file) -> str:
     return temp_dir
 
 
+def is_zip_archive(path: str) -> bool:
+    """
+    True for ZIP files (detected from content, not the name).
+    """
+    return os.path.isfile(path) and zipfile.is_zipfile(path)
+
+
+def is_tar_archive(path: str) -> bool:
+    """
+    True for .tar, .tar.gz, .tar.bz2 and .tar.xz files (detected from content, not the name).
+    """
+    return os.path.isfile(path) and not zipfile.is_zipfile(path) and tarfile.is_tarfile(path)
+
+
+def stream_tar_archive(tar_path: str, target_dir: str,
+                       on_member: Optional[Callable[[int], None]] = None) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Extracts a tar-family archive in one sequential pass, categorizing and grouping members
+    as they are written. The archive is read as a stream ("r|*"), so compressed archives are
+    decompressed exactly once and never seeked. Returns (file_dict, groups) as
+    get_all_files_by_type and build_image_groups would.
+    """
+    file_groups = {slot: [] for slot in SLOT_SUFFIXES}
+    group_dict = {}
+
+    with tarfile.open(tar_path, "r|*") as tf:
+        for count, member in enumerate(tf, start=1):
+            if on_member:
+                on_member(count)
+            parts = Path(member.name).parts
+            # Only regular files inside the archive root; hidden folders are skipped like on disk
+            if (not member.isfile() or os.path.isabs(member.name) or ".." in parts
+                    or any(part.startswith(".") for part in parts[:-1])):
+                continue
+
+            target = os.path.join(target_dir, *parts)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with tf.extractfile(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+
+            slot = categorize_path(os.path.dirname(member.name))
+            if slot:
+                file_groups[slot].append(target)
+                group_dict.setdefault(normalize_key_from_filename(target), {})[slot] = target
+
+    return file_groups, group_dict
+
+
+@perf.cached("tar_extraction")
+def extract_tar_to_tempdir(tar_path: str) -> Tuple[str, Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Extracts a tar-family archive (spooled to disk) to a temporary directory and returns
+    (temp_dir, file_dict, groups), so no separate scanning or grouping pass is needed.
+    """
+    temp_dir = tempfile.mkdtemp()
+    status_text = st.empty()
+
+    def show_progress(count: int):
+        if count % 100 == 0:
+            status_text.text(f"Extracting: {count} archive members read")
+
+    file_dict, groups = stream_tar_archive(tar_path, temp_dir, on_member=show_progress)
+    status_text.empty()
+    return temp_dir, file_dict, groups
+
+
+def categorize_path(rel_dir: str) -> Optional[str]:
+    """
+    Folder category of a file from its directory inside the dataset, or None for other files.
+    """
+    for slot in ["digits", "words", "postcode_raw", "postcode_preprocessed",
+                 "receiver_raw", "receiver_preprocessed", "images"]:
+        if slot in rel_dir:
+            return slot
+    return None
+
+
 def normalize_key_from_filename(path: str) -> str:
     """
     Normalizes the filename to use as a matching key:
-    Removes _receiver, _postcode, _words_extracted, _digits_extracted
+    Removes a trailing _receiver, _postcode, _words_extracted or _digits_extracted
     """
     name = Path(path).stem
     for suffix in ['_receiver', '_postcode', '_words_extracted', '_digits_extracted']:
         if name.endswith(suffix):
-            name = name.replace(suffix, '')
+            # Only strip the trailing suffix; keys may contain it elsewhere
+            return name[:-len(suffix)]
     return name
 
 
+def get_cache_dir(base_dir: str, name: str) -> str:
+    """
+    Returns (and creates) a directory for derived artifacts of the dataset in base_dir.
+    """
+    cache_dir = os.path.join(base_dir, CACHE_DIR_NAME, name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _walk_dataset(base_dir: str):
+    """
+    os.walk over a dataset folder, skipping hidden directories such as the artifact cache.
+    """
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        yield root, dirs, files
+
+
+@perf.instrument("file_scanning")
 def get_all_files_by_type(base_dir: str) -> Dict[str, List[str]]:
     """
     Walks the base_dir and returns a dict grouping files by their folder category.
@@ -74,7 +230,7 @@ def get_all_files_by_type(base_dir: str) -> Dict[str, List[str]]:
     }
     
     # Count total files first for progress tracking
-    total_files = sum([len(files) for _, _, files in os.walk(base_dir)])
+    total_files = sum([len(files) for _, _, files in _walk_dataset(base_dir)])
     
     if total_files > 100:  # Only show progress for larger datasets
         progress_bar = st.progress(0)
@@ -85,7 +241,9 @@ def get_all_files_by_type(base_dir: str) -> Dict[str, List[str]]:
         status_text = None
         processed_files = 0
 
-    for root, _, files in os.walk(base_dir):
+    for root, _, files in _walk_dataset(base_dir):
+        # Categorize on the path inside the dataset only, not on where it is stored
+        rel_root = os.path.relpath(root, base_dir)
         for fname in files:
             fpath = os.path.join(root, fname)
             
@@ -97,20 +255,9 @@ def get_all_files_by_type(base_dir: str) -> Dict[str, List[str]]:
                 status_text.text(f"Scanning files: {processed_files}/{total_files}")
 
             # Categorize files
-            if "digits" in root:
-                file_groups["digits"].append(fpath)
-            elif "words" in root:
-                file_groups["words"].append(fpath)
-            elif "postcode_raw" in root:
-                file_groups["postcode_raw"].append(fpath)
-            elif "postcode_preprocessed" in root:
-                file_groups["postcode_preprocessed"].append(fpath)
-            elif "receiver_raw" in root:
-                file_groups["receiver_raw"].append(fpath)
-            elif "receiver_preprocessed" in root:
-                file_groups["receiver_preprocessed"].append(fpath)
-            elif "images" in root:
-                file_groups["images"].append(fpath)
+            slot = categorize_path(rel_root)
+            if slot:
+                file_groups[slot].append(fpath)
 
     # Clean up progress indicators
     if progress_bar:
@@ -124,6 +271,7 @@ def get_all_files_by_type(base_dir: str) -> Dict[str, List[str]]:
     return file_groups
 
 
+@perf.instrument("group_building")
 def build_image_groups(file_dict: Dict[str, List[str]]) -> Dict[str, Dict[str, str]]:
     """
     Matches files based on their normalized key.
@@ -168,7 +316,7 @@ def build_image_groups(file_dict: Dict[str, List[str]]) -> Dict[str, Dict[str, s
     return group_dict
 
 
-@st.cache_data
+@perf.cached("image_decode")
 def load_image(filepath: str) -> Image.Image:
     """
     Loads an image using PIL with caching for better performance.
@@ -190,7 +338,59 @@ def load_image(filepath: str) -> Image.Image:
         raise
 
 
-@st.cache_data
+@perf.cached("image_slot_load", show_spinner=False)
+def load_image_with_info(filepath: str) -> Tuple[Optional[Image.Image], Dict]:
+    """
+    Opens an image file once for both its metadata and its display-sized pixels.
+    Safe to call from worker threads: failures are reported in the info dict, not shown.
+    """
+    info = {"exists": False}
+    try:
+        with open(filepath, "rb") as f:
+            info = {"exists": True, "size_kb": os.fstat(f.fileno()).st_size / 1024}
+            img = Image.open(f)
+            info.update(width=img.width, height=img.height, format=img.format)
+
+            # Same display size limit as load_image
+            max_size = 800
+            if max(img.size) > max_size:
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            else:
+                img.load()
+        return img, info
+    except FileNotFoundError:
+        return None, info
+    except Exception as e:
+        return None, dict(info, error=str(e))
+
+
+def parse_digits_text(text: str) -> List[int]:
+    """
+    Extracts the digits from the contents of a digits_extracted.txt file.
+    """
+    match = DIGITS_PATTERN.search(text)
+    if match:
+        digits_str = match.group(1)
+        # One digit per position; multi-digit or non-numeric tokens are not positions
+        tokens = [d.strip() for d in digits_str.split(',')]
+        return [int(d) for d in tokens if len(d) == 1 and d.isdecimal()]
+    return []
+
+
+def parse_words_text(text: str) -> List[str]:
+    """
+    Extracts the non-zero words from the contents of a words_extracted.txt file.
+    """
+    match = WORDS_PATTERN.search(text)
+    if match:
+        words_line = match.group(1)
+        # Clean and split by commas
+        words = [w.strip() for w in words_line.split(',')]
+        return [w for w in words if w != '0']
+    return []
+
+
+@perf.cached("parse_digits")
 def parse_digits_from_file(filepath: str) -> List[int]:
     """
     Extracts digits from a digits_extracted.txt file.
@@ -198,17 +398,13 @@ def parse_digits_from_file(filepath: str) -> List[int]:
     """
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            text = f.read()
-            match = re.search(r"Extracted Digits:\s*\[([^\]]+)\]", text)
-            if match:
-                digits_str = match.group(1)
-                return [int(d.strip()) for d in digits_str.split(',') if d.strip().isdigit()]
+            return parse_digits_text(f.read())
     except Exception as e:
         st.error(f"Error reading digits file: {filepath} -> {e}")
     return []
 
 
-@st.cache_data
+@perf.cached("parse_words")
 def parse_words_from_file(filepath: str) -> List[str]:
     """
     Extracts non-zero words from a words_extracted.txt file.
@@ -216,13 +412,7 @@ def parse_words_from_file(filepath: str) -> List[str]:
     """
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            text = f.read()
-            match = re.search(r"Individual Words:\s*(.+)", text)
-            if match:
-                words_line = match.group(1)
-                # Clean and split by commas
-                words = [w.strip() for w in words_line.split(',')]
-                return [w for w in words if w != '0']
+            return parse_words_text(f.read())
     except Exception as e:
         st.error(f"Error reading words file: {filepath} -> {e}")
-    return []
\ No newline at end of file
+    return []
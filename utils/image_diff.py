@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from typing import Dict, Tuple
+import numpy as np
+from PIL import Image
+
+# Raw/preprocessed slot pairs that can be compared
+DIFF_PAIRS = [
+    ("postcode_raw", "postcode_preprocessed", "📮 Postcode"),
+    ("receiver_raw", "receiver_preprocessed", "📋 Receiver"),
+]
+
+# Both images of a pair are aligned to the raw crop, capped at this size
+DIFF_SIZE = 400
+
+# Window size for the local SSIM statistics
+SSIM_WINDOW = 7
+
+# Heatmap colour ramp: black -> purple -> orange -> yellow
+_HEAT_ANCHORS = np.array([0.0, 0.35, 0.7, 1.0])
+_HEAT_COLORS = np.array([
+    [0, 0, 0],
+    [120, 28, 109],
+    [237, 105, 37],
+    [252, 255, 164],
+], dtype=np.float32)
+
+
+def _pair_cache_key(raw_path: str, processed_path: str) -> str:
+    """
+    Cache key for a pair: paths plus size and mtime, so replaced files are recomputed.
+    """
+    parts = []
+    for path in (raw_path, processed_path):
+        stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _load_aligned(raw_path: str, processed_path: str, max_size: int = DIFF_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads both images as grayscale arrays at the same scale (the raw crop's, capped at max_size).
+    """
+    with Image.open(raw_path) as raw_img:
+        raw = raw_img.convert("L")
+        raw.thumbnail((max_size, max_size))
+    with Image.open(processed_path) as processed_img:
+        processed = processed_img.convert("L").resize(raw.size, Image.Resampling.BILINEAR)
+    return np.asarray(raw, dtype=np.float64), np.asarray(processed, dtype=np.float64)
+
+
+def _box_mean(x: np.ndarray, k: int) -> np.ndarray:
+    """
+    Mean over every k×k window, computed from an integral image.
+    """
+    c = np.pad(x, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def structural_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Mean SSIM of two equally sized grayscale arrays (uniform window).
+    """
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    k = min(SSIM_WINDOW, a.shape[0], a.shape[1])
+
+    mu_a, mu_b = _box_mean(a, k), _box_mean(b, k)
+    var_a = _box_mean(a * a, k) - mu_a ** 2
+    var_b = _box_mean(b * b, k) - mu_b ** 2
+    cov = _box_mean(a * b, k) - mu_a * mu_b
+
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim_map.mean())
+
+
+def _heatmap(diff: np.ndarray) -> np.ndarray:
+    """
+    Maps a 0..1 difference array to RGB with the heat colour ramp.
+    """
+    channels = [np.interp(diff, _HEAT_ANCHORS, _HEAT_COLORS[:, c]) for c in range(3)]
+    return np.stack(channels, axis=-1).astype(np.uint8)
+
+
+def crop_similarity(raw_path: str, processed_path: str, max_size: int = 64) -> float:
+    """
+    Quick SSIM of a raw/preprocessed pair at a small scale, without writing any diff images.
+    """
+    raw, processed = _load_aligned(raw_path, processed_path, max_size)
+    return structural_similarity(raw, processed)
+
+
+def compute_pair_diff(raw_path: str, processed_path: str, cache_dir: str) -> Dict:
+    """
+    Computes (or loads from the disk cache) the difference between a raw crop and its
+    preprocessed version: heatmap and overlay images plus similarity scores.
+    """
+    cache_key = _pair_cache_key(raw_path, processed_path)
+    meta_path = os.path.join(cache_dir, f"{cache_key}.json")
+
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    raw, processed = _load_aligned(raw_path, processed_path)
+    diff = np.abs(raw - processed) / 255.0
+
+    heat = _heatmap(diff)
+    # Overlay: the raw crop in gray, tinted by the heatmap where the images differ
+    weight = np.clip(diff * 2, 0, 1)[..., None]
+    gray = np.repeat(raw[..., None], 3, axis=-1)
+    overlay = (gray * (1 - weight) + heat * weight).astype(np.uint8)
+
+    heatmap_path = os.path.join(cache_dir, f"{cache_key}_heatmap.png")
+    overlay_path = os.path.join(cache_dir, f"{cache_key}_overlay.png")
+    Image.fromarray(heat).save(heatmap_path)
+    Image.fromarray(overlay).save(overlay_path)
+
+    result = {
+        "ssim": structural_similarity(raw, processed),
+        "mean_abs_diff": float(diff.mean()),
+        "changed_fraction": float((diff > 0.25).mean()),
+        "heatmap_path": heatmap_path,
+        "overlay_path": overlay_path,
+    }
+
+    # Write the metadata last so a partial result is never treated as cached
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, meta_path)
+
+    return result
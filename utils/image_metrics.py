@@ -0,0 +1,125 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from PIL import Image
+from utils import perf
+
+# Slots whose quality is measured: the original scan and the raw crops
+METRIC_SLOTS = ["images", "postcode_raw", "receiver_raw"]
+
+METRIC_NAMES = ["blur", "contrast", "brightness", "width", "height"]
+
+# Images are downsampled to at most this size before measuring
+ANALYSIS_SIZE = 256
+
+# Number of images measured together as one NumPy batch (one process pool task)
+CHUNK_SIZE = 64
+
+
+def _load_downsampled(path: str) -> Tuple[np.ndarray, int, int]:
+    """
+    Loads an image as a downsampled grayscale float array plus its original resolution.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        # For JPEGs, draft() lets the decoder downscale by 1/2..1/8 for free
+        img.draft("L", (ANALYSIS_SIZE, ANALYSIS_SIZE))
+        gray = img.convert("L")
+        gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+        return np.asarray(gray, dtype=np.float32), width, height
+
+
+def _batch_metrics(arrays: List[np.ndarray]) -> np.ndarray:
+    """
+    Computes blur (Laplacian variance), contrast (RMS) and brightness (mean) for a batch.
+    Arrays are zero-padded into one (n, H, W) stack; a mask keeps padding out of the statistics.
+    """
+    n = len(arrays)
+    height = max(a.shape[0] for a in arrays)
+    width = max(a.shape[1] for a in arrays)
+
+    batch = np.zeros((n, height, width), dtype=np.float32)
+    mask = np.zeros((n, height, width), dtype=bool)
+    for i, a in enumerate(arrays):
+        batch[i, :a.shape[0], :a.shape[1]] = a
+        mask[i, :a.shape[0], :a.shape[1]] = True
+
+    count = mask.sum(axis=(1, 2))
+    brightness = batch.sum(axis=(1, 2)) / count
+    contrast = np.sqrt(np.maximum((batch ** 2).sum(axis=(1, 2)) / count - brightness ** 2, 0))
+
+    # 4-neighbour Laplacian on the interior; only where all five pixels are real
+    center = batch[:, 1:-1, 1:-1]
+    laplacian = (4 * center - batch[:, :-2, 1:-1] - batch[:, 2:, 1:-1]
+                 - batch[:, 1:-1, :-2] - batch[:, 1:-1, 2:])
+    lap_mask = (mask[:, 1:-1, 1:-1] & mask[:, :-2, 1:-1] & mask[:, 2:, 1:-1]
+                & mask[:, 1:-1, :-2] & mask[:, 1:-1, 2:])
+    laplacian = np.where(lap_mask, laplacian, 0)
+    lap_count = np.maximum(lap_mask.sum(axis=(1, 2)), 1)
+    lap_mean = laplacian.sum(axis=(1, 2)) / lap_count
+    blur = (laplacian ** 2).sum(axis=(1, 2)) / lap_count - lap_mean ** 2
+
+    return np.stack([blur, contrast, brightness], axis=1)
+
+
+def _measure_chunk(items: List[Tuple[str, str, str]]) -> List[Tuple]:
+    """
+    Process pool task: measures a chunk of (group_key, slot, path) items.
+    Unreadable images get NaN metrics.
+    """
+    loaded = []
+    rows = []
+    for key, slot, path in items:
+        try:
+            array, width, height = _load_downsampled(path)
+            if array.size == 0:
+                raise ValueError("empty image")
+            loaded.append((key, slot, array, width, height))
+        except Exception:
+            rows.append((key, slot, np.nan, np.nan, np.nan, np.nan, np.nan))
+
+    if loaded:
+        values = _batch_metrics([item[2] for item in loaded])
+        for (key, slot, _, width, height), (blur, contrast, brightness) in zip(loaded, values):
+            rows.append((key, slot, float(blur), float(contrast), float(brightness), width, height))
+
+    return rows
+
+
+@perf.cached("image_metrics", persist="disk", show_spinner=False)
+def compute_image_metrics(groups: Dict[str, Dict[str, str]], max_workers: int = 0) -> pd.DataFrame:
+    """
+    Computes quality metrics for the original and raw crop of every group.
+    Returns a table indexed by group_key with one `<slot>_<metric>` column per slot and metric.
+    """
+    items = [
+        (key, slot, group[slot])
+        for key, group in groups.items()
+        for slot in METRIC_SLOTS
+        if slot in group
+    ]
+    columns = [f"{slot}_{metric}" for slot in METRIC_SLOTS for metric in METRIC_NAMES]
+    if not items:
+        return pd.DataFrame(columns=columns)
+
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    workers = max_workers or min(len(chunks), os.cpu_count() or 1)
+
+    rows = []
+    if workers <= 1:
+        for chunk in chunks:
+            rows.extend(_measure_chunk(chunk))
+    else:
+        # spawn avoids forking the threaded Streamlit server process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            for chunk_rows in executor.map(_measure_chunk, chunks):
+                rows.extend(chunk_rows)
+
+    long = pd.DataFrame(rows, columns=["group_key", "slot"] + METRIC_NAMES)
+    wide = long.pivot(index="group_key", columns="slot", values=METRIC_NAMES)
+    wide.columns = [f"{slot}_{metric}" for metric, slot in wide.columns]
+    return wide.reindex(columns=columns)
@@ -0,0 +1,208 @@
+"""
+Compact typed storage for digit and word labels.
+
+    digit_labels[group_key]  DigitLabels: one int8 array of shape (3, n_digits) with, per position,
+                             the status code, the predicted digit and the corrected digit
+    word_labels[group_key]   {word: bool}, True where the word was detected correctly
+
+Status codes index DIGIT_STATUSES; NOT_SET (-1) marks an unlabeled position or a missing value.
+Sessions holding the earlier formats (per-position dicts or bare "True"/"False"/"Unknown"
+strings, and "True"/"False" word strings) are converted once by migrate_label_stores.
+The digits parser used to keep multi-digit tokens as positions and now skips them, so the
+migration drops positions whose prediction was such a token and moves later ones down.
+"""
+import bisect
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+
+# Label names as exported (CSV, training bundles); a status code is the index in this list
+DIGIT_STATUSES = ["True", "False", "Unknown"]
+CORRECT, INCORRECT, UNKNOWN = 0, 1, 2
+NOT_SET = -1
+
+LABEL_FORMAT_VERSION = 3
+
+# Largest valid value per row of DigitLabels.codes: status code, predicted digit, corrected digit
+_MAX_CODES = np.array([len(DIGIT_STATUSES) - 1, 9, 9])
+_CODE_NAMES = ["status code", "predicted digit", "corrected digit"]
+
+
+class DigitLabels:
+    """
+    Labels of one group's digits. Treated as immutable: updates store a new instance.
+    """
+    __slots__ = ("codes",)
+
+    def __init__(self, status: Iterable[int], predicted: Iterable[Optional[int]],
+                 corrected: Optional[Iterable[Optional[int]]] = None):
+        status = list(status)
+        # Built wide and range-checked first: int8 would silently wrap out-of-range values
+        codes = np.full((3, len(status)), NOT_SET, dtype=np.int64)
+        codes[0] = status
+        codes[1] = [NOT_SET if d is None else d for d in predicted]
+        if corrected is not None:
+            codes[2] = [NOT_SET if d is None else d for d in corrected]
+        invalid = (codes < NOT_SET) | (codes > _MAX_CODES[:, None])
+        if invalid.any():
+            row, position = np.argwhere(invalid)[0]
+            raise ValueError(f"Invalid {_CODE_NAMES[row]} {codes[row, position]} at digit position {position}: "
+                             f"expected 0-{_MAX_CODES[row]} or unset")
+        self.codes = codes.astype(np.int8)
+
+    @property
+    def status(self) -> np.ndarray:
+        return self.codes[0]
+
+    @property
+    def predicted(self) -> np.ndarray:
+        return self.codes[1]
+
+    @property
+    def corrected(self) -> np.ndarray:
+        return self.codes[2]
+
+    def __len__(self) -> int:
+        return self.codes.shape[1]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DigitLabels) and np.array_equal(self.codes, other.codes)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"DigitLabels(status={self.status.tolist()}, predicted={self.predicted.tolist()}, corrected={self.corrected.tolist()})"
+
+    def label(self, position: int) -> Optional[str]:
+        """
+        Exported label name of a position (None if unlabeled).
+        """
+        code = int(self.status[position])
+        return DIGIT_STATUSES[code] if code != NOT_SET else None
+
+    def counts(self) -> np.ndarray:
+        """
+        Number of positions per status code.
+        """
+        status = self.status
+        return np.bincount(status[status != NOT_SET], minlength=len(DIGIT_STATUSES))
+
+
+def _legacy_digit(value) -> Optional[int]:
+    """
+    A stored digit value as 0-9; None when missing or not a single digit.
+    """
+    try:
+        digit = int(value)
+    except (TypeError, ValueError):
+        return None
+    return digit if 0 <= digit <= 9 else None
+
+
+def _is_token_position(value) -> bool:
+    """
+    True for a prediction the current digits parser no longer makes a position (a multi-digit token).
+    """
+    try:
+        return int(value) > 9
+    except (TypeError, ValueError):
+        return False
+
+
+def digit_labels_from_legacy(positions: Dict[int, Any]) -> DigitLabels:
+    """
+    Converts {position: {"label", "predicted", "correct_value"}} or {position: "True"/...} dicts.
+    Positions predicted as a multi-digit token are dropped and later ones move down, as in
+    the parsed digits; other values outside 0-9 become unset.
+    """
+    dropped = sorted(int(i) for i, data in positions.items()
+                     if isinstance(data, dict) and _is_token_position(data.get("predicted")))
+    n_positions = max((int(i) for i in positions), default=-1) + 1 - len(dropped)
+    status, predicted, corrected = [NOT_SET] * n_positions, [None] * n_positions, [None] * n_positions
+    for i, data in positions.items():
+        i = int(i)
+        if i in dropped:
+            continue
+        i -= bisect.bisect_left(dropped, i)
+        label = data.get("label") if isinstance(data, dict) else data
+        status[i] = DIGIT_STATUSES.index(label) if label in DIGIT_STATUSES else NOT_SET
+        if isinstance(data, dict):
+            predicted[i] = _legacy_digit(data.get("predicted"))
+            if label == "False":
+                corrected[i] = _legacy_digit(data.get("correct_value"))
+    return DigitLabels(status, predicted, corrected)
+
+
+def _drop_token_positions(labels: DigitLabels) -> DigitLabels:
+    """
+    Removes positions of multi-digit tokens from labels stored before the parser skipped them
+    (their predictions are above 9, or negative where int8 wrapped them).
+    """
+    keep = (labels.predicted >= NOT_SET) & (labels.predicted <= 9)
+    if keep.all():
+        return labels
+    return DigitLabels(labels.status[keep], labels.predicted[keep], labels.corrected[keep])
+
+
+def _migrate_digits(value):
+    if value is None:
+        return None
+    if isinstance(value, DigitLabels):
+        return _drop_token_positions(value)
+    return digit_labels_from_legacy(value)
+
+
+def _migrate_words(value):
+    if value is None:
+        return None
+    return {word: label == "True" if isinstance(label, str) else bool(label) for word, label in value.items()}
+
+
+def migrate_label_stores(state) -> int:
+    """
+    One-time conversion of a session's digit and word labels (and their undo history) to the
+    compact format. Does nothing once the session is at LABEL_FORMAT_VERSION.
+    Returns the number of groups converted.
+    """
+    if state.get("label_format") == LABEL_FORMAT_VERSION:
+        return 0
+
+    converted = 0
+    for store_name, migrate in [("digit_labels", _migrate_digits), ("word_labels", _migrate_words)]:
+        store = state.get(store_name, {})
+        for key, value in list(store.items()):
+            store[key] = migrate(value)
+            converted += 1
+        for entry in state.get("bulk_label_history", []):
+            previous = entry["changes"].get(store_name, {})
+            for key, value in list(previous.items()):
+                previous[key] = migrate(value)
+
+    state["label_format"] = LABEL_FORMAT_VERSION
+    return converted
+
+
+def incorrect_digit_pairs(digit_labels: Dict[str, DigitLabels]) -> np.ndarray:
+    """
+    (predicted, corrected) rows of every incorrect digit with a valid correction, as an (n, 2) array.
+    """
+    if not digit_labels:
+        return np.empty((0, 2), dtype=np.int8)
+    codes = np.concatenate([labels.codes for labels in digit_labels.values()], axis=1)
+    mask = ((codes[0] == INCORRECT) & (codes[1] >= 0) & (codes[1] <= 9)
+            & (codes[2] >= 0) & (codes[2] <= 9))
+    return codes[1:, mask].T
+
+
+def has_error(digits: Optional[DigitLabels], words: Optional[Dict[str, bool]]) -> bool:
+    """
+    Whether any digit is labeled incorrect or any word is labeled wrong.
+    """
+    return bool((digits is not None and (digits.status == INCORRECT).any())
+                or (words and not all(words.values())))
+
+
+def word_label_name(correct: bool) -> str:
+    """
+    Exported label name of a word label.
+    """
+    return "True" if correct else "False"
@@ -0,0 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from math import comb
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from PIL import Image
+from utils import perf
+
+# Thumbnails are reduced to DCT_SIZE×DCT_SIZE; the hash keeps the lowest HASH_SIZE×HASH_SIZE frequencies
+DCT_SIZE = 32
+HASH_SIZE = 8
+
+# Bit count lookup for popcount on uint8 views
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _load_thumbnail(path: str) -> np.ndarray:
+    """
+    Loads an image as a DCT_SIZE×DCT_SIZE grayscale array (NaN-filled if unreadable).
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (DCT_SIZE * 4, DCT_SIZE * 4))
+            small = img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.Resampling.BILINEAR)
+            return np.asarray(small, dtype=np.float32)
+    except Exception:
+        return np.full((DCT_SIZE, DCT_SIZE), np.nan, dtype=np.float32)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """
+    Orthonormal DCT-II matrix, so that D @ X @ D.T is the 2-D DCT of X.
+    """
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """
+    Packs an (n, 64) boolean array into n uint64 hashes.
+    """
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def dct_hash(thumbnails: np.ndarray) -> np.ndarray:
+    """
+    Perceptual (DCT) hash of a (n, DCT_SIZE, DCT_SIZE) batch: low-frequency
+    coefficients thresholded at their median (DC term excluded).
+    """
+    dct = _dct_matrix(DCT_SIZE)
+    coeffs = dct @ thumbnails @ dct.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(thumbnails), -1)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(low > median)
+
+
+def average_hash(thumbnails: np.ndarray) -> np.ndarray:
+    """
+    Average hash of a (n, DCT_SIZE, DCT_SIZE) batch: HASH_SIZE×HASH_SIZE block means
+    thresholded at the image mean.
+    """
+    n = len(thumbnails)
+    block = DCT_SIZE // HASH_SIZE
+    means = thumbnails.reshape(n, HASH_SIZE, block, HASH_SIZE, block).mean(axis=(2, 4)).reshape(n, -1)
+    return _pack_bits(means > means.mean(axis=1, keepdims=True))
+
+
+def hamming_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Element-wise Hamming distance between two uint64 arrays.
+    """
+    xor = np.bitwise_xor(a.astype(np.uint64), b.astype(np.uint64))
+    return _POPCOUNT[xor.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+@perf.cached("image_hashing", persist="disk", show_spinner=False)
+def compute_image_hashes(groups: Dict[str, Dict[str, str]], method: str = "dct", max_workers: int = 16) -> pd.Series:
+    """
+    Hashes the original image (`images` slot) of every group.
+    Returns a uint64 Series indexed by group_key; unreadable images are left out.
+    """
+    keys = [key for key, group in groups.items() if "images" in group]
+    if not keys:
+        return pd.Series([], dtype=np.uint64)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        thumbnails = np.stack(list(executor.map(lambda k: _load_thumbnail(groups[k]["images"]), keys)))
+
+    valid = ~np.isnan(thumbnails).any(axis=(1, 2))
+    hash_func = average_hash if method == "average" else dct_hash
+    hashes = hash_func(thumbnails[valid])
+    return pd.Series(hashes, index=np.array(keys)[valid], dtype=np.uint64)
+
+
+# Largest Hamming radius of the near-duplicate search; beyond it the chunk index stops pruning
+# and the search degrades towards comparing all pairs
+MAX_DUPLICATE_DISTANCE = 8
+
+# Chunks up to this many bits are looked up in a table of bucket offsets instead of by binary search
+MAX_TABLE_BITS = 24
+
+
+def _flip_masks(width: int, radius: int) -> np.ndarray:
+    """
+    Every mask of at most `radius` set bits within a chunk of `width` bits (the zero mask first).
+    """
+    masks = [0]
+    for n_bits in range(1, radius + 1):
+        masks.extend(sum(1 << bit for bit in bits) for bits in combinations(range(width), n_bits))
+    return np.array(masks, dtype=np.uint64)
+
+
+def _chunk_plan(n_hashes: int, max_distance: int) -> Tuple[int, int]:
+    """
+    Number of chunks m and per-chunk probe radius floor(max_distance / m) minimising the
+    expected work on uniform hashes: probes issued plus candidate pairs that share a probed bucket.
+    """
+    def cost(m: int) -> float:
+        width, radius = 64 // m, max_distance // m
+        probes = sum(comb(width, k) for k in range(radius + 1))
+        return n_hashes * m * probes * (1 + n_hashes / 2 / 2.0 ** width)
+
+    m = min(range(1, max_distance + 2), key=cost)
+    return m, max_distance // m
+
+
+def _near_pairs(hashes: np.ndarray, max_distance: int) -> np.ndarray:
+    """
+    All index pairs (i < j) within max_distance bits, via multi-index hashing: the 64 bits
+    are split into m chunks, so two hashes within max_distance are within floor(max_distance / m)
+    bits on at least one chunk (pigeonhole). Each hash probes the sorted chunk values within
+    that radius of its own; only the pairs found that way are compared in full.
+    """
+    n = len(hashes)
+    n_chunks, radius = _chunk_plan(n, max_distance)
+    bounds = np.linspace(0, 64, n_chunks + 1).astype(int)
+    indices = np.arange(n)
+    found = []
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        width = int(stop - start)
+        chunk = (hashes >> np.uint64(start)) & np.uint64((1 << width) - 1)
+        order = np.argsort(chunk, kind="stable")
+        if width <= MAX_TABLE_BITS:
+            # Offset of every possible chunk value in sorted order: one lookup per probe
+            offsets_table = np.concatenate([[0], np.cumsum(np.bincount(chunk.astype(np.int64),
+                                                                       minlength=1 << width))])
+        else:
+            sorted_chunk = chunk[order]
+
+        for mask in _flip_masks(width, radius):
+            query = chunk ^ mask
+            if width <= MAX_TABLE_BITS:
+                low = offsets_table[query.astype(np.int64)]
+                counts = offsets_table[query.astype(np.int64) + 1] - low
+            else:
+                low = np.searchsorted(sorted_chunk, query, side="left")
+                counts = np.searchsorted(sorted_chunk, query, side="right") - low
+            if not counts.any():
+                continue
+            # Expand every query's range of matching positions into (query, partner) pairs
+            first = np.repeat(indices, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            second = order[np.repeat(low, counts) + offsets]
+            keep = first < second
+            first, second = first[keep], second[keep]
+            close = hamming_distance(hashes[first], hashes[second]) <= max_distance
+            found.append(first[close] * n + second[close])
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    codes = np.unique(np.concatenate(found))
+    return np.stack([codes // n, codes % n], axis=1)
+
+
+def _connected_components(n: int, pairs: np.ndarray) -> np.ndarray:
+    """
+    Component label of every node (the smallest node index in its component): roots are
+    hooked to the smallest neighbouring root and label chains shortened by pointer jumping,
+    each step over all pairs at once, until no pair joins two components.
+    """
+    labels = np.arange(n)
+    if not len(pairs):
+        return labels
+    while True:
+        label_a, label_b = labels[pairs[:, 0]], labels[pairs[:, 1]]
+        lowest = np.minimum(label_a, label_b)
+        hooked = labels.copy()
+        np.minimum.at(hooked, label_a, lowest)
+        np.minimum.at(hooked, label_b, lowest)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+@perf.cached("duplicate_clustering", show_spinner=False)
+def cluster_near_duplicates(hashes: pd.Series, max_distance: int = 6) -> pd.DataFrame:
+    """
+    Groups hashes within max_distance bits of each other into clusters (transitively).
+    Returns one row per group in a cluster of size > 1: group_key, cluster_id, cluster_size.
+    """
+    if not 0 <= max_distance <= MAX_DUPLICATE_DISTANCE:
+        raise ValueError(f"max_distance must be between 0 and {MAX_DUPLICATE_DISTANCE}, got {max_distance}")
+    columns = ["group_key", "cluster_id", "cluster_size"]
+    if len(hashes) < 2:
+        return pd.DataFrame(columns=columns)
+
+    values = hashes.to_numpy(dtype=np.uint64)
+    roots = _connected_components(len(values), _near_pairs(values, max_distance))
+    clusters = pd.DataFrame({"group_key": hashes.index, "cluster_id": roots})
+    clusters["cluster_size"] = clusters.groupby("cluster_id")["cluster_id"].transform("size")
+    return clusters[clusters["cluster_size"] > 1].reset_index(drop=True)
+
+
+def get_duplicates(group_key: str, hashes: pd.Series, clusters: pd.DataFrame) -> List[Tuple[str, int]]:
+    """
+    Returns the other members of group_key's cluster with their Hamming distance to it.
+    """
+    match = clusters.loc[clusters["group_key"] == group_key, "cluster_id"]
+    if match.empty:
+        return []
+
+    members = clusters.loc[(clusters["cluster_id"] == match.iloc[0]) & (clusters["group_key"] != group_key), "group_key"]
+    member_hashes = hashes.loc[members].to_numpy(dtype=np.uint64)
+    own_hash = np.full(len(member_hashes), hashes.loc[group_key], dtype=np.uint64)
+    distances = hamming_distance(own_hash, member_hashes)
+    return sorted(zip(members.tolist(), distances.tolist()), key=lambda item: item[1])
@@ -0,0 +1,197 @@
+"""
+Lightweight per-stage timing instrumentation.
+
+Stages are recorded process-wide (all sessions of the server) with a rolling window
+of recent latencies for percentiles, cumulative histogram buckets, and cache hit/miss
+counts for stages that are backed by st.cache_data.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+import numpy as np
+import streamlit as st
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf implied)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Number of recent latencies kept per stage for percentiles
+WINDOW_SIZE = 500
+
+_stages: Dict[str, Dict] = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _stage(name: str) -> Dict:
+    stats = _stages.get(name)
+    if stats is None:
+        stats = _stages.setdefault(name, {
+            "recent": deque(maxlen=WINDOW_SIZE),
+            "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+            "count": 0,
+            "sum": 0.0,
+            "hits": 0,
+            "misses": 0,
+        })
+    return stats
+
+
+def record(name: str, seconds: float, cache_hit=None):
+    """
+    Records one latency sample for a stage; cache_hit (True/False) also counts a hit or miss.
+    """
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+    with _lock:
+        stats = _stage(name)
+        stats["recent"].append(seconds)
+        stats["buckets"][bucket] += 1
+        stats["count"] += 1
+        stats["sum"] += seconds
+        if cache_hit is True:
+            stats["hits"] += 1
+        elif cache_hit is False:
+            stats["misses"] += 1
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Context manager timing the enclosed block as one sample of a stage.
+    The sample is recorded even if the block exits via st.rerun()/st.stop().
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def instrument(name: str) -> Callable:
+    """
+    Decorator timing every call of a function as a stage.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cached(name: str, **cache_kwargs) -> Callable:
+    """
+    Drop-in replacement for @st.cache_data that also times the stage and counts
+    cache hits and misses (a miss is a call where the function body actually ran).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            _local.missed = True
+            return func(*args, **kwargs)
+
+        cached_func = st.cache_data(**cache_kwargs)(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer_missed = getattr(_local, "missed", False)
+            _local.missed = False
+            start = time.perf_counter()
+            try:
+                return cached_func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start, cache_hit=not _local.missed)
+                # Restore the flag for an enclosing cached call on this thread
+                _local.missed = outer_missed
+
+        wrapper.clear = cached_func.clear
+        return wrapper
+    return decorator
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Summary per stage: count, mean and percentiles over the recent window, cache counts, buckets.
+    """
+    with _lock:
+        copies = {name: dict(stats, recent=list(stats["recent"]), buckets=list(stats["buckets"]))
+                  for name, stats in _stages.items()}
+
+    summary = {}
+    for name, stats in sorted(copies.items()):
+        recent = np.asarray(stats["recent"]) if stats["recent"] else np.zeros(1)
+        lookups = stats["hits"] + stats["misses"]
+        summary[name] = {
+            "count": stats["count"],
+            "mean_s": stats["sum"] / stats["count"] if stats["count"] else 0.0,
+            "p50_s": float(np.percentile(recent, 50)),
+            "p95_s": float(np.percentile(recent, 95)),
+            "p99_s": float(np.percentile(recent, 99)),
+            "max_s": float(recent.max()),
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
+            "cache_hit_rate": stats["hits"] / lookups if lookups else None,
+            "sum_s": stats["sum"],
+            "buckets": stats["buckets"],
+        }
+    return summary
+
+
+def reset():
+    """
+    Clears all recorded stages.
+    """
+    with _lock:
+        _stages.clear()
+
+
+def to_prometheus(summary: Dict[str, Dict]) -> str:
+    """
+    Renders a snapshot in the Prometheus text exposition format.
+    """
+    lines = [
+        "# HELP postal_stage_seconds Latency of instrumented stages",
+        "# TYPE postal_stage_seconds histogram",
+    ]
+    for name, stats in summary.items():
+        cumulative = 0
+        for bound, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], stats["buckets"]):
+            cumulative += count
+            lines.append(f'postal_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'postal_stage_seconds_sum{{stage="{name}"}} {stats["sum_s"]:.6f}')
+        lines.append(f'postal_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+    lines += [
+        "# HELP postal_cache_lookups_total Cache lookups of cached stages",
+        "# TYPE postal_cache_lookups_total counter",
+    ]
+    for name, stats in summary.items():
+        if stats["cache_hits"] or stats["cache_misses"]:
+            lines.append(f'postal_cache_lookups_total{{stage="{name}",result="hit"}} {stats["cache_hits"]}')
+            lines.append(f'postal_cache_lookups_total{{stage="{name}",result="miss"}} {stats["cache_misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(directory: str) -> Tuple[str, str]:
+    """
+    Writes the current snapshot as JSON and Prometheus text into directory.
+    Returns the two file paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    summary = snapshot()
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+
+    json_path = os.path.join(directory, f"perf_{stamp}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": stamp, "stages": summary}, f, indent=2)
+
+    prom_path = os.path.join(directory, "perf_latest.prom")
+    with open(prom_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus(summary))
+
+    return json_path, prom_path
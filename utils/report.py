@@ -0,0 +1,251 @@
+"""
+Offline analytics report of an annotation export (the CSV written by the app's export or
+utils.export_utils.build_annotation_dataframe), without running Streamlit.
+
+Computes the same numbers as the visualization dashboard (error category distribution,
+digit accuracy, digit confusion matrix, word accuracy, missed-word frequencies) with the
+aggregations of utils.analytics and writes them to one folder:
+
+    <output>/report.html        self-contained: tables inline, charts embedded as PNG
+    <output>/<chart>.png        every chart as a separate image
+    <output>/summary.json       headline numbers, for scripts and spreadsheets
+
+Usage:
+    python -m utils.report postal_annotations.csv --output reports/week_42
+"""
+import argparse
+import base64
+import html
+import io
+import json
+import os
+import time
+from typing import Dict
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from utils.analytics import (
+    count_group_labels, count_digit_labels, digit_confusion_matrix, summarize_word_labels,
+    count_missed_words_per_group, missed_word_frequencies
+)
+
+# Rows shown in the word tables
+TOP_WORDS = 30
+
+
+def load_annotation_export(path: str) -> pd.DataFrame:
+    """
+    Reads an annotation CSV with every column as text, as the app builds it.
+    """
+    return pd.read_csv(path, dtype=str)
+
+
+def summarize_annotations(df: pd.DataFrame) -> Dict:
+    """
+    All report numbers of an annotation table, each computed over the whole table at once.
+    """
+    group_labels = df["group_label"].fillna("") if "group_label" in df.columns else pd.Series("", index=df.index)
+    category_counts = count_group_labels(df)
+    digit_counts = count_digit_labels(df)
+    confusion = digit_confusion_matrix(df)
+
+    word_summary = summarize_word_labels(df)
+    per_word = (word_summary.pivot_table(index="word", columns="label", values="count", aggfunc="sum", fill_value=0)
+                .reindex(columns=["True", "False"], fill_value=0)
+                .rename(columns={"True": "correct", "False": "incorrect"}))
+    per_word["accuracy"] = per_word["correct"] / (per_word["correct"] + per_word["incorrect"])
+    per_word = per_word.sort_values(["incorrect", "correct"], ascending=[False, False])
+
+    missed_per_group = (count_missed_words_per_group(df) if "missed_words" in df.columns
+                        else pd.Series(0, index=df.index))
+
+    judged_digits = int(digit_counts.get("True", 0) + digit_counts.get("False", 0))
+    judged_words = int(per_word["correct"].sum() + per_word["incorrect"].sum())
+    return {
+        "groups": len(df),
+        "labeled_groups": int((group_labels.str.strip() != "").sum()),
+        "labels_applied": int(category_counts.sum()),
+        "category_counts": category_counts,
+        "digit_counts": digit_counts,
+        "digit_accuracy": digit_counts.get("True", 0) / judged_digits if judged_digits else None,
+        "confusion": confusion,
+        "word_accuracy": per_word["correct"].sum() / judged_words if judged_words else None,
+        "per_word": per_word,
+        "missed_per_group": missed_per_group,
+        "missed_words": missed_word_frequencies(df) if "missed_words" in df.columns
+        else pd.DataFrame(columns=["Word", "Frequency"]),
+    }
+
+
+def _category_chart(counts: pd.Series) -> Figure:
+    fig = Figure(figsize=(8, 0.5 * len(counts) + 1.5))
+    ax = fig.subplots()
+    counts = counts.sort_values()
+    ax.barh(counts.index, counts.values, color="#4c78a8")
+    ax.set_title("Error category distribution")
+    ax.set_xlabel("Groups")
+    fig.tight_layout()
+    return fig
+
+
+def _digit_chart(counts: pd.Series) -> Figure:
+    fig = Figure(figsize=(5, 4))
+    ax = fig.subplots()
+    colors = {"True": "#54a24b", "False": "#e45756", "Unknown": "#f2cf5b"}
+    ax.pie(counts.values, labels=counts.index, autopct="%1.1f%%",
+           colors=[colors.get(label, "#bab0ac") for label in counts.index])
+    ax.set_title("Digit prediction accuracy")
+    return fig
+
+
+def _confusion_chart(confusion: np.ndarray) -> Figure:
+    fig = Figure(figsize=(6, 5))
+    ax = fig.subplots()
+    image = ax.imshow(confusion, cmap="Blues")
+    for (actual, predicted), count in np.ndenumerate(confusion):
+        if count:
+            ax.text(predicted, actual, str(count), ha="center", va="center", fontsize=8,
+                    color="white" if count > confusion.max() / 2 else "black")
+    ax.set_xticks(range(10))
+    ax.set_yticks(range(10))
+    ax.set_xlabel("Predicted digit")
+    ax.set_ylabel("Actual digit")
+    ax.set_title("Confusion matrix: predicted vs actual digits")
+    fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+    return fig
+
+
+def _missed_chart(missed_per_group: pd.Series) -> Figure:
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    counts = missed_per_group.value_counts().sort_index()
+    ax.bar(counts.index, counts.values, color="#72b7b2")
+    ax.set_title("Missed words per group")
+    ax.set_xlabel("Missed words")
+    ax.set_ylabel("Groups")
+    fig.tight_layout()
+    return fig
+
+
+def _png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=110)
+    return buffer.getvalue()
+
+
+def _percent(value) -> str:
+    return "–" if value is None else f"{value:.1%}"
+
+
+def _table(frame: pd.DataFrame, **kwargs) -> str:
+    return frame.to_html(classes="table", border=0, **kwargs)
+
+
+def render_html(summary: Dict, charts: Dict[str, bytes], source: str) -> str:
+    """
+    The report page, with the charts inlined as base64 PNGs so the file stands alone.
+    """
+    def image(name: str) -> str:
+        if name not in charts:
+            return "<p class='empty'>No data.</p>"
+        data = base64.b64encode(charts[name]).decode("ascii")
+        return f"<img src='data:image/png;base64,{data}' alt='{name}'>"
+
+    headline = [
+        ("Groups", summary["groups"]),
+        ("Labeled groups", summary["labeled_groups"]),
+        ("Labels applied", summary["labels_applied"]),
+        ("Digit accuracy", _percent(summary["digit_accuracy"])),
+        ("Word accuracy", _percent(summary["word_accuracy"])),
+        ("Missed words", int(summary["missed_per_group"].sum())),
+    ]
+    per_word = summary["per_word"].head(TOP_WORDS).copy()
+    per_word["accuracy"] = per_word["accuracy"].map(_percent)
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Postal annotation report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem; color: #222; }}
+.cards {{ display: flex; flex-wrap: wrap; gap: 1rem; }}
+.card {{ border: 1px solid #ddd; border-radius: 0.5rem; padding: 0.75rem 1.25rem; }}
+.card b {{ display: block; font-size: 1.5rem; }}
+.row {{ display: flex; flex-wrap: wrap; gap: 2rem; align-items: flex-start; }}
+.table {{ border-collapse: collapse; }}
+.table td, .table th {{ padding: 0.25rem 0.75rem; border-bottom: 1px solid #eee; text-align: right; }}
+.empty {{ color: #888; }}
+</style></head><body>
+<h1>📬 Postal annotation report</h1>
+<p>Source: <code>{html.escape(source)}</code> · generated {time.strftime("%Y-%m-%d %H:%M:%S")}</p>
+<div class="cards">{"".join(f"<div class='card'>{label}<b>{value}</b></div>" for label, value in headline)}</div>
+<h2>📌 Error categories</h2>
+<div class="row">{image("categories")}{_table(summary["category_counts"].rename("groups").to_frame())}</div>
+<h2>🔢 Digits</h2>
+<div class="row">{image("digit_accuracy")}{image("confusion_matrix")}</div>
+<h2>📝 Words</h2>
+<p>Words with the most incorrect labels (top {TOP_WORDS}):</p>
+{_table(per_word) if not per_word.empty else "<p class='empty'>No word labels.</p>"}
+<h2>❌ Missed words</h2>
+<div class="row">{image("missed_per_group")}
+{_table(summary["missed_words"].head(TOP_WORDS), index=False) if not summary["missed_words"].empty
+ else "<p class='empty'>No missed words.</p>"}</div>
+</body></html>
+"""
+
+
+def write_report(source: str, output_dir: str) -> Dict:
+    """
+    Builds the report of an annotation CSV into output_dir. Returns the headline numbers.
+    """
+    start = time.perf_counter()
+    summary = summarize_annotations(load_annotation_export(source))
+
+    figures = {}
+    if not summary["category_counts"].empty:
+        figures["categories"] = _category_chart(summary["category_counts"])
+    if not summary["digit_counts"].empty:
+        figures["digit_accuracy"] = _digit_chart(summary["digit_counts"])
+    if summary["confusion"].any():
+        figures["confusion_matrix"] = _confusion_chart(summary["confusion"])
+    if summary["missed_per_group"].any():
+        figures["missed_per_group"] = _missed_chart(summary["missed_per_group"])
+    charts = {name: _png(fig) for name, fig in figures.items()}
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, data in charts.items():
+        with open(os.path.join(output_dir, f"{name}.png"), "wb") as f:
+            f.write(data)
+    with open(os.path.join(output_dir, "report.html"), "w", encoding="utf-8") as f:
+        f.write(render_html(summary, charts, os.path.basename(source)))
+
+    headline = {
+        "source": os.path.basename(source),
+        "groups": summary["groups"],
+        "labeled_groups": summary["labeled_groups"],
+        "labels_applied": summary["labels_applied"],
+        "category_counts": summary["category_counts"].to_dict(),
+        "digit_counts": summary["digit_counts"].to_dict(),
+        "digit_accuracy": summary["digit_accuracy"],
+        "word_accuracy": summary["word_accuracy"],
+        "missed_words": int(summary["missed_per_group"].sum()),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(headline, f, indent=2, ensure_ascii=False, default=int)
+    return headline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write an offline analytics report of an annotation export.")
+    parser.add_argument("source", help="Annotation CSV exported from the app")
+    parser.add_argument("--output", default="report", help="Output folder (default: ./report)")
+    args = parser.parse_args()
+
+    headline = write_report(args.source, args.output)
+    print(f"Wrote {os.path.join(args.output, 'report.html')}: {headline['groups']} groups, "
+          f"digit accuracy {_percent(headline['digit_accuracy'])}, "
+          f"word accuracy {_percent(headline['word_accuracy'])} in {headline['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
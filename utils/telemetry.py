@@ -0,0 +1,181 @@
+"""
+Annotation telemetry: timestamped events per session, appended to a local JSON Lines log
+in POSTAL_TELEMETRY_DIR (default "telemetry"), one file per day:
+
+    {"ts": 1760857200.123, "session": "…", "annotator": "sara", "event": "navigate", "group": "cam0_pkg003"}
+
+Events:
+    navigate     the session moved to another group ("from": the previous group)
+    image_ready  the group's images were rendered; "ms" since the interaction that led there
+    submit       labels of the group were saved ("form": categories/digits/words/rapid)
+    rerun        one interaction's script runs finished; "ms" is the time the annotator waited
+
+Writing is one line per event through a process-wide append handle, well under a
+millisecond per event. Set POSTAL_TELEMETRY=0 to turn it off.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.bulk_labeling import session_token
+
+TELEMETRY_DIR = os.environ.get("POSTAL_TELEMETRY_DIR", "telemetry")
+TELEMETRY_ENABLED = os.environ.get("POSTAL_TELEMETRY", "1") != "0"
+
+# Longer gaps between two events of a session count as a break, not as time on the group
+IDLE_GAP_SECONDS = 300
+
+# A run cut short by st.rerun() hands its start to the next run, unless it is older than this
+MAX_CHAINED_SECONDS = 30
+
+EVENT_COLUMNS = ["ts", "session", "annotator", "event", "group", "ms", "form"]
+
+_lock = threading.Lock()
+_log = {"path": None, "file": None}
+
+
+def _write(line: str):
+    path = os.path.join(TELEMETRY_DIR, f"events_{time.strftime('%Y%m%d')}.jsonl")
+    with _lock:
+        if _log["path"] != path:
+            if _log["file"] is not None:
+                _log["file"].close()
+            os.makedirs(TELEMETRY_DIR, exist_ok=True)
+            _log["file"] = open(path, "a", encoding="utf-8", buffering=1)
+            _log["path"] = path
+        _log["file"].write(line)
+
+
+def log_event(event: str, group_key: Optional[str] = None, seconds: Optional[float] = None, **fields):
+    """
+    Appends one event of the current session. Never raises: a log that cannot be
+    written turns telemetry off for the process.
+    """
+    global TELEMETRY_ENABLED
+    if not TELEMETRY_ENABLED:
+        return
+    record = {"ts": round(time.time(), 3), "session": session_token(),
+              "annotator": st.session_state.get("annotator", ""), "event": event}
+    if group_key is not None:
+        record["group"] = group_key
+    if seconds is not None:
+        record["ms"] = round(seconds * 1000, 1)
+    record.update(fields)
+    try:
+        _write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError:
+        TELEMETRY_ENABLED = False
+
+
+def begin_rerun() -> float:
+    """
+    Called at the top of the script: returns when the current interaction started.
+    Runs that ended in st.rerun() never reach end_rerun, so their start carries over.
+    """
+    now = time.time()
+    started = st.session_state.get("telemetry_run_start")
+    if started is None or now - started > MAX_CHAINED_SECONDS:
+        started = st.session_state["telemetry_run_start"] = now
+    return started
+
+
+def observe_group(group_key: str) -> bool:
+    """
+    Logs a navigate event when the session shows a different group than in its last run.
+    Returns True if it did, i.e. the group's images are about to be loaded for the first time.
+    """
+    previous = st.session_state.get("telemetry_group")
+    if previous == group_key:
+        return False
+    st.session_state["telemetry_group"] = group_key
+    log_event("navigate", group_key, **({"from": previous} if previous else {}))
+    return True
+
+
+def observe_image_ready(group_key: str, interaction_start: float):
+    log_event("image_ready", group_key, time.time() - interaction_start)
+
+
+def end_rerun():
+    """
+    Called at the end of the script: logs how long the annotator waited for this interaction.
+    """
+    started = st.session_state.pop("telemetry_run_start", None)
+    if started is not None:
+        log_event("rerun", st.session_state.get("telemetry_group"), time.time() - started)
+
+
+def load_events(directory: str = TELEMETRY_DIR, days: Optional[int] = None) -> pd.DataFrame:
+    """
+    All logged events (optionally only the last `days` daily files) as one frame.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "events_*.jsonl")))
+    if days is not None:
+        paths = paths[-days:]
+    frames = [pd.read_json(path, lines=True, dtype=False) for path in paths if os.path.getsize(path)]
+    if not frames:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    events = pd.concat(frames, ignore_index=True).reindex(columns=EVENT_COLUMNS)
+    events["annotator"] = events["annotator"].fillna("").astype(str)
+    return events
+
+
+def summarize_events(events: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Time on group, wait and think time from the event log, all with grouped array operations.
+    Each navigate event starts a visit; a visit lasts until the session's next visit, with gaps
+    over IDLE_GAP_SECONDS left out. Wait time is the rerun time within the visit, think time the rest.
+    Returns "visits" (one row per visit) and "annotators" (one row per annotator, unnamed
+    sessions by session id): groups per hour, median time to first image, wait and think time.
+    """
+    if events.empty:
+        return {"visits": pd.DataFrame(), "annotators": pd.DataFrame()}
+
+    events = events.sort_values(["session", "ts"], kind="stable", ignore_index=True)
+    session = events["session"]
+    gap = events.groupby("session")["ts"].shift(-1) - events["ts"]
+    events["active_s"] = gap.where(gap <= IDLE_GAP_SECONDS, 0).fillna(0)
+    events["wait_s"] = np.where(events["event"] == "rerun", events["ms"].fillna(0) / 1000, 0)
+    events["image_s"] = np.where(events["event"] == "image_ready", events["ms"] / 1000, np.nan)
+    events["submitted"] = events["event"] == "submit"
+    events["visit"] = (events["event"] == "navigate").groupby(session).cumsum()
+    events["annotator"] = events["annotator"].where(events["annotator"] != "", "session " + session.str[:8])
+
+    # Events before a session's first navigate (loading the dataset) are not part of a visit
+    in_visit = events[events["visit"] > 0]
+    visits = in_visit.groupby(["session", "visit"]).agg(
+        annotator=("annotator", "first"),
+        group=("group", "first"),
+        start=("ts", "first"),
+        time_on_group_s=("active_s", "sum"),
+        wait_s=("wait_s", "sum"),
+        time_to_image_s=("image_s", "first"),
+        submits=("submitted", "sum"),
+    ).reset_index()
+    visits["wait_s"] = np.minimum(visits["wait_s"], visits["time_on_group_s"])
+    visits["think_s"] = visits["time_on_group_s"] - visits["wait_s"]
+
+    labeled = visits[visits["submits"] > 0]
+    annotators = visits.groupby("annotator").agg(
+        sessions=("session", "nunique"),
+        groups_visited=("group", "nunique"),
+        active_hours=("time_on_group_s", lambda s: s.sum() / 3600),
+        median_time_on_group_s=("time_on_group_s", "median"),
+        median_time_to_image_s=("time_to_image_s", "median"),
+        wait_s=("wait_s", "sum"),
+        think_s=("think_s", "sum"),
+    )
+    annotators["groups_labeled"] = labeled.groupby("annotator")["group"].nunique().reindex(annotators.index,
+                                                                                              fill_value=0)
+    annotators["groups_per_hour"] = (annotators["groups_labeled"]
+                                     / annotators["active_hours"].where(annotators["active_hours"] > 0))
+    annotators["wait_share"] = (annotators["wait_s"]
+                                / (annotators["wait_s"] + annotators["think_s"]).where(lambda t: t > 0))
+    columns: List[str] = ["sessions", "groups_visited", "groups_labeled", "active_hours", "groups_per_hour",
+                          "median_time_on_group_s", "median_time_to_image_s", "wait_s", "think_s", "wait_share"]
+    return {"visits": visits, "annotators": annotators[columns].reset_index()}
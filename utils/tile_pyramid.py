@@ -0,0 +1,120 @@
+import os
+import math
+import hashlib
+import threading
+from typing import Dict, Tuple
+from PIL import Image
+
+# Edge length of the square tiles (the last row/column of a level may be smaller)
+TILE_SIZE = 256
+
+TILE_QUALITY = 85
+
+# One lock per pyramid level, so concurrent sessions never build the same level twice
+_build_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _image_cache_key(image_path: str) -> str:
+    """
+    Cache key for an image: path plus size and mtime, so replaced files get a new pyramid.
+    """
+    stat = os.stat(image_path)
+    return hashlib.sha1(f"{os.path.abspath(image_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+
+
+def pyramid_info(image_path: str) -> Dict:
+    """
+    Full-resolution size and number of levels of an image's pyramid (header-only read).
+    Level 0 is full resolution; every next level halves the size, down to a single tile.
+    """
+    with Image.open(image_path) as img:
+        width, height = img.size
+    levels = 1 + max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE)))
+    return {"width": width, "height": height, "levels": levels}
+
+
+def level_size(info: Dict, level: int) -> Tuple[int, int]:
+    scale = 2 ** level
+    return max(1, math.ceil(info["width"] / scale)), max(1, math.ceil(info["height"] / scale))
+
+
+def _build_level(image_path: str, info: Dict, level: int, level_dir: str):
+    """
+    Decodes the image once at the level's scale and writes all of the level's tiles.
+    For JPEGs, draft() makes the decoder downscale, so coarse levels never decode full resolution.
+    """
+    width, height = level_size(info, level)
+    with Image.open(image_path) as img:
+        img.draft("RGB", (width, height))
+        level_img = img.convert("RGB")
+    if level_img.size != (width, height):
+        level_img = level_img.resize((width, height), Image.Resampling.LANCZOS)
+
+    os.makedirs(level_dir, exist_ok=True)
+    for row in range(math.ceil(height / TILE_SIZE)):
+        for col in range(math.ceil(width / TILE_SIZE)):
+            box = (col * TILE_SIZE, row * TILE_SIZE,
+                   min((col + 1) * TILE_SIZE, width), min((row + 1) * TILE_SIZE, height))
+            tile_path = os.path.join(level_dir, f"{col}_{row}.jpg")
+            level_img.crop(box).save(tile_path + ".tmp", "JPEG", quality=TILE_QUALITY)
+            os.replace(tile_path + ".tmp", tile_path)
+
+    # Written last: a level without the marker is rebuilt
+    open(os.path.join(level_dir, ".complete"), "w").close()
+
+
+def get_level_dir(image_path: str, info: Dict, level: int, cache_dir: str) -> Tuple[str, bool]:
+    """
+    Returns the tile directory of a level, building the level on first use.
+    The flag tells whether the level had to be built.
+    """
+    level_dir = os.path.join(cache_dir, _image_cache_key(image_path), str(level))
+    if os.path.exists(os.path.join(level_dir, ".complete")):
+        return level_dir, False
+
+    with _locks_guard:
+        lock = _build_locks.setdefault(level_dir, threading.Lock())
+    with lock:
+        if os.path.exists(os.path.join(level_dir, ".complete")):
+            return level_dir, False
+        _build_level(image_path, info, level, level_dir)
+    return level_dir, True
+
+
+def render_viewport(image_path: str, cache_dir: str, level: int, center_x: float, center_y: float,
+                    view_width: int, view_height: int) -> Tuple[Image.Image, Dict]:
+    """
+    Renders the part of a pyramid level centred on (center_x, center_y), given as 0..1
+    fractions of the image, from only the tiles that intersect the viewport.
+    Returns the view and a dict with its position and the number of tiles read.
+    """
+    info = pyramid_info(image_path)
+    level = min(max(level, 0), info["levels"] - 1)
+    width, height = level_size(info, level)
+    view_width, view_height = min(view_width, width), min(view_height, height)
+
+    left = int(min(max(center_x * width - view_width / 2, 0), width - view_width))
+    top = int(min(max(center_y * height - view_height / 2, 0), height - view_height))
+    first_col, last_col = left // TILE_SIZE, (left + view_width - 1) // TILE_SIZE
+    first_row, last_row = top // TILE_SIZE, (top + view_height - 1) // TILE_SIZE
+
+    level_dir, built = get_level_dir(image_path, info, level, cache_dir)
+    canvas = Image.new("RGB", ((last_col - first_col + 1) * TILE_SIZE, (last_row - first_row + 1) * TILE_SIZE))
+    for row in range(first_row, last_row + 1):
+        for col in range(first_col, last_col + 1):
+            with Image.open(os.path.join(level_dir, f"{col}_{row}.jpg")) as tile:
+                canvas.paste(tile, ((col - first_col) * TILE_SIZE, (row - first_row) * TILE_SIZE))
+
+    offset_x, offset_y = left - first_col * TILE_SIZE, top - first_row * TILE_SIZE
+    view = canvas.crop((offset_x, offset_y, offset_x + view_width, offset_y + view_height))
+    return view, {
+        "level": level,
+        "scale": 1 / 2 ** level,
+        "left": left,
+        "top": top,
+        "level_width": width,
+        "level_height": height,
+        "tiles_read": (last_col - first_col + 1) * (last_row - first_row + 1),
+        "level_built": built,
+    }
@@ -0,0 +1,204 @@
+"""
+Training-dataset export: crops plus JSON records, packed into ZIP or WebDataset-style tar shards.
+
+Every exported group becomes one sample. In each shard the sample's files share its key:
+
+    <key>.postcode_raw.jpg
+    <key>.postcode_preprocessed.jpg
+    <key>.receiver_raw.jpg
+    <key>.receiver_preprocessed.jpg
+    <key>.json                      the sample's record
+
+Next to each shard, output_dir gets <shard>.jsonl holding all records of the shard, one per
+line. It is a separate file because WebDataset groups tar members by basename, so a manifest
+inside the tar would be read as an extra sample.
+Image files are read by a thread pool while a single writer streams the shards, with a
+bounded number of samples in flight, so memory does not grow with the export size.
+"""
+import io
+import os
+import json
+import time
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.bulk_labeling import as_label_list
+from utils.file_utils import parse_digits_from_file, parse_words_from_file
+from utils.label_store import DigitLabels, NOT_SET, word_label_name
+
+# Image slots packed into every sample
+CROP_SLOTS = ["postcode_raw", "postcode_preprocessed", "receiver_raw", "receiver_preprocessed"]
+
+EXPORT_FORMATS = ["tar", "zip"]
+
+DEFAULT_SAMPLES_PER_SHARD = 1000
+DEFAULT_MAX_SHARD_MB = 1024
+
+
+def _sample_key(group_key: str) -> str:
+    # WebDataset splits member names at the first dot: keys must not contain one
+    return group_key.replace(".", "_")
+
+
+def _digit_record(predicted: Optional[List[int]], digit_data: Optional[DigitLabels]) -> Dict:
+    """
+    Per-position digit labels and the corrected sequence (None at positions marked Unknown).
+    """
+    predicted = predicted or []
+    labels, corrected = [], []
+    for i, digit in enumerate(predicted):
+        label = digit_data.label(i) if digit_data is not None and i < len(digit_data) else None
+        labels.append(label)
+        if label == "False":
+            value = int(digit_data.corrected[i])
+            corrected.append(value if value != NOT_SET else None)
+        elif label == "Unknown":
+            corrected.append(None)
+        else:
+            corrected.append(digit)
+    return {"predicted": predicted, "labels": labels, "corrected": corrected}
+
+
+def build_training_record(group_key: str, group: Dict[str, str], group_labels: Dict[str, Any],
+                          digit_labels: Dict[str, Any], word_labels: Dict[str, Any],
+                          missed_words: Dict[str, Any]) -> Dict:
+    """
+    JSON record of one group: OCR predictions, annotator corrections and group labels.
+    """
+    digits = parse_digits_from_file(group["digits"]) if "digits" in group else None
+    words = parse_words_from_file(group["words"]) if "words" in group else None
+    return {
+        "key": _sample_key(group_key),
+        "group_key": group_key,
+        "group_labels": as_label_list(group_labels.get(group_key, [])),
+        "digits": _digit_record(digits, digit_labels.get(group_key)),
+        "words": {
+            "predicted": words or [],
+            "labels": {word: word_label_name(correct) for word, correct in word_labels.get(group_key, {}).items()},
+            "missed": list(missed_words.get(group_key, [])),
+        },
+        "files": {},
+    }
+
+
+def _read_sample(record: Dict, group: Dict[str, str]) -> Tuple[Dict, List[Tuple[str, bytes]]]:
+    """
+    Thread pool task: reads the crops of one sample and serializes its record.
+    """
+    members = []
+    for slot in CROP_SLOTS:
+        if slot not in group:
+            continue
+        extension = os.path.splitext(group[slot])[1].lower() or ".jpg"
+        name = f"{record['key']}.{slot}{extension}"
+        try:
+            with open(group[slot], "rb") as f:
+                members.append((name, f.read()))
+            record["files"][slot] = name
+        except OSError:
+            continue
+    members.append((f"{record['key']}.json", json.dumps(record, ensure_ascii=False).encode("utf-8")))
+    return record, members
+
+
+def _write_member(archive, name: str, data: bytes):
+    if isinstance(archive, tarfile.TarFile):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        archive.addfile(info, io.BytesIO(data))
+    else:
+        archive.writestr(name, data)
+
+
+def export_training_bundle(
+    groups: Dict[str, Dict[str, str]],
+    keys: List[str],
+    group_labels: Dict[str, Any],
+    digit_labels: Dict[str, Any],
+    word_labels: Dict[str, Any],
+    missed_words: Dict[str, Any],
+    output_dir: str,
+    export_format: str = "tar",
+    samples_per_shard: int = DEFAULT_SAMPLES_PER_SHARD,
+    max_shard_mb: float = DEFAULT_MAX_SHARD_MB,
+    max_workers: int = 8,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Writes the given groups as training shards into output_dir.
+    A shard is closed when it reaches samples_per_shard samples or max_shard_mb megabytes.
+    Returns a summary with the shard and manifest paths, sample count and total shard size.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    max_shard_bytes = max_shard_mb * 1024 * 1024
+
+    shards: List[str] = []
+    manifests: List[str] = []
+    archive = None
+    shard_records: List[Dict] = []
+    shard_bytes = 0
+
+    def close_shard():
+        if archive is None:
+            return
+        archive.close()
+        manifest = os.path.splitext(shards[-1])[0] + ".jsonl"
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in shard_records)
+        manifests.append(manifest)
+
+    def open_shard():
+        path = os.path.join(output_dir, f"train-{len(shards):06d}.{export_format}")
+        shards.append(path)
+        if export_format == "tar":
+            return tarfile.open(path, "w")
+        # Crops are already compressed images: store them as they are
+        return zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    key_iter = iter(keys)
+    in_flight = deque()
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit_next():
+            key = next(key_iter, None)
+            if key is not None:
+                record = build_training_record(key, groups[key], group_labels, digit_labels, word_labels, missed_words)
+                in_flight.append(executor.submit(_read_sample, record, groups[key]))
+
+        # At most two samples per worker are held in memory at any time
+        for _ in range(max_workers * 2):
+            submit_next()
+
+        while in_flight:
+            record, members = in_flight.popleft().result()
+            submit_next()
+
+            size = sum(len(data) for _, data in members)
+            if (archive is None or len(shard_records) >= samples_per_shard
+                    or (shard_records and shard_bytes + size > max_shard_bytes)):
+                close_shard()
+                archive = open_shard()
+                shard_records, shard_bytes = [], 0
+
+            for name, data in members:
+                _write_member(archive, name, data)
+            shard_records.append(record)
+            shard_bytes += size
+
+            done += 1
+            if on_progress:
+                on_progress(done, len(keys))
+
+    close_shard()
+    return {
+        "shards": shards,
+        "manifests": manifests,
+        "samples": done,
+        "total_mb": sum(os.path.getsize(path) for path in shards) / (1024 * 1024),
+    }
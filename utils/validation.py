@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+import pandas as pd
+from utils import perf
+from utils.file_utils import (
+    SLOT_SUFFIXES, DIGITS_PATTERN, WORDS_PATTERN, normalize_key_from_filename
+)
+
+IMAGE_SLOTS = ["images", "postcode_raw", "postcode_preprocessed", "receiver_raw", "receiver_preprocessed"]
+
+# Human-readable descriptions of every issue the validator can report
+ISSUE_TYPES = {
+    "incomplete_group": "Group is missing one or more slots",
+    "orphan_file": "File has no matching original image",
+    "duplicate_key": "Several files in one folder map to the same group key",
+    "unexpected_name": "Filename does not end with the suffix expected for its folder",
+    "unparseable_digits": "Digits file has no 'Extracted Digits: [...]' line",
+    "unparseable_words": "Words file has no 'Individual Words:' line",
+    "zero_byte_image": "Image file is empty",
+    "corrupt_image": "Image header cannot be read",
+}
+
+REPORT_COLUMNS = ["issue", "group_key", "slot", "path", "detail"]
+
+
+def _check_file(slot: str, path: str) -> Optional[Tuple[str, str]]:
+    """
+    Checks a single file. Images are opened header-only; text files are matched
+    against the parser pattern. Returns (issue, detail) or None if the file is fine.
+    """
+    try:
+        if slot in IMAGE_SLOTS:
+            if os.path.getsize(path) == 0:
+                return "zero_byte_image", "0 bytes"
+            # Image.open only parses the header; pixel data is not decoded
+            with Image.open(path) as img:
+                width, height = img.size
+            if width == 0 or height == 0:
+                return "corrupt_image", f"invalid size {width}×{height}"
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            pattern = DIGITS_PATTERN if slot == "digits" else WORDS_PATTERN
+            if not pattern.search(text):
+                return f"unparseable_{slot}", "empty file" if not text.strip() else "pattern not found"
+    except Exception as e:
+        if slot in IMAGE_SLOTS:
+            return "corrupt_image", str(e)[:200]
+        return f"unparseable_{slot}", str(e)[:200]
+    return None
+
+
+@perf.cached("validation", persist="disk", show_spinner=False)
+def validate_dataset(file_dict: Dict[str, List[str]], max_workers: int = 16) -> pd.DataFrame:
+    """
+    Validates the whole file index in one pass and returns a report with one row per issue.
+    File contents are checked concurrently; results are cached on disk.
+    """
+    rows = []
+    slots_by_key: Dict[str, Dict[str, str]] = {}
+    to_check = []
+
+    for slot, paths in file_dict.items():
+        suffix = SLOT_SUFFIXES.get(slot, "")
+        for path in paths:
+            key = normalize_key_from_filename(path)
+            stem = Path(path).stem
+
+            if suffix and not stem.endswith(suffix):
+                rows.append(("unexpected_name", key, slot, path, f"expected suffix '{suffix}'"))
+
+            group = slots_by_key.setdefault(key, {})
+            if slot in group:
+                rows.append(("duplicate_key", key, slot, path, f"also {os.path.basename(group[slot])}"))
+            else:
+                group[slot] = path
+
+            if slot in IMAGE_SLOTS or slot in ("digits", "words"):
+                to_check.append((key, slot, path))
+
+    # Header-only image reads and text parsing are I/O bound: run them in a thread pool
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda item: _check_file(item[1], item[2]), to_check)
+        for (key, slot, path), result in zip(to_check, results):
+            if result:
+                issue, detail = result
+                rows.append((issue, key, slot, path, detail))
+
+    all_slots = list(file_dict.keys())
+    for key, group in slots_by_key.items():
+        if "images" not in group:
+            for slot, path in group.items():
+                rows.append(("orphan_file", key, slot, path, "no original image"))
+            continue
+        missing = [slot for slot in all_slots if slot not in group]
+        if missing:
+            rows.append(("incomplete_group", key, "", "", "missing: " + ", ".join(missing)))
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    return report.sort_values(["issue", "group_key"], ignore_index=True)
@@ -0,0 +1,80 @@
+"""
+Comparison of two OCR output versions of the same images, e.g. a registered dataset and
+a re-run of the pipeline with new models ingested under another name.
+
+The two OCR stores are joined on group_key and every group's digits and words are reduced to
+one canonical string per version, so change detection is a single array comparison.
+No Streamlit dependency, so it can also run headless.
+"""
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+# Stands for a missing digits/words file, so it never equals an empty output
+_MISSING = "\x00"
+_WORD_SEPARATOR = "\x1f"
+
+COMPARISON_COLUMNS = ["baseline_digits", "candidate_digits", "baseline_words", "candidate_words",
+                      "digits_changed", "words_changed", "changed"]
+
+# Label stores that describe a group's OCR output, by the output they depend on
+DIGIT_STORES = ["digit_labels"]
+WORD_STORES = ["word_labels", "missed_words"]
+
+
+def _canonical(values: pd.Series, separator: str) -> np.ndarray:
+    return np.array(
+        [_MISSING if v is None else separator.join(str(item) for item in v) for v in values],
+        dtype=object,
+    )
+
+
+def compare_ocr_outputs(baseline: pd.DataFrame, candidate: pd.DataFrame) -> pd.DataFrame:
+    """
+    Joins two OCR stores (group_key index, "digits" and "words" list columns) on their shared
+    groups, in candidate order. One row per shared group with both versions' outputs and
+    whether the digits, the words or either of them changed.
+    """
+    joined = candidate[["digits", "words"]].join(baseline[["digits", "words"]], how="inner",
+                                                 lsuffix="_candidate", rsuffix="_baseline")
+    digits_changed = (_canonical(joined["digits_baseline"], "")
+                      != _canonical(joined["digits_candidate"], ""))
+    words_changed = (_canonical(joined["words_baseline"], _WORD_SEPARATOR)
+                     != _canonical(joined["words_candidate"], _WORD_SEPARATOR))
+    comparison = pd.DataFrame({
+        "baseline_digits": joined["digits_baseline"],
+        "candidate_digits": joined["digits_candidate"],
+        "baseline_words": joined["words_baseline"],
+        "candidate_words": joined["words_candidate"],
+        "digits_changed": digits_changed.astype(bool),
+        "words_changed": words_changed.astype(bool),
+    }, index=joined.index)
+    comparison["changed"] = comparison["digits_changed"] | comparison["words_changed"]
+    return comparison[COMPARISON_COLUMNS]
+
+
+def stale_label_updates(comparison: pd.DataFrame,
+                        stores: Dict[str, Dict[str, object]]) -> Dict[str, Dict[str, Optional[object]]]:
+    """
+    Deletions (for utils.bulk_labeling.apply_label_updates) of the labels that no longer match
+    the candidate output: digit labels of groups whose digits changed, word labels and missed
+    words of groups whose words changed, and group labels of every changed group.
+    Labels of unchanged groups carry over untouched.
+    """
+    changed_keys = {
+        "digits": comparison.index[comparison["digits_changed"].to_numpy()],
+        "words": comparison.index[comparison["words_changed"].to_numpy()],
+        "any": comparison.index[comparison["changed"].to_numpy()],
+    }
+    affected: Dict[str, Iterable[str]] = {name: changed_keys["digits"] for name in DIGIT_STORES}
+    affected.update({name: changed_keys["words"] for name in WORD_STORES})
+    affected["group_labels"] = changed_keys["any"]
+
+    updates = {}
+    for store_name, keys in affected.items():
+        store = stores.get(store_name, {})
+        # Empty category lists are written for every group shown, not by labeling it
+        stale = {key: None for key in keys if key in store and (store_name != "group_labels" or store[key])}
+        if stale:
+            updates[store_name] = stale
+    return updates
@@ -0,0 +1,158 @@
+"""
+Alignment of incorrectly detected words with the missed words annotators typed in.
+
+Within each group, every word labeled incorrect is paired with every missed word; edit
+distances for all pairs of the whole dataset are computed in one batched dynamic program
+(vectorized over pairs). Each incorrect word is then matched to its closest missed word, and
+matches close enough to be near misses are backtraced, again for all pairs at once, into
+character substitutions, insertions and deletions.
+No Streamlit dependency, so it can also run headless.
+"""
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+# Pairs whose distance is at most this fraction of the longer word count as near misses
+MAX_NORMALIZED_DISTANCE = 0.5
+
+# Shown in place of the missing side of an insertion or deletion
+GAP = "∅"
+
+PAIR_COLUMNS = ["group_key", "predicted", "actual", "distance", "normalized_distance"]
+CONFUSION_COLUMNS = ["predicted", "actual", "count"]
+
+
+def _encode(words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Words as a zero-padded (n, max_len) array of code points, plus their lengths.
+    """
+    lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    codes = np.zeros((len(words), max(int(lengths.max(initial=0)), 1)), dtype=np.int32)
+    for i, word in enumerate(words):
+        codes[i, :len(word)] = [ord(c) for c in word]
+    return codes, lengths
+
+
+def _edit_distances(a: np.ndarray, b: np.ndarray, a_lengths: np.ndarray, b_lengths: np.ndarray) -> np.ndarray:
+    """
+    Levenshtein distance of every pair (a[k], b[k]), vectorized over pairs.
+    Only two DP rows are kept, so memory grows with the number of pairs, not with word length squared.
+    Padding never affects a pair's own distance, read at row a_lengths[k], column b_lengths[k].
+    """
+    n_pairs, len_a = a.shape
+    len_b = b.shape[1]
+    rows = np.arange(n_pairs)
+    previous = np.tile(np.arange(len_b + 1, dtype=np.int32), (n_pairs, 1))
+    distances = previous[rows, b_lengths].copy()
+    for i in range(1, len_a + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        for j in range(1, len_b + 1):
+            substitution = previous[:, j - 1] + (a[:, i - 1] != b[:, j - 1])
+            current[:, j] = np.minimum(substitution, np.minimum(previous[:, j], current[:, j - 1]) + 1)
+        finished = a_lengths == i
+        distances[finished] = current[finished, b_lengths[finished]]
+        previous = current
+    return distances
+
+
+def _edit_distance_tables(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Full Levenshtein DP tables for all pairs (a[k], b[k]) at once, for backtracing:
+    shape (n_pairs, len_a + 1, len_b + 1).
+    """
+    n_pairs, len_a = a.shape
+    len_b = b.shape[1]
+    table = np.empty((n_pairs, len_a + 1, len_b + 1), dtype=np.int32)
+    table[:, :, 0] = np.arange(len_a + 1)
+    table[:, 0, :] = np.arange(len_b + 1)
+    for i in range(1, len_a + 1):
+        for j in range(1, len_b + 1):
+            substitution = table[:, i - 1, j - 1] + (a[:, i - 1] != b[:, j - 1])
+            table[:, i, j] = np.minimum(substitution,
+                                        np.minimum(table[:, i - 1, j], table[:, i, j - 1]) + 1)
+    return table
+
+
+def _backtrace(table: np.ndarray, a: np.ndarray, b: np.ndarray,
+               a_lengths: np.ndarray, b_lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Walks all tables back from each pair's corner at once and returns the (predicted, actual)
+    code points of every edit operation (0 on the missing side of an insertion or deletion).
+    """
+    rows = np.arange(len(a))
+    i, j = a_lengths.copy(), b_lengths.copy()
+    predicted, actual = [], []
+    while True:
+        active = (i > 0) | (j > 0)
+        if not active.any():
+            break
+        current = table[rows, i, j]
+        a_char = a[rows, np.maximum(i - 1, 0)]
+        b_char = b[rows, np.maximum(j - 1, 0)]
+        diagonal = active & (i > 0) & (j > 0) & (
+            current == table[rows, np.maximum(i - 1, 0), np.maximum(j - 1, 0)] + (a_char != b_char))
+        deletion = active & ~diagonal & (i > 0) & (current == table[rows, np.maximum(i - 1, 0), j] + 1)
+        insertion = active & ~diagonal & ~deletion
+
+        substituted = diagonal & (a_char != b_char)
+        predicted.append(np.concatenate([a_char[substituted], a_char[deletion], np.zeros(insertion.sum(), np.int32)]))
+        actual.append(np.concatenate([b_char[substituted], np.zeros(deletion.sum(), np.int32), b_char[insertion]]))
+
+        i = i - (diagonal | deletion)
+        j = j - (diagonal | insertion)
+    if not predicted:
+        return np.empty(0, np.int32), np.empty(0, np.int32)
+    return np.concatenate(predicted), np.concatenate(actual)
+
+
+def _candidate_pairs(word_labels: Dict[str, Dict[str, bool]],
+                     missed_words: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    One row per (incorrect word, missed word) pair of the same group.
+    """
+    rows = []
+    for group_key, missed in missed_words.items():
+        incorrect = [word for word, correct in word_labels.get(group_key, {}).items() if not correct]
+        rows.extend((group_key, predicted, actual) for predicted in incorrect for actual in missed if actual)
+    return pd.DataFrame(rows, columns=["group_key", "predicted", "actual"])
+
+
+def align_word_errors(word_labels: Dict[str, Dict[str, bool]],
+                      missed_words: Dict[str, List[str]]) -> Dict[str, pd.DataFrame]:
+    """
+    Aligns incorrect words with missed words across all groups.
+    Returns "pairs" (the near-miss match of each incorrect word that has one) and
+    "confusions" (character-level predicted/actual counts over those matches, gaps as GAP).
+    """
+    candidates = _candidate_pairs(word_labels, missed_words)
+    empty = {"pairs": pd.DataFrame(columns=PAIR_COLUMNS), "confusions": pd.DataFrame(columns=CONFUSION_COLUMNS)}
+    if candidates.empty:
+        return empty
+
+    a, a_lengths = _encode(candidates["predicted"].tolist())
+    b, b_lengths = _encode(candidates["actual"].tolist())
+    candidates["distance"] = _edit_distances(a, b, a_lengths, b_lengths)
+    candidates["normalized_distance"] = candidates["distance"] / np.maximum(a_lengths, b_lengths)
+
+    # Each incorrect word keeps its closest missed word; then each missed word is used once
+    best = (candidates.reset_index()
+            .sort_values(["normalized_distance", "distance"], kind="stable")
+            .drop_duplicates(["group_key", "predicted"])
+            .drop_duplicates(["group_key", "actual"]))
+    best = best[best["normalized_distance"] <= MAX_NORMALIZED_DISTANCE]
+    if best.empty:
+        return empty
+
+    matched = best["index"].to_numpy()
+    a, b, a_lengths, b_lengths = a[matched], b[matched], a_lengths[matched], b_lengths[matched]
+    predicted, actual = _backtrace(_edit_distance_tables(a, b), a, b, a_lengths, b_lengths)
+    to_char = np.vectorize(lambda code: chr(code) if code else GAP, otypes=[object])
+    confusions = (pd.DataFrame({"predicted": to_char(predicted) if len(predicted) else [],
+                                "actual": to_char(actual) if len(actual) else []})
+                  .value_counts().rename("count").reset_index())
+
+    return {
+        "pairs": best[PAIR_COLUMNS].reset_index(drop=True),
+        "confusions": confusions.sort_values("count", ascending=False, kind="stable", ignore_index=True),
+    }